@@ -0,0 +1,266 @@
+"""
+Local stand-in for the OpenAI API, for benchmarks and offline runs.
+
+Serves /v1/chat/completions (plain and streamed) and /v1/embeddings with
+configurable latency and injected 429s. Responses follow the shape each of
+our prompts asks for: job listings, re-ranked listing ids or a resume summary.
+
+    python -m benchmarks.fake_openai --port 18080 --latency 1.5 --rate-limit-ratio 0.05
+"""
+import re
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+EMBEDDING_DIMENSIONS = 256
+
+def _tokens(text: str) -> int:
+    # Same rough 4-characters-per-token estimate the prompt budget falls back to
+    return max(1, len(text) // 4)
+
+def _seed(text: str) -> int:
+    return int(hashlib.sha256(text.encode('utf-8')).hexdigest()[:8], 16)
+
+def job_listings(prompt: str, count: int) -> Dict[str, Any]:
+    """Deterministic job listings for a prompt; different prompts get different jobs."""
+    rng = random.Random(_seed(prompt))
+    titles = ['Software Engineer', 'Data Engineer', 'Backend Developer', 'ML Engineer', 'Platform Engineer', 'SRE']
+    skills = ['Python', 'Go', 'Kubernetes', 'PostgreSQL', 'AWS', 'React', 'Machine Learning', 'Redis']
+    jobs = []
+    for index in range(count):
+        title = rng.choice(titles)
+        jobs.append({
+            'title': f'{rng.choice(["Senior ", "", "Staff "])}{title}',
+            'company': f'Company {rng.randint(1, 500)}',
+            'location': rng.choice(['Remote', 'Berlin', 'New York', 'London']),
+            'description': f'{title} working with {", ".join(rng.sample(skills, 3))}.',
+            'match_score': str(rng.randint(50, 99)),
+            'apply_link': f'https://jobs.example.com/{_seed(prompt) % 100000}/{index}'
+        })
+    return {
+        'jobs': jobs,
+        'followup_questions': ['Would you consider relocating?', 'Which industries interest you most?']
+    }
+
+def ranked_listings(prompt: str) -> Dict[str, Any]:
+    """Re-rank response: every candidate id in the prompt, in order, with a score."""
+    ids = re.findall(r'"id":\s*"?([\w-]+)"?', prompt)
+    return {
+        'jobs': [{'id': listing_id, 'match_score': 90 - index, 'reason': 'Relevant skills.'} for index, listing_id in enumerate(ids)],
+        'followup_questions': ['Which industries interest you most?']
+    }
+
+def resume_summary(prompt: str) -> Dict[str, Any]:
+    words = re.findall(r'[A-Z][a-zA-Z+#]+', prompt)
+    return {
+        'skills': sorted(set(words))[:10] or ['Python'],
+        'experience': [{'title': 'Software Engineer', 'company': 'Example Corp', 'duration': '3 years', 'highlights': []}],
+        'education': [{'degree': 'BSc Computer Science', 'institution': 'Example University', 'year': '2018'}],
+        'summary': 'Experienced software engineer.'
+    }
+
+def completion_content(messages: List[Dict[str, Any]], jobs_per_response: int) -> str:
+    """Answer in the format the system prompt asks for."""
+    system = next((m.get('content') or '' for m in messages if m.get('role') == 'system'), '')
+    prompt = "\n".join(m.get('content') or '' for m in messages if m.get('role') != 'system')
+    if 'resume analyzer' in system:
+        return json.dumps(resume_summary(prompt))
+    if 'listings with ids' in system:
+        return json.dumps(ranked_listings(prompt))
+    return json.dumps(job_listings(prompt, jobs_per_response))
+
+def embedding(text: str) -> List[float]:
+    rng = random.Random(_seed(text))
+    return [rng.uniform(-1.0, 1.0) for _ in range(EMBEDDING_DIMENSIONS)]
+
+class FakeOpenAIServer:
+    """
+    Threaded fake OpenAI endpoint. `latency` is the time to the first token,
+    `token_latency` the pause between streamed chunks and `rate_limit_ratio`
+    the fraction of requests answered with a 429.
+    """
+
+    def __init__(
+        self,
+        host: str = '127.0.0.1',
+        port: int = 0,
+        latency: float = 0.0,
+        token_latency: float = 0.0,
+        rate_limit_ratio: float = 0.0,
+        retry_after: float = 1.0,
+        jobs_per_response: int = 8,
+        chunk_chars: int = 24
+    ):
+        self.latency = latency
+        self.token_latency = token_latency
+        self.rate_limit_ratio = rate_limit_ratio
+        self.retry_after = retry_after
+        self.jobs_per_response = jobs_per_response
+        self.chunk_chars = chunk_chars
+        self.stats = {'chat_requests': 0, 'embedding_requests': 0, 'rate_limited': 0, 'streamed': 0}
+        self._stats_lock = threading.Lock()
+        self._random = random.Random(0)
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def count(self, stat: str) -> None:
+        with self._stats_lock:
+            self.stats[stat] += 1
+
+    def should_rate_limit(self) -> bool:
+        with self._stats_lock:
+            return self._random.random() < self.rate_limit_ratio
+
+    def start(self) -> 'FakeOpenAIServer':
+        self._thread = threading.Thread(target=self._server.serve_forever, name='fake-openai', daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        self._server.serve_forever()
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, status: int, payload: Dict[str, Any], headers: Dict[str, str] = None) -> None:
+                body = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _write_chunk(self, data: bytes) -> None:
+                self.wfile.write(f"{len(data):x}\r\n".encode('ascii') + data + b"\r\n")
+                self.wfile.flush()
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                request = json.loads(self.rfile.read(length) or b'{}')
+                if server.should_rate_limit():
+                    server.count('rate_limited')
+                    self._send_json(
+                        429,
+                        {'error': {'message': 'Rate limit reached (injected)', 'type': 'requests', 'code': 'rate_limit_exceeded'}},
+                        {'retry-after': str(server.retry_after), 'x-ratelimit-remaining-requests': '0'}
+                    )
+                    return
+                if self.path.endswith('/chat/completions'):
+                    self._chat(request)
+                elif self.path.endswith('/embeddings'):
+                    self._embeddings(request)
+                else:
+                    self._send_json(404, {'error': {'message': f'Unknown path {self.path}', 'type': 'invalid_request_error'}})
+
+            def _rate_limit_headers(self) -> Dict[str, str]:
+                # Plenty of headroom, so the shared limiter never backs off on its own
+                return {
+                    'x-ratelimit-remaining-requests': '10000',
+                    'x-ratelimit-remaining-tokens': '1000000',
+                    'x-ratelimit-reset-requests': '1s',
+                    'x-ratelimit-reset-tokens': '1s'
+                }
+
+            def _chat(self, request: Dict[str, Any]) -> None:
+                server.count('chat_requests')
+                messages = request.get('messages') or []
+                model = request.get('model', 'gpt-4')
+                content = completion_content(messages, server.jobs_per_response)
+                prompt_tokens = sum(_tokens(m.get('content') or '') for m in messages)
+                time.sleep(server.latency)
+                if not request.get('stream'):
+                    self._send_json(200, {
+                        'id': 'chatcmpl-fake',
+                        'object': 'chat.completion',
+                        'created': int(time.time()),
+                        'model': model,
+                        'choices': [{'index': 0, 'finish_reason': 'stop', 'message': {'role': 'assistant', 'content': content}}],
+                        'usage': {
+                            'prompt_tokens': prompt_tokens,
+                            'completion_tokens': _tokens(content),
+                            'total_tokens': prompt_tokens + _tokens(content)
+                        }
+                    }, self._rate_limit_headers())
+                    return
+
+                server.count('streamed')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.send_header('Transfer-Encoding', 'chunked')
+                for name, value in self._rate_limit_headers().items():
+                    self.send_header(name, value)
+                self.end_headers()
+                pieces = [content[i:i + server.chunk_chars] for i in range(0, len(content), server.chunk_chars)]
+                for index, piece in enumerate(pieces):
+                    chunk = {
+                        'id': 'chatcmpl-fake',
+                        'object': 'chat.completion.chunk',
+                        'created': int(time.time()),
+                        'model': model,
+                        'choices': [{'index': 0, 'delta': {'content': piece}, 'finish_reason': None}]
+                    }
+                    self._write_chunk(f"data: {json.dumps(chunk)}\n\n".encode('utf-8'))
+                    if server.token_latency and index < len(pieces) - 1:
+                        time.sleep(server.token_latency)
+                self._write_chunk(b"data: [DONE]\n\n")
+                self._write_chunk(b"")
+
+            def _embeddings(self, request: Dict[str, Any]) -> None:
+                server.count('embedding_requests')
+                inputs = request.get('input') or []
+                if isinstance(inputs, str):
+                    inputs = [inputs]
+                time.sleep(server.latency / 4)
+                tokens = sum(_tokens(str(text)) for text in inputs)
+                self._send_json(200, {
+                    'object': 'list',
+                    'model': request.get('model', 'text-embedding-ada-002'),
+                    'data': [
+                        {'object': 'embedding', 'index': index, 'embedding': embedding(str(text))}
+                        for index, text in enumerate(inputs)
+                    ],
+                    'usage': {'prompt_tokens': tokens, 'total_tokens': tokens}
+                }, self._rate_limit_headers())
+
+        return Handler
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Fake OpenAI API for offline runs')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=18080)
+    parser.add_argument('--latency', type=float, default=1.0, help='seconds to the first token')
+    parser.add_argument('--token-latency', type=float, default=0.02, help='seconds between streamed chunks')
+    parser.add_argument('--rate-limit-ratio', type=float, default=0.0, help='fraction of requests answered with 429')
+    parser.add_argument('--jobs', type=int, default=8, help='jobs per search response')
+    args = parser.parse_args()
+    server = FakeOpenAIServer(
+        args.host, args.port, args.latency, args.token_latency, args.rate_limit_ratio, jobs_per_response=args.jobs
+    )
+    print(f"Fake OpenAI listening on {server.base_url}")
+    server.serve_forever()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,189 @@
+"""
+In-memory stand-in for the parts of S3 the backend uses: buckets, objects
+and multipart uploads, with optional per-request latency. Point the backend
+at it with S3_ENDPOINT_URL.
+
+    python -m benchmarks.fake_s3 --port 19000
+"""
+import time
+import uuid
+import hashlib
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+def _error(code: str, message: str) -> bytes:
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        f'<Error><Code>{code}</Code><Message>{message}</Message></Error>'
+    ).encode('utf-8')
+
+class FakeS3Server:
+    """Threaded fake S3 endpoint (path-style addressing) backed by a dict."""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, latency: float = 0.0):
+        self.latency = latency
+        self.objects: Dict[Tuple[str, str], bytes] = {}
+        self.buckets = set()
+        self.stats = {'puts': 0, 'gets': 0, 'bytes_in': 0, 'multipart_uploads': 0}
+        self._uploads: Dict[str, Dict[int, bytes]] = {}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def endpoint_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'FakeS3Server':
+        self._thread = threading.Thread(target=self._server.serve_forever, name='fake-s3', daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        self._server.serve_forever()
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def _route(self) -> Tuple[str, str, Dict[str, str]]:
+                url = urlsplit(self.path)
+                bucket, _, key = unquote(url.path).lstrip('/').partition('/')
+                query = {name: values[0] for name, values in parse_qs(url.query, keep_blank_values=True).items()}
+                return bucket, key, query
+
+            def _body(self) -> bytes:
+                if self.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+                    data = b''
+                    while True:
+                        size = int(self.rfile.readline().split(b';')[0].strip() or b'0', 16)
+                        if size == 0:
+                            self.rfile.readline()
+                            return data
+                        data += self.rfile.read(size)
+                        self.rfile.readline()
+                return self.rfile.read(int(self.headers.get('Content-Length') or 0))
+
+            def _send(self, status: int, body: bytes = b'', headers: Dict[str, str] = None) -> None:
+                self.send_response(status)
+                self.send_header('Content-Length', str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                if body and self.command != 'HEAD':
+                    self.wfile.write(body)
+
+            def _wait(self) -> None:
+                if server.latency:
+                    time.sleep(server.latency)
+
+            def do_PUT(self):
+                bucket, key, query = self._route()
+                body = self._body()
+                self._wait()
+                etag = f'"{hashlib.md5(body).hexdigest()}"'
+                with server._lock:
+                    if not key:
+                        server.buckets.add(bucket)
+                        self._send(200)
+                        return
+                    if 'uploadId' in query:
+                        parts = server._uploads.get(query['uploadId'])
+                        if parts is None:
+                            self._send(404, _error('NoSuchUpload', 'Unknown upload id'))
+                            return
+                        parts[int(query['partNumber'])] = body
+                    else:
+                        server.objects[(bucket, key)] = body
+                        server.stats['puts'] += 1
+                    server.stats['bytes_in'] += len(body)
+                self._send(200, headers={'ETag': etag})
+
+            def do_POST(self):
+                bucket, key, query = self._route()
+                self._body()
+                self._wait()
+                with server._lock:
+                    if 'uploads' in query:
+                        upload_id = uuid.uuid4().hex
+                        server._uploads[upload_id] = {}
+                        body = (
+                            '<?xml version="1.0" encoding="UTF-8"?><InitiateMultipartUploadResult>'
+                            f'<Bucket>{bucket}</Bucket><Key>{key}</Key><UploadId>{upload_id}</UploadId>'
+                            '</InitiateMultipartUploadResult>'
+                        )
+                        self._send(200, body.encode('utf-8'), {'Content-Type': 'application/xml'})
+                        return
+                    parts = server._uploads.pop(query.get('uploadId', ''), None)
+                    if parts is None:
+                        self._send(404, _error('NoSuchUpload', 'Unknown upload id'))
+                        return
+                    data = b''.join(parts[number] for number in sorted(parts))
+                    server.objects[(bucket, key)] = data
+                    server.stats['puts'] += 1
+                    server.stats['multipart_uploads'] += 1
+                body = (
+                    '<?xml version="1.0" encoding="UTF-8"?><CompleteMultipartUploadResult>'
+                    f'<Bucket>{bucket}</Bucket><Key>{key}</Key>'
+                    f'<ETag>"{hashlib.md5(data).hexdigest()}-{len(parts)}"</ETag>'
+                    '</CompleteMultipartUploadResult>'
+                )
+                self._send(200, body.encode('utf-8'), {'Content-Type': 'application/xml'})
+
+            def do_GET(self):
+                bucket, key, _ = self._route()
+                self._wait()
+                with server._lock:
+                    data = server.objects.get((bucket, key))
+                    if data is not None:
+                        server.stats['gets'] += 1
+                if data is None:
+                    self._send(404, _error('NoSuchKey', 'The specified key does not exist.'), {'Content-Type': 'application/xml'})
+                    return
+                self._send(200, data, {'ETag': f'"{hashlib.md5(data).hexdigest()}"', 'Content-Type': 'application/octet-stream'})
+
+            def do_HEAD(self):
+                bucket, key, _ = self._route()
+                # Buckets spring into existence on first use
+                if not key:
+                    self._send(200)
+                    return
+                self.do_GET()
+
+            def do_DELETE(self):
+                bucket, key, query = self._route()
+                with server._lock:
+                    if 'uploadId' in query:
+                        server._uploads.pop(query['uploadId'], None)
+                    else:
+                        server.objects.pop((bucket, key), None)
+                self._send(204)
+
+        return Handler
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='In-memory fake S3 for offline runs')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=19000)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every request')
+    args = parser.parse_args()
+    server = FakeS3Server(args.host, args.port, args.latency)
+    print(f"Fake S3 listening on {server.endpoint_url}")
+    server.serve_forever()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,343 @@
+"""
+Offline benchmark: run the API and Celery workers against local Redis, the
+fake OpenAI server and the fake S3 server, drive upload -> search -> poll
+sessions at a fixed concurrency, and report throughput and p50/p95/p99 per
+stage. Nothing leaves the machine.
+
+    cd backend
+    python -m benchmarks.run --sessions 200 --concurrency 20 --openai-latency 2 \\
+        --output bench.json [--baseline previous.json --max-regression 0.2]
+
+Stages: upload (POST /api/upload_resume), submit (POST /api/deep_search),
+first_jobs (submit -> first streamed jobs), complete (submit -> terminal
+state) and session (the whole flow). Exits 1 if any session fails or a stage
+regresses past --max-regression against --baseline.
+"""
+import os
+import sys
+import json
+import time
+import socket
+import asyncio
+import argparse
+import tempfile
+import subprocess
+from typing import Any, Dict, List, Optional
+import httpx
+import redis
+from benchmarks.fake_openai import FakeOpenAIServer
+from benchmarks.fake_s3 import FakeS3Server
+from benchmarks.workload import regressions, sample_resume_pdf, summarize
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STAGES = ['upload', 'submit', 'first_jobs', 'complete', 'session']
+TERMINAL_STATES = {'SUCCESS', 'FAILURE', 'REVOKED'}
+
+PREFERENCES = {
+    "location": "Remote",
+    "company_size": "Any",
+    "role_type": "Software Engineering",
+    "additional_info": "Benchmark run"
+}
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def backend_env(args: argparse.Namespace, openai_url: str, s3_url: str) -> Dict[str, str]:
+    """Environment for the API and workers: every external service is local."""
+    env = dict(os.environ)
+    env.update({
+        'CELERY_BROKER_URL': args.redis_url,
+        'CELERY_RESULT_BACKEND': args.redis_url,
+        'OPENAI_API_KEY': 'sk-benchmark',
+        'OPENAI_BASE_URL': openai_url,
+        'S3_ENDPOINT_URL': s3_url,
+        'AWS_ACCESS_KEY_ID': 'benchmark',
+        'AWS_SECRET_ACCESS_KEY': 'benchmark',
+        'AWS_BUCKET_NAME': 'benchmark',
+        'RESULT_STORE_BACKEND': 'disk',
+        'RESULT_STORE_DIR': os.path.join(args.work_dir, 'results'),
+        'RESUME_PARSE_MODE': args.parse_mode,
+        'LOG_LEVEL': args.log_level,
+        'TESTING': 'false',
+        'PYTHONPATH': BACKEND_DIR,
+    })
+    return env
+
+class Stack:
+    """The fake services plus API and worker processes for one run."""
+
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.openai = FakeOpenAIServer(
+            latency=args.openai_latency,
+            token_latency=args.openai_token_latency,
+            rate_limit_ratio=args.rate_limit_ratio,
+            jobs_per_response=args.jobs_per_response
+        )
+        self.s3 = FakeS3Server(latency=args.s3_latency)
+        self.api_url = f"http://127.0.0.1:{args.api_port or free_port()}"
+        self.processes: List[subprocess.Popen] = []
+        self.logs: List[str] = []
+
+    def _spawn(self, name: str, command: List[str], env: Dict[str, str]) -> None:
+        log_path = os.path.join(self.args.work_dir, f'{name}.log')
+        log = open(log_path, 'w')
+        self.logs.append(log_path)
+        self.processes.append(subprocess.Popen(command, cwd=BACKEND_DIR, env=env, stdout=log, stderr=subprocess.STDOUT))
+
+    def start(self) -> None:
+        redis.Redis.from_url(self.args.redis_url, socket_connect_timeout=2).ping()
+        self.openai.start()
+        self.s3.start()
+        env = backend_env(self.args, self.openai.base_url, self.s3.endpoint_url)
+        port = self.api_url.rsplit(':', 1)[1]
+        self._spawn('api', [
+            sys.executable, '-m', 'uvicorn', 'main:app', '--host', '127.0.0.1', '--port', port,
+            '--workers', str(self.args.api_workers), '--log-level', 'warning'
+        ], env)
+        # Same pools and queues as docker-compose
+        self._spawn('worker_parse', [
+            sys.executable, '-m', 'celery', '-A', 'celery_app', 'worker', '-Q', 'parse', '-P', 'prefork',
+            '-c', str(self.args.parse_concurrency), '-n', f'parse-bench-{port}@%h', '--loglevel', 'warning'
+        ], env)
+        self._spawn('worker_llm', [
+            sys.executable, '-m', 'celery', '-A', 'celery_app', 'worker', '-Q', 'research,llm', '-P', 'threads',
+            '-c', str(self.args.llm_concurrency), '-n', f'llm-bench-{port}@%h', '--loglevel', 'warning'
+        ], env)
+        self._wait_ready()
+
+    def _wait_ready(self) -> None:
+        deadline = time.monotonic() + self.args.startup_timeout
+        while time.monotonic() < deadline:
+            for process, log in zip(self.processes, self.logs):
+                if process.poll() is not None:
+                    raise RuntimeError(f"{os.path.basename(log)} exited early; see {log}")
+            try:
+                # Ready means Redis, Celery workers and S3 all answered
+                if httpx.get(f"{self.api_url}/health/ready", timeout=2).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.5)
+        raise RuntimeError(f"Stack not ready after {self.args.startup_timeout}s; logs in {self.args.work_dir}")
+
+    def stop(self) -> None:
+        for process in self.processes:
+            process.terminate()
+        for process in self.processes:
+            try:
+                process.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        self.openai.stop()
+        self.s3.stop()
+
+class Recorder:
+    """Per-stage latency samples and error counts."""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+        self.errors: Dict[str, int] = {stage: 0 for stage in STAGES}
+        self.polls = 0
+        self.failures: List[str] = []
+
+    def add(self, stage: str, seconds: float) -> None:
+        self.samples[stage].append(seconds)
+
+    def fail(self, stage: str, message: str) -> None:
+        self.errors[stage] += 1
+        if len(self.failures) < 20:
+            self.failures.append(f"{stage}: {message}")
+
+async def wait_polling(client: httpx.AsyncClient, task_id: str, args: argparse.Namespace, recorder: Recorder, started: float) -> Dict[str, Any]:
+    first_jobs = False
+    while True:
+        response = await client.get(f"/api/task/{task_id}")
+        recorder.polls += 1
+        response.raise_for_status()
+        status = response.json()
+        if not first_jobs and (status.get('result') or {}).get('current_jobs'):
+            first_jobs = True
+            recorder.add('first_jobs', time.monotonic() - started)
+        if status['status'] in TERMINAL_STATES:
+            if not first_jobs and status['status'] == 'SUCCESS':
+                recorder.add('first_jobs', time.monotonic() - started)
+            return status
+        await asyncio.sleep(args.poll_interval)
+
+async def wait_streaming(client: httpx.AsyncClient, task_id: str, recorder: Recorder, started: float) -> Dict[str, Any]:
+    first_jobs = False
+    async with client.stream('GET', f"/api/task/{task_id}/stream") as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if not line.startswith('data: '):
+                continue
+            status = json.loads(line[len('data: '):])
+            if not first_jobs and ((status.get('result') or {}).get('current_jobs') or status['status'] == 'SUCCESS'):
+                first_jobs = True
+                recorder.add('first_jobs', time.monotonic() - started)
+            if status['status'] in TERMINAL_STATES:
+                return status
+    raise RuntimeError("stream closed before the task finished")
+
+async def run_session(client: httpx.AsyncClient, seed: int, args: argparse.Namespace, recorder: Recorder) -> None:
+    """One user: upload a resume, start a deep search and wait for it."""
+    session_start = time.monotonic()
+    stage = 'upload'
+    try:
+        # Repeated seeds hit the resume, profile and response caches like returning users would
+        resume_seed = seed if seed % 100 >= args.repeat_percent else 0
+        response = await client.post(
+            "/api/upload_resume",
+            files={'file': (f'resume-{resume_seed}.pdf', sample_resume_pdf(resume_seed), 'application/pdf')}
+        )
+        response.raise_for_status()
+        upload = response.json()
+        recorder.add(stage, time.monotonic() - session_start)
+
+        stage = 'submit'
+        started = time.monotonic()
+        request = {'preferences': PREFERENCES, 'priority': args.priority}
+        if upload.get('profile_id'):
+            request['profile_id'] = upload['profile_id']
+        else:
+            request['resume_summary'] = upload['summary']
+        response = await client.post("/api/deep_search", json=request)
+        response.raise_for_status()
+        task_id = response.json()['task_id']
+        recorder.add(stage, time.monotonic() - started)
+
+        stage = 'complete'
+        if args.mode == 'stream':
+            status = await wait_streaming(client, task_id, recorder, started)
+        else:
+            status = await wait_polling(client, task_id, args, recorder, started)
+        if status['status'] != 'SUCCESS':
+            raise RuntimeError(f"task {task_id} ended {status['status']}: {status.get('error')}")
+        recorder.add(stage, time.monotonic() - started)
+        recorder.add('session', time.monotonic() - session_start)
+    except Exception as e:
+        recorder.fail(stage, f"{type(e).__name__}: {e}")
+        recorder.fail('session', f"{type(e).__name__}: {e}")
+
+async def run_workload(api_url: str, args: argparse.Namespace) -> Dict[str, Any]:
+    recorder = Recorder()
+    semaphore = asyncio.Semaphore(args.concurrency)
+    limits = httpx.Limits(max_connections=args.concurrency * 2, max_keepalive_connections=args.concurrency * 2)
+
+    async with httpx.AsyncClient(base_url=api_url, timeout=args.session_timeout, limits=limits) as client:
+        async def bounded(seed: int) -> None:
+            async with semaphore:
+                await asyncio.wait_for(run_session(client, seed, args, recorder), args.session_timeout)
+
+        started = time.monotonic()
+        # Seeds are offset per run so caches from earlier runs don't skew results
+        base = int(time.time()) * 1000
+        results = await asyncio.gather(*(bounded(base + i) for i in range(args.sessions)), return_exceptions=True)
+        wall = time.monotonic() - started
+
+    for result in results:
+        if isinstance(result, asyncio.TimeoutError):
+            recorder.fail('session', f"timed out after {args.session_timeout}s")
+    return {
+        'settings': {
+            'sessions': args.sessions,
+            'concurrency': args.concurrency,
+            'mode': args.mode,
+            'parse_mode': args.parse_mode,
+            'openai_latency': args.openai_latency,
+            'openai_token_latency': args.openai_token_latency,
+            'rate_limit_ratio': args.rate_limit_ratio,
+            'llm_concurrency': args.llm_concurrency,
+            'parse_concurrency': args.parse_concurrency,
+            'api_workers': args.api_workers,
+        },
+        'wall_seconds': round(wall, 2),
+        'polls': recorder.polls,
+        'stages': {
+            stage: summarize(recorder.samples[stage], recorder.errors[stage], wall) for stage in STAGES
+        },
+        'failures': recorder.failures,
+    }
+
+def print_report(report: Dict[str, Any]) -> None:
+    print(f"\n{report['settings']['sessions']} sessions at concurrency {report['settings']['concurrency']} "
+          f"in {report['wall_seconds']}s ({report['polls']} polls)")
+    print(f"{'stage':<12}{'count':>7}{'errors':>8}{'rate/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for stage, stats in report['stages'].items():
+        print(f"{stage:<12}{stats['count']:>7}{stats['errors']:>8}{stats['throughput_per_s']:>9}"
+              f"{stats['p50_ms']:>10}{stats['p95_ms']:>10}{stats['p99_ms']:>10}")
+    if 'fakes' in report:
+        print(f"fake OpenAI: {report['fakes']['openai']}  fake S3: {report['fakes']['s3']}")
+    for failure in report['failures']:
+        print(f"  failed {failure}")
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Offline benchmark of the upload/search/poll flow')
+    parser.add_argument('--sessions', type=int, default=50, help='upload+search sessions to run')
+    parser.add_argument('--concurrency', type=int, default=10, help='sessions in flight at once')
+    parser.add_argument('--mode', choices=['poll', 'stream'], default='poll', help='how clients wait for results')
+    parser.add_argument('--poll-interval', type=float, default=1.0)
+    parser.add_argument('--priority', choices=['interactive', 'bulk'], default='interactive')
+    parser.add_argument('--repeat-percent', type=int, default=0, help='share of sessions re-uploading the same resume')
+    parser.add_argument('--session-timeout', type=float, default=300.0)
+    parser.add_argument('--redis-url', default=os.getenv('BENCHMARK_REDIS_URL', 'redis://127.0.0.1:6379/15'))
+    parser.add_argument('--api-url', help='benchmark an already running stack instead of starting one')
+    parser.add_argument('--api-port', type=int, default=0)
+    parser.add_argument('--api-workers', type=int, default=1)
+    parser.add_argument('--parse-mode', choices=['local', 'celery'], default='local')
+    parser.add_argument('--parse-concurrency', type=int, default=2)
+    parser.add_argument('--llm-concurrency', type=int, default=50)
+    parser.add_argument('--openai-latency', type=float, default=1.0, help='fake OpenAI seconds to first token')
+    parser.add_argument('--openai-token-latency', type=float, default=0.02, help='fake OpenAI seconds between chunks')
+    parser.add_argument('--rate-limit-ratio', type=float, default=0.0, help='fraction of fake OpenAI requests answered 429')
+    parser.add_argument('--jobs-per-response', type=int, default=8)
+    parser.add_argument('--s3-latency', type=float, default=0.0, help='fake S3 seconds per request')
+    parser.add_argument('--startup-timeout', type=float, default=60.0)
+    parser.add_argument('--log-level', default='WARNING', help='LOG_LEVEL for the API and workers')
+    parser.add_argument('--output', help='write the JSON report here')
+    parser.add_argument('--baseline', help='earlier JSON report to compare p95 latencies against')
+    parser.add_argument('--max-regression', type=float, default=0.2, help='allowed p95 growth over the baseline')
+    parser.add_argument('--work-dir', help='logs and result files (default: a temp dir)')
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    args.work_dir = args.work_dir or tempfile.mkdtemp(prefix='deep-job-search-bench-')
+    os.makedirs(args.work_dir, exist_ok=True)
+
+    stack = None
+    api_url = args.api_url
+    if api_url is None:
+        stack = Stack(args)
+        print(f"Starting stack (logs in {args.work_dir})...")
+        stack.start()
+        api_url = stack.api_url
+    try:
+        report = asyncio.run(run_workload(api_url, args))
+        if stack is not None:
+            report['fakes'] = {'openai': dict(stack.openai.stats), 's3': dict(stack.s3.stats)}
+    finally:
+        if stack is not None:
+            stack.stop()
+
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    exit_code = 1 if report['stages']['session']['errors'] else 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            found = regressions(report, json.load(f), args.max_regression)
+        for line in found:
+            print(f"REGRESSION {line}")
+        if found:
+            exit_code = 1
+    return exit_code
+
+if __name__ == '__main__':
+    sys.exit(main())
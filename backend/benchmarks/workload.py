@@ -0,0 +1,80 @@
+"""Synthetic resumes and latency statistics for the benchmark runner."""
+import math
+import random
+from typing import Dict, List, Sequence
+
+SKILLS = [
+    'Python', 'Go', 'Java', 'TypeScript', 'React', 'Kubernetes', 'Docker', 'AWS', 'GCP', 'PostgreSQL',
+    'Redis', 'Kafka', 'Machine Learning', 'PyTorch', 'FastAPI', 'Celery', 'Terraform', 'GraphQL'
+]
+TITLES = ['Software Engineer', 'Senior Software Engineer', 'Data Engineer', 'Backend Developer', 'ML Engineer']
+
+def resume_lines(seed: int) -> List[str]:
+    """Plain-text resume content; each seed gives a different resume."""
+    rng = random.Random(seed)
+    lines = [f'Candidate {seed}', f'{rng.choice(TITLES)} - {rng.randint(2, 15)} years of experience', '', 'Skills']
+    lines.append(', '.join(rng.sample(SKILLS, 6)))
+    lines += ['', 'Experience']
+    for index in range(3):
+        lines.append(f'{rng.choice(TITLES)}, Company {rng.randint(1, 999)} ({2015 + 2 * index}-{2017 + 2 * index})')
+        lines.append(f'Built services in {rng.choice(SKILLS)} and {rng.choice(SKILLS)} serving {rng.randint(1, 50)}M requests a day.')
+    lines += ['', 'Education', f'BSc Computer Science, University {rng.randint(1, 99)}']
+    return lines
+
+def _escape(text: str) -> str:
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+def sample_resume_pdf(seed: int) -> bytes:
+    """A small single-page text PDF that the resume parser can extract."""
+    text_ops = ['BT', '/F1 11 Tf', '14 TL', '72 740 Td']
+    for line in resume_lines(seed):
+        text_ops.append(f'({_escape(line)}) Tj T*')
+    text_ops.append('ET')
+    stream = '\n'.join(text_ops).encode('latin-1')
+
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        b'<< /Type /Pages /Kids [3 0 R] /Count 1 >>',
+        b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Resources << /Font << /F1 4 0 R >> >> /Contents 5 0 R >>',
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>',
+        b'<< /Length ' + str(len(stream)).encode('ascii') + b' >>\nstream\n' + stream + b'\nendstream',
+    ]
+    pdf = b'%PDF-1.4\n'
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(pdf))
+        pdf += f'{number} 0 obj\n'.encode('ascii') + body + b'\nendobj\n'
+    xref = len(pdf)
+    pdf += f'xref\n0 {len(objects) + 1}\n0000000000 65535 f \n'.encode('ascii')
+    pdf += b''.join(f'{offset:010d} 00000 n \n'.encode('ascii') for offset in offsets)
+    pdf += f'trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n'.encode('ascii')
+    return pdf
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """Nearest-rank percentile (q in 0-100); 0.0 for no values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+def summarize(samples: Sequence[float], errors: int, wall_seconds: float) -> Dict[str, float]:
+    """Count, throughput and latency percentiles (in ms) for one stage."""
+    return {
+        'count': len(samples),
+        'errors': errors,
+        'throughput_per_s': round(len(samples) / wall_seconds, 3) if wall_seconds > 0 else 0.0,
+        'mean_ms': round(1000 * sum(samples) / len(samples), 1) if samples else 0.0,
+        'p50_ms': round(1000 * percentile(samples, 50), 1),
+        'p95_ms': round(1000 * percentile(samples, 95), 1),
+        'p99_ms': round(1000 * percentile(samples, 99), 1),
+    }
+
+def regressions(report: Dict, baseline: Dict, max_regression: float, metric: str = 'p95_ms') -> List[str]:
+    """Stages whose `metric` grew by more than `max_regression` (a fraction) over the baseline."""
+    found = []
+    for stage, stats in report['stages'].items():
+        before = baseline.get('stages', {}).get(stage, {}).get(metric)
+        if before and stats[metric] > before * (1 + max_regression):
+            found.append(f"{stage}: {metric} {before} -> {stats[metric]} (+{100 * (stats[metric] / before - 1):.0f}%)")
+    return found
@@ -1,6 +1,15 @@
 import os
 from celery import Celery
+from kombu import Queue
+import time
+from celery.signals import (
+    before_task_publish, setup_logging, task_postrun, task_prerun,
+    worker_init, worker_process_init, worker_process_shutdown, worker_shutdown
+)
 from dotenv import load_dotenv
+from utils.openai_clients import init_worker_resources, shutdown_worker_resources
+from utils.result_store import SERIALIZER_NAME as COMPRESSED_RESULT_SERIALIZER
+from utils import telemetry
 
 load_dotenv()
 
@@ -12,17 +21,125 @@ celery_app = Celery(
     include=['tasks']  # Import tasks module
 )
 
+# Queue topology: CPU-bound parsing on prefork workers, I/O-bound LLM work
+# (research, summarization) on high-concurrency thread-pool workers
+PARSE_QUEUE = 'parse'
+LLM_QUEUE = 'llm'
+RESEARCH_QUEUE = 'research'
+
+# Redis priorities: lower number runs first, so interactive searches pre-empt bulk re-runs
+TASK_PRIORITIES = {
+    'interactive': 0,
+    'bulk': 9,
+}
+
+# Per-queue soft time limits; the hard limit leaves a grace period for cleanup
+TIME_LIMIT_GRACE = int(os.getenv('TIME_LIMIT_GRACE', '60'))
+SOFT_TIME_LIMITS = {
+    PARSE_QUEUE: int(os.getenv('PARSE_SOFT_TIME_LIMIT', '120')),
+    LLM_QUEUE: int(os.getenv('LLM_SOFT_TIME_LIMIT', '300')),
+    RESEARCH_QUEUE: int(os.getenv('RESEARCH_SOFT_TIME_LIMIT', '900')),
+}
+
+TASK_QUEUES = {
+    'tasks.parse_resume_task': PARSE_QUEUE,
+    'tasks.build_resume_profile_task': LLM_QUEUE,
+    'tasks.deep_research_task': RESEARCH_QUEUE,
+}
+
+# Unacknowledged (acks_late) messages go back to the queue after this long;
+# it must exceed the longest hard time limit plus any retry countdown, or a
+# still-running task gets delivered twice
+BROKER_VISIBILITY_TIMEOUT = int(os.getenv('BROKER_VISIBILITY_TIMEOUT', '3600'))
+
+# Results are msgpack-encoded and zstd-compressed, and expire from Redis after RESULT_EXPIRES
+RESULT_SERIALIZER = os.getenv('RESULT_SERIALIZER', COMPRESSED_RESULT_SERIALIZER)
+RESULT_EXPIRES = int(os.getenv('RESULT_EXPIRES', str(24 * 3600)))
+
 # Optional configurations
 celery_app.conf.update(
     task_serializer='json',
     accept_content=['json'],
-    result_serializer='json',
+    result_serializer=RESULT_SERIALIZER,
+    result_accept_content=['json', 'msgpack', COMPRESSED_RESULT_SERIALIZER],
+    result_expires=RESULT_EXPIRES,
     timezone='UTC',
     enable_utc=True,
     task_track_started=True,
-    task_time_limit=3600,  # 1 hour timeout
     worker_prefetch_multiplier=1,  # Process one task at a time
+    task_queues=[Queue(PARSE_QUEUE), Queue(LLM_QUEUE), Queue(RESEARCH_QUEUE)],
+    task_default_queue=RESEARCH_QUEUE,
+    task_routes={name: {'queue': queue} for name, queue in TASK_QUEUES.items()},
+    task_default_priority=TASK_PRIORITIES['interactive'],
+    broker_transport_options={
+        'priority_steps': list(range(10)),
+        'sep': ':',
+        'queue_order_strategy': 'priority',
+        'visibility_timeout': BROKER_VISIBILITY_TIMEOUT,
+    },
+    task_annotations={
+        name: {
+            'soft_time_limit': SOFT_TIME_LIMITS[queue],
+            'time_limit': SOFT_TIME_LIMITS[queue] + TIME_LIMIT_GRACE,
+        }
+        for name, queue in TASK_QUEUES.items()
+    },
 )
 
+# Worker-lifetime event loop and pooled OpenAI client
+@worker_process_init.connect
+def init_worker_process(**kwargs):
+    init_worker_resources()
+
+# Thread-pool workers run tasks in the main process, which only gets worker_shutdown
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def shutdown_worker_process(**kwargs):
+    shutdown_worker_resources()
+
+# Structured logging instead of Celery's default handlers
+@setup_logging.connect
+def configure_worker_logging(**kwargs):
+    telemetry.configure_logging()
+
+@worker_init.connect
+def start_worker_metrics(**kwargs):
+    telemetry.start_metrics_server()
+
+# Trace context and enqueue time travel with every task message
+@before_task_publish.connect
+def add_trace_headers(headers=None, **kwargs):
+    if headers is not None:
+        telemetry.inject_headers(headers)
+
+_task_spans = {}
+
+@task_prerun.connect
+def start_task_span(task_id=None, task=None, **kwargs):
+    request = task.request
+    queue = (request.delivery_info or {}).get('routing_key') or 'unknown'
+    enqueued_at = request.get(telemetry.ENQUEUED_AT_HEADER)
+    if enqueued_at:
+        telemetry.QUEUE_WAIT_SECONDS.labels(queue).observe(max(time.time() - float(enqueued_at), 0.0))
+    span = telemetry.start_span(
+        f"task {task.name}",
+        request.get(telemetry.TRACEPARENT_HEADER),
+        task_id=task_id,
+        queue=queue,
+        retries=request.retries
+    )
+    _task_spans[task_id] = (span, telemetry.activate(span))
+
+@task_postrun.connect
+def end_task_span(task_id=None, task=None, state=None, **kwargs):
+    entry = _task_spans.pop(task_id, None)
+    if entry is None:
+        return
+    span, token = entry
+    telemetry.deactivate(token)
+    span.set_attribute('state', state)
+    telemetry.TASK_SECONDS.labels(task.name, state or 'UNKNOWN').observe(span.elapsed())
+    telemetry.end_span(span)
+
 if __name__ == '__main__':
     celery_app.start()
@@ -1,22 +1,50 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException
+from fastapi import FastAPI, File, UploadFile, HTTPException, Request
+import logging
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import Dict, List, Optional
+from pydantic import BaseModel, model_validator
+from typing import Dict, List, Literal, Optional
 import os
+import json
+import asyncio
 from dotenv import load_dotenv
-from celery.result import AsyncResult
-import tempfile
-import boto3
+from celery import group
+from celery.result import AsyncResult, GroupResult
+import time
 import uuid
-from io import BytesIO
-import pdfplumber
-from utils.parse_resume import parse_resume
-from utils.summarization import summarize_resume
-from tasks import deep_research_task
-from config.aws_config import upload_to_s3
+from utils.parse_resume import extract_pdf_text
+from utils.resume_cache import get_cached_text, set_cached_text
+from utils.upload_buffer import UPLOAD_FORM_OVERHEAD, UPLOAD_MAX_BYTES, UploadBuffer, UploadTooLarge, read_upload
+from utils import extraction_service
+from utils.extraction_service import ExtractionQueueFull, ExtractionTimeout, run_extraction
+from utils import resume_profiles
+from utils import single_flight
+from utils import llm_cache
+from utils import health
+from utils import telemetry
+from utils.task_events import task_event_hub, TERMINAL_STATES
+from utils.result_store import load_result
+from tasks import deep_research_task, parse_resume_task, build_resume_profile_task
+from celery_app import celery_app, TASK_PRIORITIES
+from config.aws_config import upload_fileobj_in_background
+
+logger = logging.getLogger(__name__)
 
 load_dotenv()
 
+telemetry.configure_logging()
+
+SSE_KEEPALIVE_SECONDS = float(os.getenv('SSE_KEEPALIVE_SECONDS', '15'))
+
+# "local" parses uploads in the API's extraction pool, "celery" on the parse queue workers
+RESUME_PARSE_MODE = os.getenv('RESUME_PARSE_MODE', 'local')
+RESUME_PARSE_TIMEOUT = float(os.getenv('RESUME_PARSE_TIMEOUT', '120'))
+
+BATCH_MAX_SEARCHES = int(os.getenv('BATCH_MAX_SEARCHES', '100'))
+
+# Summarize each uploaded resume once in the background and store it as a profile
+RESUME_PROFILES_ENABLED = os.getenv('RESUME_PROFILES_ENABLED', 'true').lower() == 'true'
+
 app = FastAPI(title="Deep Job Search API")
 
 # CORS configuration
@@ -26,8 +54,40 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[telemetry.TRACEPARENT_HEADER],
 )
 
+@app.middleware("http")
+async def limit_upload_size(request: Request, call_next):
+    """
+    Reject oversized resume uploads by Content-Length, before Starlette
+    receives the multipart body and spools it to disk.
+    """
+    if request.method == 'POST' and request.url.path == '/api/upload_resume':
+        length = request.headers.get('content-length')
+        if length is None or not length.isdigit():
+            return JSONResponse(status_code=411, content={"detail": "Content-Length is required"})
+        if int(length) > UPLOAD_MAX_BYTES + UPLOAD_FORM_OVERHEAD:
+            return JSONResponse(status_code=413, content={"detail": f"Upload exceeds the {UPLOAD_MAX_BYTES} byte limit"})
+    return await call_next(request)
+
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    """
+    Open a span per request, continuing the caller's trace when it sends a
+    traceparent header, and hand the trace context back in the response.
+    """
+    with telemetry.span(
+        "http.request",
+        request.headers.get(telemetry.TRACEPARENT_HEADER),
+        method=request.method,
+        path=request.url.path
+    ) as current:
+        response = await call_next(request)
+        current.set_attribute("status_code", response.status_code)
+        response.headers[telemetry.TRACEPARENT_HEADER] = current.traceparent
+        return response
+
 class JobPreferences(BaseModel):
     location: str
     company_size: str
@@ -35,13 +95,32 @@ class JobPreferences(BaseModel):
     additional_info: Optional[str] = None
 
 class DeepSearchRequest(BaseModel):
-    resume_summary: dict
+    resume_summary: Optional[dict] = None
+    profile_id: Optional[str] = None
     preferences: JobPreferences
+    priority: Literal['interactive', 'bulk'] = 'interactive'
+
+    @model_validator(mode='after')
+    def check_resume(self):
+        if self.resume_summary is None and self.profile_id is None:
+            raise ValueError("Either resume_summary or profile_id is required")
+        return self
+
+class BatchSearchRequest(BaseModel):
+    searches: List[DeepSearchRequest]
+    priority: Literal['interactive', 'bulk'] = 'bulk'
+
+class BatchResponse(BaseModel):
+    batch_id: str
+    task_ids: List[str]
+    status: str
+    message: str
 
 class TaskResponse(BaseModel):
     task_id: str
     status: str
     message: str
+    deduplicated: bool = False
 
 class TaskStatus(BaseModel):
     task_id: str
@@ -50,86 +129,113 @@ class TaskStatus(BaseModel):
     result: Optional[dict]
     error: Optional[str]
 
+@app.on_event("startup")
+async def start_background_services():
+    health.start()
+
+@app.on_event("shutdown")
+async def shutdown_background_services():
+    health.stop()
+    extraction_service.shutdown()
+    await task_event_hub.close()
+
 @app.get("/")
 async def read_root():
     return {"message": "Deep Job Search API is running"}
 
+@app.get("/health/live")
+async def liveness_check():
+    """Liveness probe: the process is up and its event loop is responsive."""
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+async def readiness_check():
+    """
+    Readiness probe backed by cached Redis, Celery and S3 checks that are
+    refreshed in the background, so probes never touch the task queue.
+    """
+    report = health.readiness()
+    if report["status"] != "healthy":
+        return JSONResponse(status_code=503, content=report)
+    return report
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint for the backend service."""
+    return await readiness_check()
+
+async def extract_upload_text(buffer: UploadBuffer, filename: str) -> str:
+    """Extract text from an uploaded PDF without blocking the event loop."""
+    started = time.monotonic()
+    with telemetry.span("resume.parse", mode=RESUME_PARSE_MODE, size=buffer.size, spilled=buffer.spilled):
+        try:
+            if RESUME_PARSE_MODE == 'celery' and buffer.spilled:
+                # The parse worker maps the spilled file; only its path goes through the broker
+                task = parse_resume_task.apply_async(
+                    args=[buffer.path, filename],
+                    priority=TASK_PRIORITIES['interactive']
+                )
+                return await asyncio.to_thread(task.get, timeout=RESUME_PARSE_TIMEOUT)
+            # Spilled uploads reach the pool as a path the worker maps, not a pickled copy
+            return await run_extraction(extract_pdf_text, buffer.source())
+        finally:
+            telemetry.PARSE_SECONDS.labels(RESUME_PARSE_MODE).observe(time.monotonic() - started)
+
+def start_resume_profile(profile_id: str, resume_text: str, file_name: str) -> Optional[str]:
+    """
+    Make sure a profile exists for this resume, starting summarization the
+    first time it is seen. Returns None if profiles are unavailable.
+    """
+    if not RESUME_PROFILES_ENABLED:
+        return None
     try:
-        # Check Redis connection
-        task = deep_research_task.delay(
-            resume_summary={"test": "test"},
-            preferences={"test": "test"}
-        )
-        task.revoke()
-        
-        return {
-            "status": "healthy",
-            "services": {
-                "redis": "connected",
-                "celery": "connected"
-            }
-        }
+        if resume_profiles.create_profile(profile_id, resume_text, file_name):
+            build_resume_profile_task.apply_async(args=[profile_id], priority=TASK_PRIORITIES['bulk'])
+        return profile_id
     except Exception as e:
-        raise HTTPException(
-            status_code=503,
-            detail=f"Service unhealthy: {str(e)}"
-        )
+        # Searches still work from the raw text
+        logger.warning("Resume profile unavailable: %s", e)
+        return None
 
 @app.post("/api/upload_resume")
 async def upload_resume(file: UploadFile = File(...)):
+    buffer = None
     try:
-        # Read file content
-        content = await file.read()
+        # Read the upload once, in chunks, hashing and size-checking as it arrives
+        # Parse workers read uploads from the shared spill directory, so spill them all
+        buffer = await read_upload(file, spill_threshold=0 if RESUME_PARSE_MODE == 'celery' else None)
+        
+        # Re-uploads of the same file skip PDF extraction entirely
+        cache_key = buffer.sha256
+        resume_text = await asyncio.to_thread(get_cached_text, cache_key)
+        cached = resume_text is not None
         
         # For testing, we'll skip S3 upload and just process the file directly
         if os.getenv("TESTING") == "true":
-            # Create a temporary file to store the content
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as temp_file:
-                temp_file.write(content)
-                temp_path = temp_file.name
-            
-            # Process the resume
-            with pdfplumber.open(temp_path) as pdf:
-                resume_text = ""
-                for page in pdf.pages:
-                    resume_text += page.extract_text() + "\n"
-            os.unlink(temp_path)  # Clean up temp file
+            if not cached:
+                resume_text = await extract_upload_text(buffer, file.filename)
+                await asyncio.to_thread(set_cached_text, cache_key, resume_text)
             
             return {
                 "summary": {
                     "text": resume_text,
                     "file_name": file.filename,
                     "content_type": file.content_type
-                }
+                },
+                "cached": cached
             }
         
-        # For production, upload to S3
-        s3 = boto3.client(
-            's3',
-            aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
-            aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY')
-        )
-        
-        bucket_name = os.getenv('AWS_BUCKET_NAME', 'deep-job-search')
+        # For production, upload to S3 while parsing the same buffer
         file_key = f'resumes/{uuid.uuid4()}-{file.filename}'
+        upload = upload_fileobj_in_background(buffer.open(), file_key, file.content_type)
         
-        # Upload to S3
-        s3.put_object(
-            Bucket=bucket_name,
-            Key=file_key,
-            Body=content,
-            ContentType=file.content_type
-        )
-        
-        # Get the uploaded file from S3
-        s3_response = s3.get_object(Bucket=bucket_name, Key=file_key)
-        with pdfplumber.open(BytesIO(s3_response['Body'].read())) as pdf:
-            resume_text = ""
-            for page in pdf.pages:
-                resume_text += page.extract_text() + "\n"
+        try:
+            if not cached:
+                resume_text = await extract_upload_text(buffer, file.filename)
+                await asyncio.to_thread(set_cached_text, cache_key, resume_text)
+        finally:
+            # Surface upload errors before handing the key back to the client
+            await upload
         
         return {
             "summary": {
@@ -137,20 +243,116 @@ async def upload_resume(file: UploadFile = File(...)):
                 "file_name": file.filename,
                 "content_type": file.content_type,
                 "s3_key": file_key
-            }
+            },
+            "profile_id": await asyncio.to_thread(start_resume_profile, cache_key, resume_text, file.filename),
+            "cached": cached
         }
         
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ExtractionQueueFull as e:
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(extraction_service.RETRY_AFTER)}
+        )
+    except ExtractionTimeout as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error uploading to S3: {str(e)}")
+    finally:
+        if buffer is not None:
+            buffer.close()
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics for this process (or all processes in multi-process mode)."""
+    return Response(telemetry.metrics_payload(), media_type=telemetry.METRICS_CONTENT_TYPE)
+
+@app.get("/api/extraction/metrics")
+async def extraction_metrics():
+    """Queue depth and job counters for the resume extraction pool."""
+    return extraction_service.get_metrics()
+
+@app.get("/api/llm_cache/stats")
+async def llm_cache_stats():
+    """Hit/miss counters for the deep search response cache."""
+    try:
+        return llm_cache.get_stats()
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Cache stats unavailable: {str(e)}")
+
+@app.get("/api/resume_profile/{profile_id}")
+async def get_resume_profile(profile_id: str):
+    """Status of a resume profile and, once ready, its structured summary."""
+    try:
+        record = await asyncio.to_thread(resume_profiles.get_profile, profile_id)
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Resume profiles unavailable: {str(e)}")
+    if record is None:
+        raise HTTPException(status_code=404, detail=f"Resume profile {profile_id} not found")
+    return {
+        "profile_id": profile_id,
+        "status": record["status"],
+        "file_name": record.get("file_name"),
+        "summary": record.get("summary")
+    }
+
+def find_in_flight_search(dedupe_key: str, task_id: str) -> Optional[str]:
+    """
+    Claim the single-flight lease for a search. Returns the id of an identical
+    search that is still usable, or None if the caller should enqueue task_id.
+    """
+    try:
+        existing = single_flight.claim(dedupe_key, task_id)
+        if existing is not None and AsyncResult(existing).state in ('FAILURE', 'REVOKED'):
+            # Don't hand out a dead task; this request starts a fresh one
+            single_flight.replace(dedupe_key, task_id)
+            return None
+        return existing
+    except Exception as e:
+        # Without Redis, fall back to enqueueing every request
+        logger.warning("Single-flight lookup failed: %s", e)
+        return None
 
 @app.post("/api/deep_search", response_model=TaskResponse)
 async def deep_search(request: DeepSearchRequest):
     try:
-        # Start Celery task
-        task = deep_research_task.delay(
-            resume_summary=request.resume_summary,
-            preferences=request.preferences.dict()
-        )
+        resume_summary = None if request.profile_id else request.resume_summary
+        preferences = request.preferences.dict()
+        task_id = str(uuid.uuid4())
+        dedupe_key = None
+        
+        # Double clicks and client retries join the search already in flight
+        if single_flight.ENABLED:
+            dedupe_key = single_flight.request_key(resume_summary, request.profile_id, preferences)
+            existing = await asyncio.to_thread(find_in_flight_search, dedupe_key, task_id)
+            if existing is not None:
+                return {
+                    "task_id": existing,
+                    "status": "PENDING",
+                    "message": "Identical deep research task already running",
+                    "deduplicated": True
+                }
+        
+        # Start Celery task; the enqueue span's context travels in the message headers
+        try:
+            with telemetry.span("celery.enqueue", task_id=task_id):
+                task = deep_research_task.apply_async(
+                    kwargs={
+                        "resume_summary": resume_summary,
+                        "profile_id": request.profile_id,
+                        "preferences": preferences,
+                        "priority": request.priority
+                    },
+                    task_id=task_id,
+                    priority=TASK_PRIORITIES[request.priority]
+                )
+        except Exception:
+            # Identical requests must not join a task that was never enqueued
+            if dedupe_key is not None:
+                await asyncio.to_thread(single_flight.release, dedupe_key, task_id)
+            raise
         
         return {
             "task_id": task.id,
@@ -160,37 +362,229 @@ async def deep_search(request: DeepSearchRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def build_task_status(task_id: str, status: str, info) -> dict:
+    """
+    Shape a task's state into the TaskStatus payload. `info` is the progress
+    meta for PROGRESS, the return value for SUCCESS and the error for FAILURE.
+    """
+    result = {
+        "task_id": task_id,
+        "status": status,
+        "progress": None,
+        "result": None,
+        "error": None
+    }
+    
+    if status == 'PROGRESS':
+        info = info or {}
+        result["progress"] = info.get('progress', 0)
+        result["result"] = {
+            "current_jobs": info.get('current_jobs', []),
+            "total_jobs": info.get('total_jobs', len(info.get('current_jobs', []))),
+            "followup_questions": info.get('followup_questions', []),
+            "status": info.get('status', '')
+        }
+    elif status == 'SUCCESS':
+        result["progress"] = 100
+        result["result"] = load_result(info)
+    elif status == 'FAILURE':
+        result["error"] = str(info)
+    
+    return result
+
+def read_task_status(task_id: str) -> dict:
+    """Read a task's current state from the result backend."""
+    task_result = AsyncResult(task_id)
+    status = task_result.status
+    if status == 'FAILURE':
+        return build_task_status(task_id, status, task_result.result)
+    return build_task_status(task_id, status, task_result.info)
+
 @app.get("/api/task/{task_id}", response_model=TaskStatus)
 async def get_task_status(task_id: str):
     try:
-        task_result = AsyncResult(task_id)
-        
-        result = {
-            "task_id": task_id,
-            "status": task_result.status,
-            "progress": None,
-            "result": None,
-            "error": None
-        }
-        
-        if task_result.status == 'PROGRESS':
-            result["progress"] = task_result.info.get('progress', 0)
-            result["result"] = {
-                "current_jobs": task_result.info.get('current_jobs', []),
-                "followup_questions": task_result.info.get('followup_questions', []),
-                "status": task_result.info.get('status', '')
-            }
-        elif task_result.status == 'SUCCESS':
-            result["progress"] = 100
-            result["result"] = task_result.get()
-        elif task_result.status == 'FAILURE':
-            result["error"] = str(task_result.result)
+        # Result backend reads and side-store loads block; keep them off the loop
+        return await asyncio.to_thread(read_task_status, task_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+def event_to_task_status(event: dict) -> dict:
+    """Shape a published task event into the TaskStatus payload."""
+    state, meta = event["state"], event["meta"]
+    if state == 'FAILURE' and isinstance(meta, dict):
+        meta = meta.get('error')
+    return build_task_status(event["task_id"], state, meta)
+
+def _sse(event: str, payload: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+@app.get("/api/task/{task_id}/stream")
+async def stream_task_status(task_id: str, request: Request):
+    """
+    Server-Sent Events stream of a task's progress. Sends the current state
+    first, then every update the worker publishes, and closes after the
+    final SUCCESS or FAILURE event.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    
+    async def event_stream():
+        # Subscribed here, not before the response starts: a client gone before
+        # the first chunk never runs the generator, so it would never unsubscribe
+        try:
+            await task_event_hub.subscribe(task_id, queue)
+            # Snapshot after subscribing so no update in between is lost
+            snapshot = await asyncio.to_thread(read_task_status, task_id)
+            yield _sse(snapshot["status"].lower(), snapshot)
+            if snapshot["status"] in TERMINAL_STATES:
+                return
             
-        return result
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        return
+                    yield ": keepalive\n\n"
+                    continue
+                
+                payload = await asyncio.to_thread(event_to_task_status, event)
+                yield _sse(payload["status"].lower(), payload)
+                if payload["status"] in TERMINAL_STATES:
+                    return
+        finally:
+            await task_event_hub.unsubscribe(task_id, queue)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def summarize_batch(batch_id: str, statuses: List[dict]) -> dict:
+    """Aggregate the TaskStatus payloads of a batch into one progress view."""
+    finished = [s for s in statuses if s["status"] in TERMINAL_STATES]
+    progress = sum(100 if s["status"] in TERMINAL_STATES else (s["progress"] or 0) for s in statuses)
+    if len(finished) == len(statuses):
+        status = "COMPLETE"
+    elif any(s["status"] != "PENDING" for s in statuses):
+        status = "PROGRESS"
+    else:
+        status = "PENDING"
+    
+    return {
+        "batch_id": batch_id,
+        "status": status,
+        "progress": progress // max(len(statuses), 1),
+        "total": len(statuses),
+        "completed": sum(1 for s in finished if s["status"] == "SUCCESS"),
+        "failed": sum(1 for s in finished if s["status"] != "SUCCESS"),
+        "tasks": statuses
+    }
+
+def read_task_statuses(task_ids: List[str]) -> List[dict]:
+    """Read the current state of several tasks (blocking; call it in a thread)."""
+    return [read_task_status(task_id) for task_id in task_ids]
+
+def restore_batch(batch_id: str) -> GroupResult:
+    group_result = GroupResult.restore(batch_id, app=celery_app)
+    if group_result is None:
+        raise HTTPException(status_code=404, detail=f"Batch {batch_id} not found")
+    return group_result
+
+@app.post("/api/deep_search/batch", response_model=BatchResponse)
+async def deep_search_batch(request: BatchSearchRequest):
+    """
+    Enqueue many deep searches as one Celery group. All searches share the
+    OpenAI rate budget and response cache at the batch's priority.
+    """
+    if not request.searches:
+        raise HTTPException(status_code=400, detail="Batch must contain at least one search")
+    if len(request.searches) > BATCH_MAX_SEARCHES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Batch exceeds the maximum of {BATCH_MAX_SEARCHES} searches"
+        )
+    
+    try:
+        batch = group(
+            deep_research_task.signature(
+                kwargs={
+                    "resume_summary": None if search.profile_id else search.resume_summary,
+                    "profile_id": search.profile_id,
+                    "preferences": search.preferences.dict(),
+                    "priority": request.priority
+                },
+                priority=TASK_PRIORITIES[request.priority]
+            )
+            for search in request.searches
+        )
+        group_result = batch.apply_async()
+        group_result.save()
         
+        return {
+            "batch_id": group_result.id,
+            "task_ids": [result.id for result in group_result.results],
+            "status": "PENDING",
+            "message": f"Started {len(request.searches)} deep research tasks"
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/deep_search/batch/{batch_id}")
+async def get_batch_status(batch_id: str):
+    """Aggregated progress plus per-search status for a batch."""
+    # Up to BATCH_MAX_SEARCHES result backend reads; keep them off the event loop
+    group_result = await asyncio.to_thread(restore_batch, batch_id)
+    try:
+        statuses = await asyncio.to_thread(read_task_statuses, [r.id for r in group_result.results])
+        return summarize_batch(batch_id, statuses)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/deep_search/batch/{batch_id}/stream")
+async def stream_batch_status(batch_id: str, request: Request):
+    """
+    Server-Sent Events stream of a batch: a "task" event whenever one search
+    changes and a "batch" event with the aggregate, closing once all finish.
+    """
+    group_result = await asyncio.to_thread(restore_batch, batch_id)
+    task_ids = [r.id for r in group_result.results]
+    
+    # One queue for the whole batch; every event carries its task_id
+    queue: asyncio.Queue = asyncio.Queue()
+    
+    async def event_stream():
+        try:
+            for task_id in task_ids:
+                await task_event_hub.subscribe(task_id, queue)
+            statuses = dict(zip(task_ids, await asyncio.to_thread(read_task_statuses, task_ids)))
+            summary = summarize_batch(batch_id, list(statuses.values()))
+            yield _sse("batch", summary)
+            
+            while summary["status"] != "COMPLETE":
+                try:
+                    event = await asyncio.wait_for(queue.get(), SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        return
+                    yield ": keepalive\n\n"
+                    continue
+                
+                payload = await asyncio.to_thread(event_to_task_status, event)
+                statuses[payload["task_id"]] = payload
+                summary = summarize_batch(batch_id, list(statuses.values()))
+                yield _sse("task", payload)
+                yield _sse("batch", {k: v for k, v in summary.items() if k != "tasks"})
+        finally:
+            for task_id in task_ids:
+                await task_event_hub.unsubscribe(task_id, queue)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -1,27 +1,148 @@
+import time
+import logging
+from celery import Task
+from celery.exceptions import SoftTimeLimitExceeded
+from concurrent import futures
 from celery_app import celery_app
-from utils.prompt_generator import create_deep_search_prompt, call_openai_for_jobs
-import asyncio
-from typing import Dict, Any
+from utils.prompt_generator import create_deep_search_prompt, generate_followup_questions
+from utils import llm_cache
+from utils.llm_cache import cached_call_openai_for_jobs
+from utils import fan_out
+from utils import job_index
+from utils import match_scoring
+from utils.task_events import publish_task_event
+from utils.openai_clients import run_in_worker_loop
+from utils.result_store import compact_progress_meta, store_result
+from utils.parse_resume import extract_resume_text
+from utils.summarization import summarize_resume
+from utils import resume_profiles
+from utils import single_flight
+from utils import task_checkpoints
+from utils.task_checkpoints import TransientSearchError
+from utils import telemetry
+from utils.rate_limiter import RateLimitExceeded
+from typing import Dict, Any, List, Optional
 
-@celery_app.task(bind=True)
-def deep_research_task(self, resume_summary: Dict[str, Any], preferences: Dict[str, Any]) -> Dict[str, Any]:
+logger = logging.getLogger(__name__)
+
+class ProgressTask(Task):
+    """
+    Task base class that mirrors every state change onto Redis pub/sub so
+    the API can push progress to clients instead of having them poll.
+    """
+
+    def update_state(self, task_id=None, state=None, meta=None, **kwargs):
+        if state == 'PROGRESS':
+            meta = compact_progress_meta(meta)
+        super().update_state(task_id=task_id, state=state, meta=meta, **kwargs)
+        publish_task_event(task_id or self.request.id, state, meta)
+
+    def on_success(self, retval, task_id, args, kwargs):
+        publish_task_event(task_id, 'SUCCESS', retval)
+
+    def on_failure(self, exc, task_id, args, kwargs, einfo):
+        publish_task_event(task_id, 'FAILURE', {'error': str(exc)})
+
+    def on_retry(self, exc, task_id, args, kwargs, einfo):
+        publish_task_event(task_id, 'RETRY', {'error': str(exc)})
+
+class ProgressPublisher:
+    """
+    Publishes PROGRESS updates from callbacks that run on the shared worker
+    loop. The Redis writes happen in order on one thread of the task's own,
+    so streaming one task's jobs never stalls other tasks' calls on the loop.
+    """
+
+    def __init__(self, task: Task, task_id: str):
+        self._task = task
+        self._task_id = task_id
+        self._executor = futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix='progress')
+        self._closed = False
+
+    def publish(self, meta: Dict[str, Any]) -> None:
+        if not self._closed:
+            self._executor.submit(self._task.update_state, task_id=self._task_id, state='PROGRESS', meta=meta)
+
+    def close(self) -> None:
+        """Wait for queued updates, so later states aren't overwritten by them."""
+        self._closed = True
+        self._executor.shutdown(wait=True)
+
+def _remaining(deadline: Optional[float]) -> Optional[float]:
+    """Seconds left before a task's deadline (None when it has no time limit)."""
+    return None if deadline is None else max(deadline - time.monotonic(), 0)
+
+# Failures a later attempt can get past; it resumes from the task's checkpoint
+RETRYABLE_ERRORS = (TransientSearchError, RateLimitExceeded, SoftTimeLimitExceeded, futures.TimeoutError)
+
+# acks_late: a worker killed mid-task (e.g. a rolling deploy) leaves the
+# message unacknowledged, so it is redelivered and resumes from its checkpoint
+@celery_app.task(
+    bind=True,
+    base=ProgressTask,
+    acks_late=True,
+    reject_on_worker_lost=True,
+    max_retries=task_checkpoints.MAX_RETRIES
+)
+def deep_research_task(
+    self,
+    resume_summary: Optional[Dict[str, Any]],
+    preferences: Dict[str, Any],
+    priority: str = 'interactive',
+    profile_id: Optional[str] = None
+) -> Dict[str, Any]:
     """
     Celery task to perform deep research for job opportunities.
     Uses OpenAI to generate relevant job listings based on resume and preferences.
+    `priority` ('interactive' or 'bulk') decides how the task shares the OpenAI budget.
+    With `profile_id` the resume comes from the stored profile instead of the request.
+    Transient failures are retried with backoff; every attempt resumes from the
+    task's checkpoint, so LLM steps that already finished are not paid for again.
     """
+    dedupe_key = single_flight.request_key(resume_summary, profile_id, preferences)
+    # Callbacks below run on the worker loop thread, where self.request is empty
+    task_id = self.request.id
+    # One budget for the whole attempt, shared by every wait on the worker loop
+    deadline = None if self.soft_time_limit is None else time.monotonic() + self.soft_time_limit
+    publisher = ProgressPublisher(self, task_id)
+    streamed_jobs = []
+    retrying = False
     try:
+        checkpoint = task_checkpoints.load(task_id)
+        attempts = task_checkpoints.start_attempt(task_id)
+        if attempts > task_checkpoints.MAX_DELIVERIES:
+            raise Exception(f"Error running deep search: gave up after {attempts - 1} attempts")
+        
+        # Later attempts keep the resume the first one searched with, even if
+        # the profile has become ready since, so checkpointed steps stay valid
+        if 'resume_summary' in checkpoint:
+            resume_summary = checkpoint['resume_summary']
+        elif profile_id:
+            resume_summary = resume_profiles.resolve_resume_summary(profile_id)
+
         # Update initial state
+        if checkpoint:
+            # Steps an earlier attempt finished are replayed, not searched again
+            completed = task_checkpoints.completed_steps(checkpoint)
+            status = f'Resuming job search ({len(completed)} completed steps reused)...' if completed else 'Resuming job search...'
+        else:
+            status = 'Starting job search...'
         self.update_state(
             state='PROGRESS',
             meta={
                 'progress': 0,
-                'status': 'Starting job search...',
-                'current_jobs': []
+                'status': status,
+                'current_jobs': checkpoint.get('partial_jobs', [])
             }
         )
 
         # Create the search prompt
-        prompt = create_deep_search_prompt(resume_summary, preferences)
+        if 'prompt' in checkpoint:
+            prompt = checkpoint['prompt']
+        else:
+            with telemetry.span("prompt.build"):
+                prompt = create_deep_search_prompt(resume_summary, preferences)
+            task_checkpoints.save(task_id, {'resume_summary': resume_summary, 'prompt': prompt})
         
         # Update state - prompt created
         self.update_state(
@@ -33,43 +154,134 @@ def deep_research_task(self, resume_summary: Dict[str, Any], preferences: Dict[s
             }
         )
 
-        # Create event loop for async OpenAI call
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
+        def publish_job(job: Dict[str, Any]) -> None:
+            # Surface each job as soon as it has streamed in
+            streamed_jobs.append(job)
+            publisher.publish({
+                'progress': min(20 + 10 * len(streamed_jobs), 85),
+                'status': f'Found {len(streamed_jobs)} matching jobs...',
+                'current_jobs': list(streamed_jobs)
+            })
         
-        try:
-            # Call OpenAI API
-            result = loop.run_until_complete(call_openai_for_jobs(prompt))
+        # Call OpenAI API
+        similarity_text = llm_cache.similarity_text(resume_summary, preferences)
+        with telemetry.span("llm.search", priority=priority) as search_span:
+            result = None
+            if job_index.ENABLED:
+                # Re-rank listings from the local index; None means fall back to generation
+                result = run_in_worker_loop(
+                    task_checkpoints.step(
+                        task_id,
+                        'grounded',
+                        lambda: job_index.grounded_search(
+                            resume_summary,
+                            preferences,
+                            on_job=publish_job,
+                            priority=priority
+                        ),
+                        on_job=publish_job
+                    ),
+                    timeout=_remaining(deadline)
+                )
+        
+            if result is None and fan_out.ENABLED:
+                def publish_branches(jobs: List[Dict[str, Any]], completed: int, total: int) -> None:
+                    # Merged, re-ranked results so far across all sub-queries
+                    publisher.publish({
+                        'progress': min(20 + int(65 * completed / total), 85),
+                        'status': f'Searched {completed} of {total} job segments...',
+                        'current_jobs': jobs
+                    })
             
-            # Update state with results
-            self.update_state(
-                state='PROGRESS',
-                meta={
-                    'progress': 90,
-                    'status': 'Processing results...',
-                    'current_jobs': result.get('jobs', [])
-                }
+                result = run_in_worker_loop(
+                    fan_out.fan_out_search(
+                        resume_summary,
+                        preferences,
+                        on_update=publish_branches,
+                        similarity_text=similarity_text,
+                        priority=priority,
+                        checkpoint_id=task_id
+                    ),
+                    timeout=_remaining(deadline)
+                )
+            elif result is None:
+                result = run_in_worker_loop(
+                    task_checkpoints.step(
+                        task_id,
+                        'search',
+                        lambda: cached_call_openai_for_jobs(
+                            prompt,
+                            similarity_text=similarity_text,
+                            on_job=publish_job,
+                            priority=priority,
+                            check=match_scoring.relevance_check(resume_summary, preferences)
+                        ),
+                        on_job=publish_job
+                    ),
+                    timeout=_remaining(deadline)
+                )
+        
+            search_span.set_attribute('job_count', len(result.get('jobs') or []))
+        publisher.close()
+        
+        # Retry transient failures; on the last attempt, partial fan-out results are kept
+        if result.get('retryable') and (not result.get('jobs') or self.request.retries < self.max_retries):
+            raise TransientSearchError(result.get('error') or "Error searching jobs: some job segments failed")
+        
+        # Update state with results
+        self.update_state(
+            state='PROGRESS',
+            meta={
+                'progress': 90,
+                'status': 'Processing results...',
+                'current_jobs': result.get('jobs', [])
+            }
+        )
+
+        # Process and validate results
+        if not result.get('jobs'):
+            result['jobs'] = []
+        if match_scoring.ENABLED and result['jobs']:
+            # Deterministic ranking instead of the LLM's self-reported match_score
+            with telemetry.span("match.score", job_count=len(result['jobs'])):
+                resume_vector, job_vectors = run_in_worker_loop(
+                    match_scoring.embed_for_scoring(result['jobs'], resume_summary, priority),
+                    timeout=_remaining(deadline)
+                )
+                result['jobs'] = match_scoring.rank_jobs(
+                    result['jobs'], resume_summary, preferences, resume_vector, job_vectors
+                )
+        if not result.get('followup_questions') and result['jobs']:
+            # Ask the cheap follow-up model rather than fall back to generic questions
+            result['followup_questions'] = run_in_worker_loop(
+                generate_followup_questions(resume_summary, preferences, result['jobs'], priority),
+                timeout=_remaining(deadline)
             )
+        if not result.get('followup_questions'):
+            result['followup_questions'] = [
+                "Would you like to specify any particular industry?",
+                "Are there specific technologies or skills you'd like to focus on?",
+                "Do you have any preferences regarding company culture?"
+            ]
 
-            # Process and validate results
-            if not result.get('jobs'):
-                result['jobs'] = []
-            if not result.get('followup_questions'):
-                result['followup_questions'] = [
-                    "Would you like to specify any particular industry?",
-                    "Are there specific technologies or skills you'd like to focus on?",
-                    "Do you have any preferences regarding company culture?"
-                ]
-
-            return {
+        # Large results go to the side store; the backend only keeps a reference
+        with telemetry.span("result.store"):
+            stored = store_result(task_id, {
                 'jobs': result['jobs'],
                 'followup_questions': result['followup_questions']
-            }
-
-        finally:
-            loop.close()
+            })
+        task_checkpoints.clear(task_id)
+        return stored
 
     except Exception as e:
+        publisher.close()
+        if isinstance(e, RETRYABLE_ERRORS) and self.request.retries < self.max_retries:
+            retrying = True
+            # Jobs streamed before the failure show up again as soon as the retry starts
+            task_checkpoints.save(task_id, {'partial_jobs': streamed_jobs})
+            if single_flight.ENABLED:
+                single_flight.replace(dedupe_key, task_id)
+            raise self.retry(exc=e, countdown=task_checkpoints.retry_countdown(self.request.retries))
         self.update_state(
             state='FAILURE',
             meta={
@@ -77,4 +289,48 @@ def deep_research_task(self, resume_summary: Dict[str, Any], preferences: Dict[s
                 'status': 'Failed to complete job search'
             }
         )
+        try:
+            task_checkpoints.clear(task_id)
+        except Exception as clear_error:
+            # Checkpoints expire on their own; don't hide the original failure
+            logger.warning("Failed to clear checkpoints of task %s: %s", task_id, clear_error)
+        raise
+    finally:
+        # Later identical searches start fresh instead of joining this one; a
+        # retry keeps the lease so they join the retried task instead
+        if single_flight.ENABLED and not retrying:
+            single_flight.release(dedupe_key, self.request.id)
+
+@celery_app.task
+def parse_resume_task(path: str, filename: str) -> str:
+    """
+    Celery task to extract resume text (PDF or OCR) on the CPU-bound parse queue.
+    `path` is the spilled upload in UPLOAD_SPILL_DIR, which the API and parse
+    workers share, so the file itself never goes through the broker.
+    """
+    return extract_resume_text(path, filename)
+
+@celery_app.task(bind=True, max_retries=3)
+def build_resume_profile_task(self, profile_id: str) -> str:
+    """
+    Celery task to summarize an uploaded resume once and store the result as
+    its profile. Searches use the raw text until the profile is ready.
+    """
+    record = resume_profiles.get_profile(profile_id)
+    if record is None or record['status'] == resume_profiles.READY:
+        return profile_id
+    
+    try:
+        summary = run_in_worker_loop(summarize_resume(record['text']), timeout=self.soft_time_limit)
+    except RateLimitExceeded as e:
+        # Background work yields to interactive searches; try again later
+        if self.request.retries < self.max_retries:
+            raise self.retry(exc=e, countdown=60)
+        resume_profiles.save_profile(profile_id, {**record, 'status': resume_profiles.FAILED})
+        raise
+    except Exception:
+        resume_profiles.save_profile(profile_id, {**record, 'status': resume_profiles.FAILED})
         raise
+    
+    resume_profiles.save_profile(profile_id, {**record, 'status': resume_profiles.READY, 'summary': summary})
+    return profile_id
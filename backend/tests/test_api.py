@@ -63,21 +63,18 @@ def test_deep_search():
     for field in required_fields:
         assert field in first_job
 
-def test_invalid_file_upload():
+def test_invalid_file_upload(tmp_path):
     """Test upload with invalid file type"""
     # Create a text file
-    with open("test.txt", "w") as f:
-        f.write("test content")
+    text_file = tmp_path / "test.txt"
+    text_file.write_text("test content")
     
-    with open("test.txt", "rb") as f:
+    with open(text_file, "rb") as f:
         files = {"file": ("test.txt", f, "text/plain")}
         response = client.post("/api/upload_resume", files=files)
     
     assert response.status_code == 400
     assert "Unsupported file format" in response.json()["detail"]
-    
-    # Clean up
-    os.remove("test.txt")
 
 def test_invalid_deep_search_request():
     """Test deep search with invalid data"""
@@ -0,0 +1,43 @@
+from types import SimpleNamespace
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+import main
+from main import app, build_task_status, summarize_batch
+
+client = TestClient(app)
+
+def test_summarize_batch_aggregates_progress():
+    statuses = [
+        build_task_status("a", "SUCCESS", {"jobs": [], "followup_questions": []}),
+        build_task_status("b", "PROGRESS", {"progress": 50}),
+        build_task_status("c", "FAILURE", "boom"),
+        build_task_status("d", "PENDING", None),
+    ]
+    summary = summarize_batch("batch-1", statuses)
+    
+    assert summary["status"] == "PROGRESS"
+    assert summary["progress"] == (100 + 50 + 100 + 0) // 4
+    assert (summary["total"], summary["completed"], summary["failed"]) == (4, 1, 1)
+
+def test_summarize_batch_complete_when_all_terminal():
+    statuses = [build_task_status("a", "SUCCESS", {}), build_task_status("b", "FAILURE", "boom")]
+    assert summarize_batch("batch-1", statuses)["status"] == "COMPLETE"
+
+def test_empty_batch_rejected():
+    response = client.post("/api/deep_search/batch", json={"searches": []})
+    assert response.status_code == 400
+
+def test_batch_status_reads_every_task(monkeypatch):
+    batch = SimpleNamespace(results=[SimpleNamespace(id="a"), SimpleNamespace(id="b")])
+    monkeypatch.setattr(main, "restore_batch", lambda batch_id: batch)
+    monkeypatch.setattr(main, "read_task_status", lambda task_id: build_task_status(task_id, "SUCCESS", {}))
+    response = client.get("/api/deep_search/batch/batch-1")
+    assert response.status_code == 200
+    assert response.json()["status"] == "COMPLETE"
+    assert [task["task_id"] for task in response.json()["tasks"]] == ["a", "b"]
+
+def test_unknown_batch_is_404(monkeypatch):
+    def missing(batch_id):
+        raise HTTPException(status_code=404, detail=f"Batch {batch_id} not found")
+    monkeypatch.setattr(main, "restore_batch", missing)
+    assert client.get("/api/deep_search/batch/nope").status_code == 404
@@ -0,0 +1,78 @@
+import io
+import json
+import boto3
+import pytest
+from botocore.config import Config
+from boto3.s3.transfer import TransferConfig
+from openai import OpenAI, RateLimitError
+from benchmarks.fake_openai import FakeOpenAIServer
+from benchmarks.fake_s3 import FakeS3Server
+from benchmarks.workload import percentile, regressions, sample_resume_pdf, summarize
+from utils.job_stream_parser import JobStreamParser
+from utils.parse_resume import extract_pdf_text
+
+@pytest.fixture
+def fake_openai():
+    server = FakeOpenAIServer(jobs_per_response=3).start()
+    yield server
+    server.stop()
+
+@pytest.fixture
+def fake_s3():
+    server = FakeS3Server().start()
+    yield server
+    server.stop()
+
+def test_fake_openai_streams_parseable_jobs(fake_openai):
+    client = OpenAI(api_key="sk-test", base_url=fake_openai.base_url)
+    stream = client.chat.completions.create(
+        model="gpt-4",
+        messages=[{"role": "system", "content": "Find jobs"}, {"role": "user", "content": "Python developer"}],
+        stream=True
+    )
+    parser = JobStreamParser()
+    jobs = [job for chunk in stream for job in parser.feed(chunk.choices[0].delta.content or "")]
+    assert len(jobs) == 3
+    assert json.loads(parser.text)["followup_questions"]
+
+def test_fake_openai_injects_rate_limits(fake_openai):
+    fake_openai.rate_limit_ratio = 1.0
+    client = OpenAI(api_key="sk-test", base_url=fake_openai.base_url, max_retries=0)
+    with pytest.raises(RateLimitError):
+        client.chat.completions.create(model="gpt-4", messages=[{"role": "user", "content": "hi"}])
+    assert fake_openai.stats["rate_limited"] == 1
+
+def test_fake_s3_round_trips_multipart_uploads(fake_s3):
+    s3 = boto3.client(
+        "s3",
+        endpoint_url=fake_s3.endpoint_url,
+        aws_access_key_id="test",
+        aws_secret_access_key="test",
+        region_name="us-east-1",
+        config=Config(s3={"addressing_style": "path"})
+    )
+    s3.head_bucket(Bucket="bench")
+    data = bytes(range(256)) * 40000
+    s3.upload_fileobj(
+        io.BytesIO(data), "bench", "resumes/big.pdf",
+        Config=TransferConfig(multipart_threshold=5 * 1024 * 1024, multipart_chunksize=5 * 1024 * 1024)
+    )
+    assert fake_s3.stats["multipart_uploads"] == 1
+    assert s3.get_object(Bucket="bench", Key="resumes/big.pdf")["Body"].read() == data
+
+def test_sample_resume_is_extractable():
+    text = extract_pdf_text(sample_resume_pdf(7))
+    assert "Candidate 7" in text
+    assert "Skills" in text
+    assert sample_resume_pdf(7) != sample_resume_pdf(8)
+
+def test_summarize_and_regressions():
+    assert percentile([0.1 * i for i in range(1, 101)], 95) == pytest.approx(9.5)
+    stats = summarize([0.1, 0.2, 0.3, 0.4], errors=1, wall_seconds=2.0)
+    assert stats["count"] == 4 and stats["errors"] == 1
+    assert stats["throughput_per_s"] == 2.0
+    assert stats["p50_ms"] == 200.0
+    baseline = {"stages": {"complete": {"p95_ms": 100.0}, "upload": {"p95_ms": 50.0}}}
+    report = {"stages": {"complete": {"p95_ms": 130.0}, "upload": {"p95_ms": 55.0}}}
+    found = regressions(report, baseline, max_regression=0.2)
+    assert len(found) == 1 and found[0].startswith("complete")
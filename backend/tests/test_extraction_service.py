@@ -0,0 +1,53 @@
+import os
+import asyncio
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+import pytest
+from utils import extraction_service
+from utils.extraction_service import ExtractionQueueFull, run_extraction
+from utils.parse_resume import extract_pdf_text
+
+SAMPLE_CV_PATH = Path(__file__).parent.parent.parent / "e2e" / "fixtures" / "sample_cv.pdf"
+
+@pytest.fixture(autouse=True)
+def shutdown_pool():
+    yield
+    extraction_service.shutdown()
+
+def test_extracts_pdf_in_worker_process():
+    content = SAMPLE_CV_PATH.read_bytes()
+    text = asyncio.run(run_extraction(extract_pdf_text, content))
+    assert text.strip()
+    assert extraction_service.get_metrics()['completed'] >= 1
+
+def test_rejects_when_queue_full(monkeypatch):
+    monkeypatch.setattr(extraction_service, "POOL_SIZE", 0)
+    monkeypatch.setattr(extraction_service, "MAX_QUEUE", 0)
+    
+    with pytest.raises(ExtractionQueueFull):
+        asyncio.run(run_extraction(extract_pdf_text, b""))
+
+def test_crashed_worker_does_not_break_the_pool():
+    async def crash_then_extract():
+        with pytest.raises(BrokenProcessPool):
+            await run_extraction(os._exit, 1)
+        return await run_extraction(extract_pdf_text, SAMPLE_CV_PATH.read_bytes())
+
+    assert asyncio.run(crash_then_extract()).strip()
+    metrics = extraction_service.get_metrics()
+    assert metrics['in_flight'] == 0
+    assert metrics['failed'] >= 1
+
+def test_slot_is_released_when_submit_fails(monkeypatch):
+    class Broken:
+        def submit(self, *args):
+            raise BrokenProcessPool("pool is broken")
+
+        def shutdown(self, **kwargs):
+            pass
+
+    monkeypatch.setattr(extraction_service, "_executor", Broken())
+    with pytest.raises(BrokenProcessPool):
+        asyncio.run(run_extraction(extract_pdf_text, b""))
+    assert extraction_service.get_metrics()['in_flight'] == 0
+    assert extraction_service._executor is None
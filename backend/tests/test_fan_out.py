@@ -0,0 +1,48 @@
+from utils.fan_out import JobMerger, build_sub_queries, parse_match_score
+
+PREFERENCES = {
+    "location": "Remote",
+    "company_size": "Any",
+    "role_type": "Software Engineering",
+    "additional_info": None
+}
+
+def test_sub_queries_per_location_and_role():
+    sub_queries = build_sub_queries({**PREFERENCES, "location": "Remote, New York", "role_type": "AI/ML or Backend"})
+    
+    assert {(q["location"], q["role_type"]) for q in sub_queries} == {
+        ("Remote", "AI/ML"), ("Remote", "Backend"), ("New York", "AI/ML"), ("New York", "Backend")
+    }
+
+def test_sub_queries_fall_back_to_seniority_bands():
+    sub_queries = build_sub_queries(PREFERENCES)
+    
+    assert len(sub_queries) > 1
+    assert all(q["location"] == "Remote" for q in sub_queries)
+    assert all(q["additional_info"].startswith("Focus on") for q in sub_queries)
+
+def test_parse_match_score():
+    assert parse_match_score({"match_score": "85%"}) == 85
+    assert parse_match_score({"match_score": 72.5}) == 72.5
+    assert parse_match_score({}) == 0
+
+def test_merger_dedupes_and_ranks():
+    merger = JobMerger()
+    merger.add({"title": "ML Engineer", "company": "Acme", "match_score": "70"})
+    merger.add({"title": "ml engineer ", "company": "ACME", "match_score": "90"})
+    merger.add({"title": "Other", "company": "Globex", "apply_link": "https://x/1", "match_score": "80"})
+    merger.add({"title": "Renamed", "company": "Globex", "apply_link": "https://x/1", "match_score": "10"})
+    
+    ranked = merger.ranked()
+    assert [(job["title"], job["match_score"]) for job in ranked] == [("ml engineer ", "90"), ("Other", "80")]
+
+def test_merger_collapses_jobs_matched_by_both_keys():
+    merger = JobMerger()
+    merger.add({"title": "ML Engineer", "company": "Acme", "match_score": "70"})
+    merger.add({"title": "Data Scientist", "company": "Acme", "apply_link": "https://x/1", "match_score": "60"})
+    assert merger.add({"title": "ML Engineer", "company": "Acme", "apply_link": "https://x/1", "match_score": "50"})
+    assert [job["title"] for job in merger.ranked()] == ["ML Engineer"]
+    
+    assert not merger.add({"title": "Renamed", "company": "Acme", "apply_link": "https://x/1", "match_score": "65"})
+    assert not merger.add({"title": "Data Scientist", "company": "Acme", "match_score": "65"})
+    assert [(job["title"], job["match_score"]) for job in merger.ranked()] == [("ML Engineer", "70")]
@@ -0,0 +1,43 @@
+import time
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+from utils import health
+
+client = TestClient(app)
+
+@pytest.fixture(autouse=True)
+def reset_results():
+    health._results.clear()
+    yield
+    health._results.clear()
+
+def _mark_all(ok: bool, checked_at: float = None):
+    for name in health.CHECKS:
+        health._results[name] = {
+            'ok': ok,
+            'error': None if ok else 'down',
+            'latency_ms': 1.0,
+            'checked_at': checked_at or time.time()
+        }
+
+def test_liveness_never_checks_dependencies():
+    response = client.get("/health/live")
+    assert response.status_code == 200
+    assert response.json() == {"status": "alive"}
+
+def test_ready_when_all_checks_pass():
+    _mark_all(True)
+    response = client.get("/health/ready")
+    assert response.status_code == 200
+    assert response.json()["status"] == "healthy"
+
+def test_not_ready_before_first_check():
+    response = client.get("/health/ready")
+    assert response.status_code == 503
+
+def test_not_ready_when_results_are_stale():
+    _mark_all(True, checked_at=time.time() - health.CACHE_TTL - 1)
+    response = client.get("/health")
+    assert response.status_code == 503
+    assert all(s["error"] == "check result is stale" for s in response.json()["services"].values())
@@ -0,0 +1,73 @@
+import json
+import asyncio
+import numpy as np
+import pytest
+from utils import job_index
+from utils.job_index import JobIndex, read_listings
+from utils.rate_limiter import RateLimitExceeded
+
+JOBS = [
+    {"id": "0", "title": "Python Backend Engineer", "location": "Berlin", "description": "Django, PostgreSQL"},
+    {"id": "1", "title": "Frontend Developer", "location": "Remote", "description": "React and TypeScript"},
+    {"id": "2", "title": "Data Engineer", "location": "London", "description": "Python, Spark, Airflow"},
+    {"id": "3", "title": "Sales Manager", "location": "Berlin", "description": "Enterprise accounts"},
+]
+VECTORS = np.array([[1, 0, 0], [0, 1, 0], [0.8, 0, 0.6], [0, 0, 1]], dtype=np.float32)
+
+def test_hybrid_search_ranks_keyword_and_vector_matches():
+    index = JobIndex(JOBS, VECTORS)
+    results = index.search("python engineer", [1, 0, 0], {"location": "Any"}, k=2)
+    assert [job["id"] for job in results] == ["0", "2"]
+
+def test_preferences_filter_listings():
+    index = JobIndex(JOBS, VECTORS)
+    results = index.search("python engineer", [1, 0, 0], {"location": "Berlin"})
+    assert {job["id"] for job in results} <= {"0", "3"}
+    assert results[0]["id"] == "0"
+
+def test_clustered_index_finds_nearest(monkeypatch):
+    monkeypatch.setattr(job_index, "ANN_MIN_SIZE", 100)
+    monkeypatch.setattr(job_index, "TOP_K", 5)
+    rng = np.random.default_rng(1)
+    vectors = rng.normal(size=(400, 16)).astype(np.float32)
+    jobs = [{"id": str(i), "title": f"Job {i}"} for i in range(400)]
+    index = JobIndex(jobs, vectors)
+    scores = index.vector_scores(vectors[42], np.ones(400, dtype=bool))
+    assert int(np.argmax(scores)) == 42
+
+def test_save_load_and_jsonl_import(tmp_path):
+    source = tmp_path / "listings.jsonl"
+    source.write_text("\n".join(json.dumps({k: v for k, v in job.items() if k != "id"}) for job in JOBS))
+    jobs = list(read_listings(source))
+    assert [job["id"] for job in jobs] == ["0", "1", "2", "3"]
+    
+    JobIndex(jobs, VECTORS).save(tmp_path / "index")
+    loaded = JobIndex.load(tmp_path / "index")
+    assert len(loaded) == 4
+    assert loaded.search("react", [0, 1, 0], {})[0]["id"] == "1"
+    assert sorted(path.name for path in (tmp_path / "index").iterdir()) == ["jobs.jsonl", "vectors.npy"]
+
+def test_mismatched_index_keeps_the_loaded_one(tmp_path, monkeypatch):
+    monkeypatch.setattr(job_index, "INDEX_DIR", tmp_path)
+    monkeypatch.setattr(job_index, "_index", None)
+    JobIndex(JOBS, VECTORS).save(tmp_path)
+    assert len(job_index.get_index()) == 4
+    
+    np.save(tmp_path / "vectors.npy", VECTORS[:2])
+    monkeypatch.setattr(job_index, "_index_mtime", 0.0)
+    assert len(job_index.get_index()) == 4
+
+def test_embedding_failure_falls_back_to_generation(monkeypatch):
+    monkeypatch.setattr(job_index, "get_index", lambda: JobIndex(JOBS, VECTORS))
+
+    async def outage(texts, priority="interactive"):
+        raise ConnectionError("Connection error.")
+
+    async def shed(texts, priority="interactive"):
+        raise RateLimitExceeded("bulk budget exhausted")
+
+    monkeypatch.setattr(job_index, "embed_texts", outage)
+    assert asyncio.run(job_index.grounded_search({"skills": ["Python"]}, {})) is None
+    monkeypatch.setattr(job_index, "embed_texts", shed)
+    with pytest.raises(RateLimitExceeded):
+        asyncio.run(job_index.grounded_search({"skills": ["Python"]}, {}))
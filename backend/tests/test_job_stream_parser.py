@@ -0,0 +1,44 @@
+import json
+from utils.job_stream_parser import JobStreamParser, parse_job_response
+
+COMPLETION = json.dumps({
+    "jobs": [
+        {"title": "ML Engineer", "company": "Acme", "description": "Builds {models} \"fast\""},
+        {"title": "Data Engineer", "company": "Globex", "tags": ["spark", "sql"]}
+    ],
+    "followup_questions": ["Remote only?"]
+})
+
+def test_emits_jobs_as_they_complete():
+    parser = JobStreamParser()
+    emitted = []
+    for i in range(0, len(COMPLETION), 7):
+        emitted.extend(parser.feed(COMPLETION[i:i + 7]))
+    
+    assert [job["title"] for job in emitted] == ["ML Engineer", "Data Engineer"]
+    assert emitted[0]["description"] == "Builds {models} \"fast\""
+    assert parser.text == COMPLETION
+
+def test_first_job_available_before_completion_ends():
+    parser = JobStreamParser()
+    cut = COMPLETION.index("Data Engineer")
+    
+    assert [job["company"] for job in parser.feed(COMPLETION[:cut])] == ["Acme"]
+    assert parser.feed(COMPLETION[cut:])[0]["company"] == "Globex"
+
+def test_parse_strips_fences_and_trailing_prose():
+    text = "Here you go:\n```json\n" + COMPLETION + "\n```\nLet me know if you need more!"
+    result = parse_job_response(text)
+    assert [job["title"] for job in result["jobs"]] == ["ML Engineer", "Data Engineer"]
+    assert result["followup_questions"] == ["Remote only?"]
+    assert "partial" not in result
+
+def test_parse_salvages_complete_jobs_from_truncated_output():
+    cut = COMPLETION.index("Data Engineer")
+    result = parse_job_response("```json\n" + COMPLETION[:cut])
+    assert [job["title"] for job in result["jobs"]] == ["ML Engineer"]
+    assert result["partial"] is True
+
+def test_parse_drops_jobs_that_fail_the_schema():
+    text = json.dumps({"jobs": [{"company": "No title"}, {"title": "Engineer", "match_score": 90}]})
+    assert parse_job_response(text)["jobs"] == [{"title": "Engineer", "match_score": 90.0}]
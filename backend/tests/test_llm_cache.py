@@ -0,0 +1,72 @@
+import asyncio
+from types import SimpleNamespace
+from utils import llm_cache
+from utils.llm_cache import VectorIndex, cache_key
+from utils.prompt_budget import count_tokens
+
+PARAMS = {"model": "gpt-4", "temperature": 0.7, "max_tokens": 2000}
+
+def test_cache_key_ignores_whitespace():
+    assert cache_key("find   jobs\n  for me", PARAMS) == cache_key("find jobs for me", PARAMS)
+
+def test_cache_key_includes_model_params():
+    assert cache_key("find jobs", PARAMS) != cache_key("find jobs", {**PARAMS, "temperature": 0.2})
+
+def test_vector_index_returns_nearest():
+    index = VectorIndex(max_entries=10, ttl=60)
+    index.add("a", [1.0, 0.0, 0.0])
+    index.add("b", [0.0, 1.0, 0.0])
+    
+    key, score = index.nearest([0.9, 0.1, 0.0])
+    assert key == "a"
+    assert score > 0.99
+
+def test_vector_index_evicts_oldest():
+    index = VectorIndex(max_entries=1, ttl=60)
+    index.add("a", [1.0, 0.0])
+    index.add("b", [0.0, 1.0])
+    
+    assert len(index) == 1
+    assert index.nearest([1.0, 0.0])[0] == "b"
+
+def test_vector_index_drops_expired():
+    index = VectorIndex(max_entries=10, ttl=0)
+    index.add("a", [1.0, 0.0])
+    
+    assert index.nearest([1.0, 0.0]) is None
+
+def test_partial_results_are_not_cached(monkeypatch):
+    stored = []
+    monkeypatch.setattr(llm_cache, "ENABLED", True)
+    monkeypatch.setattr(llm_cache, "_get_exact", lambda key: None)
+    monkeypatch.setattr(llm_cache, "_set_exact", lambda key, result: stored.append(key))
+    monkeypatch.setattr(llm_cache, "_record", lambda stat: None)
+
+    async def truncated(prompt, on_job=None, priority="interactive", check=None):
+        return {"jobs": [{"title": "Engineer"}], "followup_questions": [], "partial": True}
+
+    monkeypatch.setattr(llm_cache, "call_openai_for_jobs", truncated)
+    result = asyncio.run(llm_cache.cached_call_openai_for_jobs("find jobs"))
+    assert result["jobs"] and stored == []
+
+def test_similarity_text_is_bounded(monkeypatch):
+    monkeypatch.setattr(llm_cache, "SIMILARITY_ENABLED", True)
+    monkeypatch.setattr(llm_cache, "SIMILARITY_TEXT_TOKENS", 100)
+    text = llm_cache.similarity_text({"text": "Experienced engineer. " * 2000}, {"location": "Remote"})
+    assert count_tokens(text) < 150
+    assert '"location": "Remote"' in text
+
+def test_similarity_embedding_waits_on_the_rate_budget(monkeypatch):
+    acquired = []
+
+    async def acquire(model, tokens, priority="interactive"):
+        acquired.append((model, priority))
+
+    class Embeddings:
+        async def create(self, model, input):
+            return SimpleNamespace(data=[SimpleNamespace(embedding=[1.0, 0.0])])
+
+    monkeypatch.setattr(llm_cache, "acquire", acquire)
+    monkeypatch.setattr(llm_cache, "get_async_client", lambda: SimpleNamespace(embeddings=Embeddings()))
+    assert asyncio.run(llm_cache._embed("resume and preferences", "bulk")) == [1.0, 0.0]
+    assert acquired == [(llm_cache.EMBEDDING_MODEL, "bulk")]
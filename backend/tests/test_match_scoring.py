@@ -0,0 +1,41 @@
+import numpy as np
+from utils import model_router
+from utils.match_scoring import embedding_scores, rank_jobs, relevance_check, score_jobs, skill_scores
+
+JOBS = [
+    {"title": "Pastry Chef", "location": "Paris", "description": "Croissants", "match_score": "95"},
+    {"title": "Backend Engineer", "location": "Berlin", "description": "Python services and machine learning pipelines", "match_score": "60"},
+    {"title": "Frontend Engineer", "location": "Berlin", "description": "React", "match_score": "80"},
+]
+RESUME = {"skills": ["Python", "Machine Learning", "Kubernetes"]}
+PREFERENCES = {"location": "Berlin", "role_type": "Engineer", "company_size": "Any"}
+
+def test_skill_overlap_counts_phrases():
+    scores = skill_scores(JOBS, RESUME)
+    assert np.allclose(scores, [0, 2 / 3, 0])
+
+def test_raw_text_resume_uses_term_similarity():
+    scores = skill_scores(JOBS, {"text": "Python engineer with machine learning"})
+    assert scores[1] > scores[2] > scores[0]
+
+def test_rank_jobs_orders_truncates_and_keeps_llm_score():
+    ranked = rank_jobs(JOBS, RESUME, PREFERENCES, limit=2)
+    assert [job["title"] for job in ranked] == ["Backend Engineer", "Frontend Engineer"]
+    assert ranked[0]["llm_match_score"] == "60"
+    assert ranked[0]["match_score"] > ranked[1]["match_score"]
+
+def test_scores_are_reproducible_and_use_embeddings():
+    without = score_jobs(JOBS, RESUME, PREFERENCES)
+    assert np.array_equal(without, score_jobs(JOBS, RESUME, PREFERENCES))
+    with_vectors = score_jobs(JOBS, RESUME, PREFERENCES, [1, 0], [[1, 0], [0, 1], [1, 0]])
+    assert with_vectors[0] > without[0]
+    assert np.allclose(embedding_scores([1, 0], [[1, 0], [-1, 0]]), [1, 0])
+
+def test_relevance_check_uses_computed_scores(monkeypatch):
+    monkeypatch.setattr(model_router, "CASCADE_MIN_JOBS", 3)
+    monkeypatch.setattr(model_router, "CASCADE_MIN_SCORE", 30)
+    result = {"jobs": [{**job, "company": "Acme", "match_score": "99"} for job in JOBS]}
+    assert relevance_check(RESUME, PREFERENCES)(result) is None
+    unrelated = {"skills": ["Accounting"]}, {"location": "Tokyo", "role_type": "Nurse"}
+    assert relevance_check(*unrelated)(result) == "low_relevance"
+    assert relevance_check(RESUME, PREFERENCES)({"jobs": result["jobs"][:2]}) == "too_few_jobs"
@@ -0,0 +1,86 @@
+import asyncio
+import pytest
+from utils import model_router, prompt_generator
+from utils.rate_limiter import RateLimitExceeded
+
+def _jobs(count):
+    return [{"title": f"Engineer {i}", "company": "Acme", "description": "Python services"} for i in range(count)]
+
+@pytest.fixture
+def route(monkeypatch):
+    monkeypatch.setitem(model_router.ROUTES, "search", ["fast", "strong"])
+    monkeypatch.setitem(model_router.TIERS, "fast", "gpt-3.5-turbo")
+    monkeypatch.setitem(model_router.TIERS, "strong", "gpt-4")
+
+def test_check_jobs_reasons(monkeypatch):
+    monkeypatch.setattr(model_router, "CASCADE_MIN_JOBS", 3)
+    assert model_router.check_jobs({"jobs": _jobs(3), "error": "OpenAI API error: timeout"}) == "error"
+    assert model_router.check_jobs({"jobs": _jobs(3), "partial": True}) == "truncated"
+    assert model_router.check_jobs({"jobs": _jobs(2)}) == "too_few_jobs"
+    assert model_router.check_jobs({"jobs": _jobs(2) + _jobs(1)}) == "too_few_jobs"
+    assert model_router.check_jobs({"jobs": _jobs(2) + [{"title": "Chef", "company": "Acme"}]}) == "too_few_jobs"
+    assert model_router.check_jobs({"jobs": _jobs(3)}) is None
+
+def test_estimate_cost():
+    assert model_router.estimate_cost("gpt-4", 1000, 500) == pytest.approx(0.06)
+    assert model_router.estimate_cost("unknown-model", 1000, 500) == 0.0
+
+def test_cascade_stops_at_first_accepted_tier(route):
+    models = []
+
+    async def attempt(params, final):
+        models.append(params["model"])
+        model_router.record_usage(params["model"], 1000, 100)
+        return {"jobs": _jobs(5)}
+
+    result = asyncio.run(model_router.cascade("search", attempt, model_router.check_jobs))
+    assert models == ["gpt-3.5-turbo"]
+    assert len(result["jobs"]) == 5
+
+def test_cascade_escalates_on_rejection_and_failure(route, monkeypatch):
+    monkeypatch.setitem(model_router.ROUTES, "search", ["fast", "gpt-4o-mini", "strong"])
+    models = []
+
+    async def attempt(params, final):
+        models.append(params["model"])
+        if params["model"] == "gpt-3.5-turbo":
+            return {"jobs": _jobs(1)}
+        if params["model"] == "gpt-4o-mini":
+            raise ValueError("malformed response")
+        return {"jobs": _jobs(5)}
+
+    result = asyncio.run(model_router.cascade("search", attempt, model_router.check_jobs))
+    assert models == ["gpt-3.5-turbo", "gpt-4o-mini", "gpt-4"]
+    assert len(result["jobs"]) == 5
+
+def test_cascade_does_not_escalate_shed_calls(route):
+    async def attempt(params, final):
+        raise RateLimitExceeded("budget exhausted")
+
+    with pytest.raises(RateLimitExceeded):
+        asyncio.run(model_router.cascade("search", attempt, model_router.check_jobs))
+
+def test_rejected_tier_jobs_are_not_streamed(route, monkeypatch):
+    async def complete(prompt, on_job, priority, system_prompt, params, schema):
+        jobs = _jobs(1) if params["model"] == "gpt-3.5-turbo" else _jobs(4)
+        for job in jobs:
+            if on_job is not None:
+                on_job({**job, "model": params["model"]})
+        return {"jobs": jobs, "followup_questions": []}
+
+    monkeypatch.setattr(prompt_generator, "_complete_jobs", complete)
+    streamed = []
+    result = asyncio.run(prompt_generator.call_openai_for_jobs("find jobs", on_job=streamed.append))
+    assert len(result["jobs"]) == 4
+    assert [job["model"] for job in streamed] == ["gpt-4"] * 4
+
+def test_accepted_fast_tier_jobs_are_streamed(route, monkeypatch):
+    async def complete(prompt, on_job, priority, system_prompt, params, schema):
+        for job in _jobs(3):
+            on_job(job)
+        return {"jobs": _jobs(3), "followup_questions": []}
+
+    monkeypatch.setattr(prompt_generator, "_complete_jobs", complete)
+    streamed = []
+    asyncio.run(prompt_generator.call_openai_for_jobs("find jobs", on_job=streamed.append))
+    assert len(streamed) == 3
@@ -0,0 +1,35 @@
+import io
+from pathlib import Path
+import PyPDF2
+from utils.parse_resume import extract_pdf_text, iter_pdf_pages
+
+SAMPLE_CV_PATH = Path(__file__).parent.parent.parent / "e2e" / "fixtures" / "sample_cv.pdf"
+
+def _with_blank_pages(content: bytes, blank_pages: int) -> bytes:
+    writer = PyPDF2.PdfWriter()
+    for page in PyPDF2.PdfReader(io.BytesIO(content)).pages:
+        writer.add_page(page)
+    for _ in range(blank_pages):
+        writer.add_blank_page(width=612, height=792)
+    output = io.BytesIO()
+    writer.write(output)
+    return output.getvalue()
+
+def test_pages_without_text_layer_do_not_crash():
+    content = _with_blank_pages(SAMPLE_CV_PATH.read_bytes(), 2)
+    pages = list(iter_pdf_pages(content))
+    assert pages[0].strip()
+    assert pages[-1] == ""
+
+def test_stops_at_character_budget():
+    text = extract_pdf_text(SAMPLE_CV_PATH.read_bytes(), max_chars=50)
+    assert len(text) == 50
+
+def test_stops_at_page_budget():
+    content = _with_blank_pages(SAMPLE_CV_PATH.read_bytes(), 5)
+    assert len(list(iter_pdf_pages(content, max_pages=2))) == 2
+
+def test_character_budget_counts_page_separators():
+    content = _with_blank_pages(SAMPLE_CV_PATH.read_bytes(), 5)
+    budget = len(extract_pdf_text(content, max_pages=1)) + 2
+    assert len(extract_pdf_text(content, max_chars=budget)) == budget
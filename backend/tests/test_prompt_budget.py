@@ -0,0 +1,36 @@
+from utils import prompt_generator
+from utils.prompt_budget import count_tokens, fit_resume_summary
+from utils.prompt_generator import DEEP_SEARCH_SYSTEM_PROMPT, create_deep_search_prompt
+
+def test_small_summary_is_kept_whole_and_compact():
+    summary = {"skills": ["Python", "SQL"], "summary": "Backend   engineer\n\n"}
+    assert fit_resume_summary(summary, 500) == {"skills": ["Python", "SQL"], "summary": "Backend engineer"}
+
+def test_sections_are_kept_by_priority():
+    summary = {
+        "text": "raw resume " * 500,
+        "education": [{"degree": "BSc", "institution": "Uni " * 50}],
+        "experience": [{"title": f"Role {i}", "highlights": ["Shipped things"] * 5} for i in range(20)],
+        "skills": ["Python", "Go", "Kubernetes"],
+    }
+    fitted = fit_resume_summary(summary, 200)
+    assert fitted["skills"] == summary["skills"]
+    assert fitted["experience"] == summary["experience"][:len(fitted["experience"])]
+    assert "text" not in fitted
+    assert count_tokens(str(fitted)) <= 250
+
+def test_prompt_fits_input_budget(monkeypatch):
+    monkeypatch.setattr(prompt_generator, "PROMPT_INPUT_TOKEN_BUDGET", 600)
+    prompt = create_deep_search_prompt({"text": "Experienced engineer. " * 1000}, {"location": "Remote"})
+    assert count_tokens(DEEP_SEARCH_SYSTEM_PROMPT) + count_tokens(prompt) <= 600
+    assert '"location":"Remote"' in prompt
+
+def test_upload_metadata_is_dropped():
+    summary = {
+        "text": "Experienced engineer. " * 100,
+        "file_name": "resume.pdf",
+        "content_type": "application/pdf",
+        "s3_key": "resumes/20240101_resume.pdf"
+    }
+    fitted = fit_resume_summary(summary, 100)
+    assert list(fitted) == ["text"]
@@ -0,0 +1,54 @@
+import asyncio
+import time
+import pytest
+from utils import rate_limiter
+from utils.rate_limiter import RateLimitExceeded, acquire, estimate_tokens, parse_duration
+
+TOKENS_KEY = "openai_rl:gpt-4:tokens"
+
+@pytest.fixture
+def limiter(monkeypatch):
+    """The limiter's Lua scripts against an in-memory Redis, 60 RPM / 1000 TPM."""
+    fakeredis = pytest.importorskip("fakeredis")
+    client = fakeredis.FakeRedis()
+    monkeypatch.setattr(rate_limiter.redis.Redis, "from_url", lambda url: client)
+    monkeypatch.setattr(rate_limiter, "_client", None)
+    monkeypatch.setattr(rate_limiter, "_scripts", {})
+    monkeypatch.setattr(rate_limiter, "DEFAULT_RPM", 60)
+    monkeypatch.setattr(rate_limiter, "DEFAULT_TPM", 1000)
+    return client
+
+def test_parse_duration_formats():
+    assert parse_duration("6m0s") == 360
+    assert parse_duration("1.5s") == 1.5
+    assert parse_duration("20ms") == 0.02
+    assert parse_duration("2") == 2
+    assert parse_duration(None) == 0
+
+def test_estimate_tokens_scales_with_text():
+    assert estimate_tokens("") == 1
+    assert estimate_tokens("x" * 4000) == 1001
+
+def test_acquire_deducts_and_reports_wait(limiter):
+    asyncio.run(acquire("gpt-4", 400))
+    assert float(limiter.hget(TOKENS_KEY, "level")) == pytest.approx(600, abs=1)
+    assert float(limiter.hget("openai_rl:gpt-4:requests", "level")) == pytest.approx(59, abs=0.1)
+    # 100 tokens short at 1000 TPM: about six seconds until the bucket refills
+    assert rate_limiter._try_acquire("gpt-4", 700, "interactive") == pytest.approx(6, abs=0.1)
+
+def test_buckets_refill_over_time(limiter):
+    limiter.hset(TOKENS_KEY, mapping={"level": 0, "ts": time.time() - 30})
+    assert rate_limiter._try_acquire("gpt-4", 400, "interactive") == 0
+    assert float(limiter.hget(TOKENS_KEY, "level")) == pytest.approx(100, abs=1)
+
+def test_bulk_work_leaves_the_interactive_reserve(limiter, monkeypatch):
+    monkeypatch.setitem(rate_limiter.PRIORITY_RESERVE, "bulk", 0.2)
+    limiter.hset(TOKENS_KEY, mapping={"level": 300, "ts": time.time()})
+    assert rate_limiter._try_acquire("gpt-4", 200, "bulk") > 0
+    assert rate_limiter._try_acquire("gpt-4", 200, "interactive") == 0
+
+def test_bulk_work_is_shed_when_the_wait_is_too_long(limiter, monkeypatch):
+    monkeypatch.setitem(rate_limiter.PRIORITY_MAX_WAIT, "bulk", 1)
+    limiter.hset(TOKENS_KEY, mapping={"level": 0, "ts": time.time()})
+    with pytest.raises(RateLimitExceeded):
+        asyncio.run(acquire("gpt-4", 500, "bulk"))
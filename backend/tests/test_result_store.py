@@ -0,0 +1,26 @@
+from utils import result_store
+
+def _jobs(count, description_length):
+    return [{"title": f"Job {i}", "description": "x" * description_length} for i in range(count)]
+
+def test_small_results_stay_inline():
+    result = {"jobs": _jobs(2, 10), "followup_questions": ["Remote?"]}
+    assert result_store.store_result("task-small", result) == result
+
+def test_large_results_round_trip_through_disk(tmp_path, monkeypatch):
+    monkeypatch.setattr(result_store, "STORE_BACKEND", "disk")
+    monkeypatch.setattr(result_store, "STORE_DIR", tmp_path)
+    result = {"jobs": _jobs(50, 2000), "followup_questions": ["Remote?"]}
+    stored = result_store.store_result("task-large", result)
+    assert stored["result_ref"]["backend"] == "disk"
+    assert stored["job_count"] == 50
+    assert len(str(stored)) < result_store.INLINE_MAX_BYTES
+    assert result_store.load_result(stored) == result
+
+def test_progress_meta_is_capped():
+    meta = {"progress": 50, "current_jobs": _jobs(result_store.PROGRESS_MAX_JOBS + 5, 5000)}
+    compact = result_store.compact_progress_meta(meta)
+    assert len(compact["current_jobs"]) == result_store.PROGRESS_MAX_JOBS
+    assert compact["total_jobs"] == result_store.PROGRESS_MAX_JOBS + 5
+    assert all(len(j["description"]) <= result_store.PROGRESS_MAX_DESCRIPTION_CHARS + 3 for j in compact["current_jobs"])
+    assert len(meta["current_jobs"][0]["description"]) == 5000
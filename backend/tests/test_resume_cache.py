@@ -0,0 +1,27 @@
+import hashlib
+import pytest
+from utils import resume_cache
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    resume_cache.clear_cache()
+    yield
+    resume_cache.clear_cache()
+
+def test_cache_hit_and_miss():
+    key = hashlib.sha256(b"pdf bytes").hexdigest()
+    assert resume_cache.get_cached_text(key) is None
+    
+    resume_cache.set_cached_text(key, "extracted text")
+    assert resume_cache.get_cached_text(key) == "extracted text"
+
+def test_lru_evicts_oldest(monkeypatch):
+    monkeypatch.setattr(resume_cache, "MAX_ENTRIES", 2)
+    resume_cache.set_cached_text("a", "A")
+    resume_cache.set_cached_text("b", "B")
+    resume_cache.get_cached_text("a")  # Touch "a" so "b" is least recently used
+    resume_cache.set_cached_text("c", "C")
+    
+    assert resume_cache.get_cached_text("a") == "A"
+    assert resume_cache.get_cached_text("b") is None
+    assert resume_cache.get_cached_text("c") == "C"
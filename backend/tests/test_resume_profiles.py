@@ -0,0 +1,45 @@
+import asyncio
+import pytest
+from celery.exceptions import Retry
+from fastapi.testclient import TestClient
+from main import app
+import tasks
+from utils import resume_profiles, summarization
+from utils.rate_limiter import RateLimitExceeded
+
+client = TestClient(app)
+
+def test_deep_search_requires_resume_or_profile():
+    response = client.post("/api/deep_search", json={
+        "preferences": {"location": "Remote", "company_size": "Any", "role_type": "Engineer"}
+    })
+    assert response.status_code == 422
+
+def test_resolves_ready_profile_to_structured_summary(monkeypatch):
+    record = {"status": resume_profiles.READY, "text": "raw", "summary": {"skills": ["Python"]}}
+    monkeypatch.setattr(resume_profiles, "get_profile", lambda profile_id: record)
+    assert resume_profiles.resolve_resume_summary("abc") == {"skills": ["Python"]}
+
+def test_pending_profile_falls_back_to_raw_text(monkeypatch):
+    record = {"status": resume_profiles.PENDING, "text": "raw", "summary": None}
+    monkeypatch.setattr(resume_profiles, "get_profile", lambda profile_id: record)
+    assert resume_profiles.resolve_resume_summary("abc") == {"text": "raw"}
+
+def test_rate_limited_profile_build_is_retried(monkeypatch):
+    record = {"status": resume_profiles.PENDING, "text": "raw", "summary": None}
+    saved = []
+    monkeypatch.setattr(resume_profiles, "get_profile", lambda profile_id: record)
+    monkeypatch.setattr(resume_profiles, "save_profile", lambda profile_id, values: saved.append(values))
+    monkeypatch.setattr(tasks, "run_in_worker_loop", lambda coro, timeout=None: asyncio.run(coro))
+
+    async def shed(model, tokens, priority="interactive"):
+        raise RateLimitExceeded("bulk budget exhausted")
+
+    def retry(exc=None, countdown=None):
+        return Retry(exc=exc, when=countdown)
+
+    monkeypatch.setattr(summarization, "acquire", shed)
+    monkeypatch.setattr(tasks.build_resume_profile_task, "retry", retry)
+    with pytest.raises(Retry):
+        tasks.build_resume_profile_task.run("abc")
+    assert saved == []
@@ -0,0 +1,36 @@
+from fastapi.testclient import TestClient
+import main
+from main import find_in_flight_search
+from utils import single_flight
+from utils.single_flight import request_key
+
+PREFERENCES = {"location": "Berlin", "company_size": "Any", "role_type": "Engineer", "additional_info": None}
+
+def test_request_key_is_canonical():
+    reordered = dict(reversed(list(PREFERENCES.items())))
+    assert request_key({"skills": ["Python"]}, None, PREFERENCES) == request_key({"skills": ["Python"]}, None, reordered)
+    assert request_key({"skills": ["Python"]}, None, PREFERENCES) != request_key({"skills": ["Go"]}, None, PREFERENCES)
+    assert request_key(None, "profile-a", PREFERENCES) != request_key(None, "profile-b", PREFERENCES)
+
+def test_lookup_fails_open_without_redis(monkeypatch):
+    def unavailable(key, task_id):
+        raise ConnectionError("redis down")
+    monkeypatch.setattr(single_flight, "claim", unavailable)
+    assert find_in_flight_search("key", "task-1") is None
+
+def test_lease_is_released_when_enqueue_fails(monkeypatch):
+    released = []
+    monkeypatch.setattr(single_flight, "ENABLED", True)
+    monkeypatch.setattr(main, "find_in_flight_search", lambda key, task_id: None)
+    monkeypatch.setattr(single_flight, "release", lambda key, task_id: released.append((key, task_id)))
+
+    def broker_down(*args, **kwargs):
+        raise ConnectionError("broker down")
+    monkeypatch.setattr(main.deep_research_task, "apply_async", broker_down)
+
+    response = TestClient(main.app).post("/api/deep_search", json={
+        "resume_summary": {"skills": ["Python"]},
+        "preferences": PREFERENCES
+    })
+    assert response.status_code == 500
+    assert [key for key, _ in released] == [request_key({"skills": ["Python"]}, None, PREFERENCES)]
@@ -0,0 +1,121 @@
+import time
+import asyncio
+import pytest
+import tasks
+from utils import fan_out, task_checkpoints
+
+@pytest.fixture
+def store(monkeypatch):
+    """In-memory stand-in for the checkpoint hash of each task."""
+    checkpoints = {}
+    monkeypatch.setattr(task_checkpoints, "ENABLED", True)
+    monkeypatch.setattr(
+        task_checkpoints, "save",
+        lambda task_id, values: checkpoints.setdefault(task_id, {}).update(values)
+    )
+    monkeypatch.setattr(
+        task_checkpoints, "load_step",
+        lambda task_id, name: checkpoints.get(task_id, {}).get(f"step:{name}")
+    )
+    return checkpoints
+
+def test_completed_step_is_replayed_without_calling_again(store):
+    calls = []
+
+    async def call():
+        calls.append(1)
+        return {"jobs": [{"title": "Engineer"}], "followup_questions": []}
+
+    replayed = []
+    first = asyncio.run(task_checkpoints.step("task-1", "search", call))
+    second = asyncio.run(task_checkpoints.step("task-1", "search", call, on_job=replayed.append))
+    assert first == second
+    assert len(calls) == 1
+    assert replayed == [{"title": "Engineer"}]
+
+def test_failed_step_is_not_checkpointed(store):
+    async def call():
+        return {"jobs": [], "error": "OpenAI API error: timeout", "retryable": True}
+
+    asyncio.run(task_checkpoints.step("task-1", "search", call))
+    assert "step:search" not in store.get("task-1", {})
+
+def test_retry_countdown_is_capped(monkeypatch):
+    monkeypatch.setattr(task_checkpoints, "RETRY_BACKOFF", 5)
+    monkeypatch.setattr(task_checkpoints, "RETRY_BACKOFF_MAX", 60)
+    assert all(0 <= task_checkpoints.retry_countdown(retries) <= 60 for retries in range(10))
+
+def test_fan_out_resumes_only_unfinished_branches(store, monkeypatch):
+    monkeypatch.setattr(fan_out, "create_deep_search_prompt", lambda resume, prefs: prefs["additional_info"])
+    calls = []
+    failing = {"Focus on Senior positions."}
+
+    async def search(prompt, similarity_text=None, on_job=None, priority="interactive", check=None):
+        calls.append(prompt)
+        if prompt in failing:
+            return {"jobs": [], "followup_questions": [], "error": "OpenAI API error: timeout", "retryable": True}
+        return {"jobs": [{"title": prompt, "company": "Acme", "match_score": "80"}], "followup_questions": []}
+
+    monkeypatch.setattr(fan_out, "cached_call_openai_for_jobs", search)
+    preferences = {"location": "Remote", "company_size": "Any", "role_type": "Engineer", "additional_info": None}
+
+    partial = asyncio.run(fan_out.fan_out_search({"skills": []}, preferences, checkpoint_id="task-1"))
+    assert partial["retryable"] and partial["jobs"]
+    first_attempt = len(calls)
+    failing.clear()
+    merged = asyncio.run(fan_out.fan_out_search({"skills": []}, preferences, checkpoint_id="task-1"))
+
+    assert calls[first_attempt:] == ["Focus on Senior positions."]
+    assert len(merged["jobs"]) == first_attempt
+    assert not merged["retryable"]
+
+def test_completed_steps_lists_checkpointed_steps():
+    checkpoint = {"attempts": 2, "prompt": "find jobs", "step:branch:0": {"jobs": []}, "step:grounded": {"jobs": []}}
+    assert task_checkpoints.completed_steps(checkpoint) == ["branch:0", "grounded"]
+
+def test_progress_is_published_off_the_loop_in_order():
+    published = []
+
+    class SlowTask:
+        def update_state(self, task_id=None, state=None, meta=None):
+            time.sleep(0.05)
+            published.append(meta["progress"])
+
+    publisher = tasks.ProgressPublisher(SlowTask(), "task-1")
+    started = time.monotonic()
+    for progress in range(5):
+        publisher.publish({"progress": progress})
+    assert time.monotonic() - started < 0.05
+    publisher.close()
+    assert published == [0, 1, 2, 3, 4]
+    publisher.publish({"progress": 5})
+    assert published == [0, 1, 2, 3, 4]
+
+def test_remaining_time_shrinks_to_zero():
+    assert tasks._remaining(None) is None
+    assert 0 < tasks._remaining(time.monotonic() + 10) <= 10
+    assert tasks._remaining(time.monotonic() - 1) == 0
+
+def test_failure_is_reported_when_clearing_checkpoints_fails(monkeypatch):
+    states = []
+
+    def unavailable(task_id):
+        raise ConnectionError("Redis is down")
+
+    async def failing_search(*args, **kwargs):
+        raise ValueError("invalid response")
+
+    monkeypatch.setattr(task_checkpoints, "load", lambda task_id: {})
+    monkeypatch.setattr(task_checkpoints, "start_attempt", lambda task_id: 1)
+    monkeypatch.setattr(task_checkpoints, "save", lambda task_id, values: None)
+    monkeypatch.setattr(task_checkpoints, "load_step", lambda task_id, name: None)
+    monkeypatch.setattr(task_checkpoints, "clear", unavailable)
+    monkeypatch.setattr(tasks.job_index, "ENABLED", False)
+    monkeypatch.setattr(tasks.fan_out, "ENABLED", False)
+    monkeypatch.setattr(tasks.single_flight, "ENABLED", False)
+    monkeypatch.setattr(tasks, "cached_call_openai_for_jobs", failing_search)
+    monkeypatch.setattr(tasks, "run_in_worker_loop", lambda coro, timeout=None: asyncio.run(coro))
+    monkeypatch.setattr(tasks.deep_research_task, "update_state", lambda task_id=None, state=None, meta=None: states.append(state))
+    with pytest.raises(ValueError):
+        tasks.deep_research_task.run({"skills": ["Python"]}, {"location": "Remote"})
+    assert states[-1] == "FAILURE"
@@ -0,0 +1,45 @@
+import json
+import asyncio
+import main
+from utils.task_events import CHANNEL_PREFIX, TaskEventHub, task_event_hub
+
+class FakePubSub:
+    def __init__(self, messages):
+        self.messages = list(messages)
+
+    async def get_message(self, timeout=None):
+        await asyncio.sleep(0)
+        return self.messages.pop(0) if self.messages else None
+
+def _message(task_id, data):
+    return {"type": "message", "channel": (CHANNEL_PREFIX + task_id).encode(), "data": data}
+
+def test_malformed_events_are_skipped():
+    hub = TaskEventHub("redis://localhost:6379/0")
+    queue: asyncio.Queue = asyncio.Queue()
+    hub._listeners["task-1"] = {queue}
+    hub._pubsub = FakePubSub([
+        _message("task-1", b"not json"),
+        _message("task-1", b"5"),
+        _message("task-1", json.dumps({"state": "SUCCESS", "meta": {}}).encode()),
+    ])
+
+    async def read():
+        reader = asyncio.create_task(hub._read_loop())
+        event = await asyncio.wait_for(queue.get(), 5)
+        hub._listeners.clear()
+        await reader
+        return event
+
+    assert asyncio.run(read()) == {"state": "SUCCESS", "meta": {}, "task_id": "task-1"}
+
+def test_stream_subscribes_only_once_it_starts(monkeypatch):
+    subscribed = []
+
+    async def subscribe(task_id, queue=None):
+        subscribed.append(task_id)
+        return queue
+
+    monkeypatch.setattr(task_event_hub, "subscribe", subscribe)
+    asyncio.run(main.stream_task_status("task-1", None))
+    assert subscribed == []
@@ -0,0 +1,55 @@
+import logging
+from fastapi.testclient import TestClient
+from main import app
+from utils import telemetry
+
+client = TestClient(app)
+
+def test_metrics_endpoint():
+    client.get("/")
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert "deep_job_search_span_seconds" in response.text
+    assert 'span="http.request"' in response.text
+
+def test_request_continues_incoming_trace():
+    incoming = "00-" + "a" * 32 + "-" + "b" * 16 + "-01"
+    response = client.get("/", headers={"traceparent": incoming})
+    trace_id, parent_id, sampled = telemetry.parse_traceparent(response.headers["traceparent"])
+    assert trace_id == "a" * 32
+    assert parent_id != "b" * 16
+    assert sampled
+
+def test_headers_carry_current_span():
+    with telemetry.span("outer") as outer:
+        headers = {}
+        telemetry.inject_headers(headers)
+    child = telemetry.start_span("task", headers["traceparent"])
+    assert child.trace_id == outer.trace_id
+    assert child.parent_id == outer.span_id
+    assert "enqueued_at" in headers
+
+def test_invalid_traceparent_starts_new_trace():
+    assert telemetry.parse_traceparent("not-a-traceparent") is None
+    assert telemetry.start_span("root", "garbage").parent_id is None
+
+def test_sampling_keeps_warnings_of_unsampled_traces():
+    sampling = telemetry.SamplingFilter()
+    unsampled = telemetry.start_span("root", "00-" + "c" * 32 + "-" + "d" * 16 + "-00")
+    token = telemetry.activate(unsampled)
+    try:
+        info = logging.LogRecord("test", logging.INFO, __file__, 0, "info", (), None)
+        warning = logging.LogRecord("test", logging.WARNING, __file__, 0, "warning", (), None)
+        assert not sampling.filter(info)
+        assert sampling.filter(warning)
+    finally:
+        telemetry.deactivate(token)
+
+def test_json_formatter_includes_trace_context():
+    record = logging.LogRecord("test", logging.INFO, __file__, 0, "hello %s", ("world",), None)
+    record.job_count = 3
+    with telemetry.span("format") as current:
+        line = telemetry.JsonFormatter().format(record)
+    assert '"message": "hello world"' in line
+    assert current.trace_id in line
+    assert '"job_count": 3' in line
@@ -0,0 +1,96 @@
+import io
+import os
+import hashlib
+import asyncio
+from pathlib import Path
+import pytest
+from fastapi import UploadFile
+from fastapi.testclient import TestClient
+import main
+from main import app
+from utils import extraction_service, upload_buffer
+from utils.extraction_service import run_extraction
+from utils.parse_resume import extract_pdf_text
+from utils.upload_buffer import UploadTooLarge, read_upload
+
+SAMPLE_CV_PATH = Path(__file__).parent.parent.parent / "e2e" / "fixtures" / "sample_cv.pdf"
+
+@pytest.fixture(autouse=True)
+def shutdown_pool():
+    yield
+    extraction_service.shutdown()
+
+def _read(content: bytes, **kwargs):
+    return asyncio.run(read_upload(UploadFile(file=io.BytesIO(content), filename="resume.pdf"), **kwargs))
+
+def test_small_upload_stays_in_memory():
+    with _read(b"small resume") as buffer:
+        assert not buffer.spilled
+        assert buffer.size == 12
+        assert buffer.sha256 == hashlib.sha256(b"small resume").hexdigest()
+        assert buffer.open().read() == b"small resume"
+
+def test_large_upload_spills_to_mapped_file(monkeypatch):
+    monkeypatch.setattr(upload_buffer, "UPLOAD_SPILL_THRESHOLD", 1024)
+    monkeypatch.setattr(upload_buffer, "UPLOAD_CHUNK_SIZE", 300)
+    content = os.urandom(5000)
+    buffer = _read(content)
+    path = buffer.path
+    assert buffer.spilled and os.path.getsize(path) == 5000
+    assert buffer.sha256 == hashlib.sha256(content).hexdigest()
+    assert buffer.open().read() == content
+    buffer.close()
+    assert not os.path.exists(path)
+
+def test_oversized_upload_is_rejected_without_leaving_files(monkeypatch, tmp_path):
+    monkeypatch.setattr(upload_buffer, "UPLOAD_SPILL_THRESHOLD", 100)
+    monkeypatch.setattr(upload_buffer, "UPLOAD_SPILL_DIR", str(tmp_path))
+    with pytest.raises(UploadTooLarge):
+        _read(b"x" * 1000, max_bytes=500)
+    assert list(tmp_path.iterdir()) == []
+
+def test_spilled_pdf_is_extracted_from_its_path(monkeypatch):
+    monkeypatch.setattr(upload_buffer, "UPLOAD_SPILL_THRESHOLD", 100)
+    content = SAMPLE_CV_PATH.read_bytes()
+    with _read(content) as buffer:
+        assert buffer.spilled
+        text = asyncio.run(run_extraction(extract_pdf_text, buffer.source()))
+    assert text == extract_pdf_text(content)
+
+def test_upload_endpoint_returns_413_for_oversized_files(monkeypatch):
+    monkeypatch.setattr(upload_buffer, "UPLOAD_MAX_BYTES", 1000)
+    response = TestClient(app).post(
+        "/api/upload_resume",
+        files={"file": ("resume.pdf", b"%PDF" + b"0" * 2000, "application/pdf")}
+    )
+    assert response.status_code == 413
+
+def test_oversized_request_is_rejected_before_the_form_is_read(monkeypatch):
+    monkeypatch.setattr(main, "UPLOAD_MAX_BYTES", 1000)
+    monkeypatch.setattr(main, "UPLOAD_FORM_OVERHEAD", 0)
+    monkeypatch.setattr(main, "read_upload", None)
+    response = TestClient(app).post(
+        "/api/upload_resume",
+        files={"file": ("resume.pdf", b"%PDF" + b"0" * 2000, "application/pdf")}
+    )
+    assert response.status_code == 413
+
+def test_celery_parse_mode_sends_the_spilled_path(monkeypatch):
+    sent = []
+
+    class FakeResult:
+        def get(self, timeout=None):
+            return extract_pdf_text(sent[0][0])
+
+    def apply_async(args, priority):
+        sent.append(args)
+        return FakeResult()
+
+    monkeypatch.setattr(main, "RESUME_PARSE_MODE", "celery")
+    monkeypatch.setattr(main.parse_resume_task, "apply_async", apply_async)
+    content = SAMPLE_CV_PATH.read_bytes()
+    with _read(content, spill_threshold=0) as buffer:
+        assert buffer.spilled
+        text = asyncio.run(main.extract_upload_text(buffer, "resume.pdf"))
+        assert sent == [[buffer.path, "resume.pdf"]]
+    assert text == extract_pdf_text(content)
@@ -0,0 +1,116 @@
+import os
+import asyncio
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from threading import Lock
+from typing import Any, Callable, Dict, Optional
+
+# Pool configuration
+POOL_SIZE = int(os.getenv('EXTRACTION_POOL_SIZE', str(os.cpu_count() or 2)))
+MAX_QUEUE = int(os.getenv('EXTRACTION_MAX_QUEUE', '32'))
+JOB_TIMEOUT = float(os.getenv('EXTRACTION_TIMEOUT', '60'))
+RETRY_AFTER = int(os.getenv('EXTRACTION_RETRY_AFTER', '5'))
+
+class ExtractionQueueFull(Exception):
+    """Raised when the extraction pool already has MAX_QUEUE jobs waiting."""
+
+class ExtractionTimeout(Exception):
+    """Raised when an extraction job exceeds JOB_TIMEOUT seconds."""
+
+_executor: Optional[ProcessPoolExecutor] = None
+_lock = Lock()
+_in_flight = 0
+_stats = {
+    'submitted': 0,
+    'completed': 0,
+    'failed': 0,
+    'timed_out': 0,
+    'rejected': 0,
+}
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        # Spawned workers don't inherit the API process's event loop or sockets
+        _executor = ProcessPoolExecutor(
+            max_workers=POOL_SIZE,
+            mp_context=multiprocessing.get_context('spawn')
+        )
+    return _executor
+
+def _discard_executor(executor: ProcessPoolExecutor) -> None:
+    """Drop a pool broken by a crashed worker so the next job starts a new one."""
+    global _executor
+    if _executor is executor:
+        _executor = None
+    executor.shutdown(wait=False, cancel_futures=True)
+
+def _count(stat: str) -> None:
+    with _lock:
+        _stats[stat] += 1
+
+def _job_done(future: Future) -> None:
+    global _in_flight
+    with _lock:
+        _in_flight -= 1
+
+async def run_extraction(func: Callable, *args: Any, timeout: Optional[float] = None) -> Any:
+    """
+    Run a synchronous, CPU-bound extraction function (pdfplumber, PyPDF2,
+    OCR) in the worker process pool so it never blocks the event loop.
+    `func` must be a picklable module-level function.
+    """
+    global _in_flight
+    timeout = timeout or JOB_TIMEOUT
+    with _lock:
+        if _in_flight >= POOL_SIZE + MAX_QUEUE:
+            _stats['rejected'] += 1
+            raise ExtractionQueueFull("Extraction queue is full")
+        _in_flight += 1
+        _stats['submitted'] += 1
+
+    # Slots are released when the worker finishes, not when the caller gives
+    # up, so timed-out jobs still count against the queue until they exit
+    executor = _get_executor()
+    try:
+        future = executor.submit(func, *args)
+    except BaseException as e:
+        with _lock:
+            _in_flight -= 1
+        _count('failed')
+        if isinstance(e, BrokenProcessPool):
+            _discard_executor(executor)
+        raise
+    future.add_done_callback(_job_done)
+    try:
+        result = await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+    except asyncio.TimeoutError:
+        _count('timed_out')
+        raise ExtractionTimeout(f"Extraction exceeded {timeout} seconds")
+    except BrokenProcessPool:
+        # A worker died (OOM, segfault); every job it shared the pool with fails too
+        _count('failed')
+        _discard_executor(executor)
+        raise
+    except Exception:
+        _count('failed')
+        raise
+    _count('completed')
+    return result
+
+def get_metrics() -> Dict[str, int]:
+    """Return queue depth and job counters for the extraction pool."""
+    with _lock:
+        return {
+            'pool_size': POOL_SIZE,
+            'max_queue': MAX_QUEUE,
+            'queue_depth': max(_in_flight - POOL_SIZE, 0),
+            'in_flight': _in_flight,
+            **_stats,
+        }
+
+def shutdown() -> None:
+    """Stop the worker processes; called on API shutdown."""
+    if _executor is not None:
+        _discard_executor(_executor)
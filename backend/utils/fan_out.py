@@ -0,0 +1,168 @@
+import os
+import re
+import json
+import asyncio
+from itertools import product
+from typing import Awaitable, Callable, Dict, List, Optional
+from utils.prompt_generator import create_deep_search_prompt
+from utils.llm_cache import cached_call_openai_for_jobs
+from utils import task_checkpoints
+from utils import match_scoring
+
+# Fan-out configuration
+ENABLED = os.getenv('FAN_OUT_ENABLED', 'false').lower() == 'true'
+MAX_BRANCHES = int(os.getenv('FAN_OUT_MAX_BRANCHES', '4'))
+CONCURRENCY = int(os.getenv('FAN_OUT_CONCURRENCY', '3'))
+SENIORITY_BANDS = [b.strip() for b in os.getenv('FAN_OUT_SENIORITY_BANDS', 'Mid-level,Senior,Staff/Lead').split(',') if b.strip()]
+MAX_FOLLOWUP_QUESTIONS = 5
+
+def _split_variants(value: Optional[str]) -> List[str]:
+    if not value:
+        return []
+    parts = re.split(r'\s*(?:,|;|\||\bor\b)\s*', value)
+    return [p for p in parts if p]
+
+def build_sub_queries(preferences: Dict) -> List[Dict]:
+    """
+    Split one set of preferences into narrower ones, one per location and
+    role variant. When there is nothing to split, fan out by seniority band.
+    """
+    locations = _split_variants(preferences.get('location')) or [preferences.get('location')]
+    roles = _split_variants(preferences.get('role_type')) or [preferences.get('role_type')]
+
+    sub_queries = []
+    for location, role in product(locations, roles):
+        sub_queries.append({**preferences, 'location': location, 'role_type': role})
+
+    if len(sub_queries) == 1:
+        sub_queries = []
+        for band in SENIORITY_BANDS:
+            extra = preferences.get('additional_info')
+            focus = f"Focus on {band} positions."
+            sub_queries.append({
+                **preferences,
+                'additional_info': f"{extra} {focus}" if extra else focus
+            })
+
+    return sub_queries[:MAX_BRANCHES] or [preferences]
+
+def parse_match_score(job: Dict) -> float:
+    """Read the LLM's match_score ("85", 85, "85%") as a number; 0 if missing."""
+    match = re.search(r'\d+(?:\.\d+)?', str(job.get('match_score', '')))
+    return float(match.group()) if match else 0.0
+
+def _normalize(value) -> str:
+    return re.sub(r'\s+', ' ', str(value or '')).strip().lower()
+
+class JobMerger:
+    """
+    Accumulates jobs from several branches, dropping duplicates by
+    title/company or apply_link and keeping the higher-scored copy.
+    """
+
+    def __init__(self):
+        self._jobs: Dict[int, Dict] = {}
+        self._keys: Dict[int, List[str]] = {}
+        self._by_key: Dict[str, int] = {}
+        self._next_id = 0
+
+    def add(self, job: Dict) -> bool:
+        """
+        Add a job; returns False when it was a duplicate that didn't improve
+        the score. A job matching two kept jobs (one by title/company, one by
+        apply_link) collapses all three into the best-scored copy.
+        """
+        keys = [f"tc:{_normalize(job.get('title'))}|{_normalize(job.get('company'))}"]
+        if job.get('apply_link'):
+            keys.append(f"link:{_normalize(job['apply_link'])}")
+
+        matches = list(dict.fromkeys(self._by_key[key] for key in keys if key in self._by_key))
+        best = max(matches, key=lambda job_id: parse_match_score(self._jobs[job_id]), default=None)
+        if len(matches) == 1 and parse_match_score(job) <= parse_match_score(self._jobs[best]):
+            return False
+
+        if best is not None and parse_match_score(job) <= parse_match_score(self._jobs[best]):
+            job = self._jobs[best]
+        for job_id in matches:
+            del self._jobs[job_id]
+            keys.extend(self._keys.pop(job_id))
+
+        job_id = self._next_id
+        self._next_id += 1
+        self._jobs[job_id] = job
+        self._keys[job_id] = list(dict.fromkeys(keys))
+        for key in self._keys[job_id]:
+            self._by_key[key] = job_id
+        return True
+
+    def ranked(self) -> List[Dict]:
+        """All unique jobs, best match_score first."""
+        return sorted(self._jobs.values(), key=parse_match_score, reverse=True)
+
+async def fan_out_search(
+    resume_summary: Dict,
+    preferences: Dict,
+    on_update: Optional[Callable[[List[Dict], int, int], None]] = None,
+    similarity_text: Optional[str] = None,
+    priority: str = 'interactive',
+    checkpoint_id: Optional[str] = None
+) -> Dict:
+    """
+    Run one search as several concurrent sub-queries and merge the results.
+    `on_update(ranked_jobs, completed_branches, total_branches)` is called
+    whenever a new job streams in or a branch finishes. With `checkpoint_id`
+    (the task id) each finished branch is checkpointed, and branches an
+    earlier attempt finished are replayed instead of re-run.
+    """
+    sub_queries = build_sub_queries(preferences)
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+    merger = JobMerger()
+    followups: List[str] = []
+    completed = 0
+
+    def on_job(job: Dict) -> None:
+        if merger.add(job) and on_update is not None:
+            on_update(merger.ranked(), completed, len(sub_queries))
+
+    async def run_branch(index: int, sub_preferences: Dict) -> Dict:
+        nonlocal completed
+        prompt = create_deep_search_prompt(resume_summary, sub_preferences)
+        
+        def call() -> Awaitable[Dict]:
+            return cached_call_openai_for_jobs(
+                prompt,
+                similarity_text=f"{similarity_text}|{json.dumps(sub_preferences, sort_keys=True)}" if similarity_text else None,
+                on_job=on_job,
+                priority=priority,
+                check=match_scoring.relevance_check(resume_summary, sub_preferences)
+            )
+        
+        async with semaphore:
+            if checkpoint_id:
+                result = await task_checkpoints.step(checkpoint_id, f"branch:{index}", call, on_job=on_job)
+            else:
+                result = await call()
+
+        # Non-streamed results (streaming disabled) are merged here
+        for job in result.get('jobs', []):
+            merger.add(job)
+        for question in result.get('followup_questions', []):
+            if question not in followups:
+                followups.append(question)
+        completed += 1
+        if on_update is not None:
+            on_update(merger.ranked(), completed, len(sub_queries))
+        return result
+
+    results = await asyncio.gather(*(run_branch(i, p) for i, p in enumerate(sub_queries)))
+
+    merged = {
+        'jobs': merger.ranked(),
+        'followup_questions': followups[:MAX_FOLLOWUP_QUESTIONS]
+    }
+    errors = [r['error'] for r in results if r.get('error')]
+    if errors and not merged['jobs']:
+        merged['error'] = errors[0]
+    # Branches that failed transiently can be re-run by a retry of the task
+    merged['retryable'] = any(r.get('retryable') for r in results)
+    return merged
@@ -0,0 +1,98 @@
+import os
+import time
+import asyncio
+from typing import Callable, Dict, Optional
+import redis
+from celery_app import celery_app
+from config.aws_config import s3_client, BUCKET_NAME
+
+# Checks run in the background; probes only read the cached results
+REFRESH_INTERVAL = float(os.getenv('HEALTH_REFRESH_INTERVAL', '10'))
+CACHE_TTL = float(os.getenv('HEALTH_CACHE_TTL', '30'))
+CHECK_TIMEOUT = float(os.getenv('HEALTH_CHECK_TIMEOUT', '2'))
+CHECK_S3 = os.getenv('HEALTH_CHECK_S3', 'true').lower() == 'true' and os.getenv('TESTING') != 'true'
+
+_redis_client: Optional[redis.Redis] = None
+_results: Dict[str, Dict] = {}
+_refresher: Optional[asyncio.Task] = None
+
+def check_redis() -> None:
+    global _redis_client
+    if _redis_client is None:
+        _redis_client = redis.Redis.from_url(
+            os.getenv('CELERY_BROKER_URL', 'redis://redis:6379/0'),
+            socket_timeout=CHECK_TIMEOUT,
+            socket_connect_timeout=CHECK_TIMEOUT
+        )
+    _redis_client.ping()
+
+def check_celery() -> None:
+    replies = celery_app.control.ping(timeout=CHECK_TIMEOUT)
+    if not replies:
+        raise RuntimeError("No Celery workers replied to ping")
+
+def check_s3() -> None:
+    s3_client.head_bucket(Bucket=BUCKET_NAME)
+
+CHECKS: Dict[str, Callable[[], None]] = {
+    'redis': check_redis,
+    'celery': check_celery,
+}
+if CHECK_S3:
+    CHECKS['s3'] = check_s3
+
+async def _run_check(name: str, check: Callable[[], None]) -> None:
+    started = time.monotonic()
+    try:
+        await asyncio.wait_for(asyncio.to_thread(check), CHECK_TIMEOUT + 1)
+        error = None
+    except Exception as e:
+        error = str(e) or type(e).__name__
+    _results[name] = {
+        'ok': error is None,
+        'error': error,
+        'latency_ms': round((time.monotonic() - started) * 1000, 1),
+        'checked_at': time.time(),
+    }
+
+async def refresh() -> None:
+    """Run every dependency check concurrently and cache the results."""
+    await asyncio.gather(*(_run_check(name, check) for name, check in CHECKS.items()))
+
+async def _refresh_forever() -> None:
+    while True:
+        await refresh()
+        await asyncio.sleep(REFRESH_INTERVAL)
+
+def start() -> None:
+    """Start the background refresher; called on API startup."""
+    global _refresher
+    if _refresher is None or _refresher.done():
+        _refresher = asyncio.create_task(_refresh_forever())
+
+def stop() -> None:
+    """Stop the background refresher; called on API shutdown."""
+    global _refresher
+    if _refresher is not None:
+        _refresher.cancel()
+        _refresher = None
+
+def readiness() -> Dict:
+    """
+    Cached readiness report. A dependency counts as healthy only if its last
+    check passed within CACHE_TTL seconds.
+    """
+    now = time.time()
+    services = {}
+    for name in CHECKS:
+        result = _results.get(name)
+        if result is None:
+            services[name] = {'ok': False, 'error': 'not checked yet'}
+        elif now - result['checked_at'] > CACHE_TTL:
+            services[name] = {**result, 'ok': False, 'error': 'check result is stale'}
+        else:
+            services[name] = result
+    return {
+        'status': 'healthy' if all(s['ok'] for s in services.values()) else 'unhealthy',
+        'services': services,
+    }
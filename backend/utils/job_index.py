@@ -0,0 +1,366 @@
+import os
+import logging
+import re
+import sys
+import json
+import math
+import asyncio
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Union
+import numpy as np
+from pydantic import BaseModel
+from utils.openai_clients import get_async_client
+from utils.rate_limiter import RateLimitExceeded, acquire
+from utils.prompt_budget import compact_json, count_tokens, fit_resume_summary, truncate_to_tokens
+from utils.prompt_generator import call_openai_for_jobs
+from utils import model_router
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+logger = logging.getLogger(__name__)
+
+# Ground deep searches in a local corpus of job listings: hybrid retrieval
+# picks candidates and the LLM only re-ranks them
+ENABLED = os.getenv('JOB_INDEX_ENABLED', 'false').lower() == 'true'
+INDEX_DIR = Path(os.getenv('JOB_INDEX_DIR', '/data/job_index'))
+EMBEDDING_MODEL = os.getenv('JOB_INDEX_EMBEDDING_MODEL', 'text-embedding-ada-002')
+EMBEDDING_BATCH_SIZE = int(os.getenv('JOB_INDEX_EMBEDDING_BATCH_SIZE', '100'))
+
+# Candidates retrieved for the re-rank prompt, and the fewest worth re-ranking
+# (below that the search falls back to open-ended generation)
+TOP_K = int(os.getenv('JOB_INDEX_TOP_K', '20'))
+MIN_CANDIDATES = int(os.getenv('JOB_INDEX_MIN_CANDIDATES', '5'))
+DESCRIPTION_TOKENS = int(os.getenv('JOB_INDEX_DESCRIPTION_TOKENS', '80'))
+
+# Corpora at least this large get a clustered (IVF) vector index; smaller
+# ones are scanned exactly, which is already sub-millisecond
+ANN_MIN_SIZE = int(os.getenv('JOB_INDEX_ANN_MIN_SIZE', '5000'))
+ANN_PROBES = int(os.getenv('JOB_INDEX_ANN_PROBES', '8'))
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+RRF_K = 60
+
+JOBS_FILE = 'jobs.jsonl'
+VECTORS_FILE = 'vectors.npy'
+JOB_FIELDS = ['title', 'company', 'location', 'description', 'apply_link', 'company_size', 'role_type']
+
+RERANK_SYSTEM_PROMPT = """You are a job search assistant. You are given a candidate's resume summary, their job preferences and job listings with ids.
+Rank the listings that fit the candidate, best first, leaving out poor fits, and explain each in one sentence.
+Respond with JSON in exactly this format:
+{"jobs":[{"id":"listing id","match_score":"Score between 0-100 indicating match with resume","reason":"Why it fits"}],"followup_questions":["Question 1 to refine search?","Question 2 to refine search?"]}"""
+
+class RankedListing(BaseModel):
+    """One entry of the re-rank response, pointing back at a candidate listing."""
+    id: Union[str, int]
+    match_score: Optional[Union[float, str]] = None
+    reason: Optional[str] = None
+
+def _tokenize(text: str) -> List[str]:
+    return re.findall(r'[a-z0-9+#]+', text.lower())
+
+def _document_text(job: Dict[str, Any]) -> str:
+    return "\n".join(str(job.get(field) or '') for field in ('title', 'company', 'location', 'role_type', 'description'))
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1.0, norms)
+
+def _matches(value: Optional[str], wanted: Optional[str]) -> bool:
+    # Unset preferences and listings without the field never filter anything out
+    if not wanted or wanted.strip().lower() in ('any', 'none', ''):
+        return True
+    if not value:
+        return True
+    return wanted.strip().lower() in value.lower() or value.lower() in wanted.strip().lower()
+
+class JobIndex:
+    """
+    In-process hybrid index over job listings: cosine similarity over
+    embeddings plus BM25 over the listing text, fused by reciprocal rank.
+    """
+
+    def __init__(self, jobs: List[Dict[str, Any]], vectors: np.ndarray):
+        self.jobs = jobs
+        self.vectors = _normalize(np.asarray(vectors, dtype=np.float32))
+        self._masks: Dict[tuple, np.ndarray] = {}
+        self._build_bm25()
+        self._build_clusters()
+
+    def _build_bm25(self) -> None:
+        postings: Dict[str, List] = {}
+        lengths = np.zeros(len(self.jobs), dtype=np.float32)
+        for doc_id, job in enumerate(self.jobs):
+            terms = Counter(_tokenize(_document_text(job)))
+            lengths[doc_id] = sum(terms.values())
+            for term, tf in terms.items():
+                postings.setdefault(term, []).append((doc_id, tf))
+        self._doc_lengths = lengths
+        self._avg_length = float(lengths.mean()) if len(lengths) else 0.0
+        self._postings = {
+            term: (
+                np.array([doc_id for doc_id, _ in entries], dtype=np.int64),
+                np.array([tf for _, tf in entries], dtype=np.float32)
+            )
+            for term, entries in postings.items()
+        }
+
+    def _build_clusters(self, iterations: int = 10) -> None:
+        # Spherical k-means; each listing is searched only via its nearest centroid
+        self._centroids = None
+        count = len(self.jobs)
+        if count < ANN_MIN_SIZE:
+            return
+        clusters = int(math.sqrt(count))
+        rng = np.random.default_rng(0)
+        centroids = self.vectors[rng.choice(count, clusters, replace=False)]
+        for _ in range(iterations):
+            assignment = np.argmax(self.vectors @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, self.vectors)
+            empty = np.bincount(assignment, minlength=clusters) == 0
+            sums[empty] = centroids[empty]
+            centroids = _normalize(sums)
+        self._centroids = centroids
+        self._assignment = np.argmax(self.vectors @ centroids.T, axis=1)
+
+    def __len__(self) -> int:
+        return len(self.jobs)
+
+    def filter_mask(self, preferences: Dict[str, Any]) -> np.ndarray:
+        """Listings compatible with the location, company size and role type preferences."""
+        key = (preferences.get('location'), preferences.get('company_size'), preferences.get('role_type'))
+        if key not in self._masks:
+            if len(self._masks) >= 256:
+                self._masks.clear()
+            self._masks[key] = self._compute_mask(preferences)
+        return self._masks[key]
+
+    def _compute_mask(self, preferences: Dict[str, Any]) -> np.ndarray:
+        return np.array([
+            _matches(job.get('location'), preferences.get('location'))
+            and _matches(job.get('company_size'), preferences.get('company_size'))
+            and _matches(job.get('role_type'), preferences.get('role_type'))
+            for job in self.jobs
+        ], dtype=bool)
+
+    def vector_scores(self, query_vector, mask: np.ndarray) -> np.ndarray:
+        """Cosine similarity for listings in `mask` (-inf elsewhere)."""
+        query = _normalize(np.asarray(query_vector, dtype=np.float32))
+        scores = np.full(len(self.jobs), -np.inf, dtype=np.float32)
+        candidates = mask
+        if self._centroids is not None:
+            probes = np.argsort(self._centroids @ query)[-ANN_PROBES:]
+            probed = mask & np.isin(self._assignment, probes)
+            if probed.sum() >= TOP_K:
+                candidates = probed
+        scores[candidates] = self.vectors[candidates] @ query
+        return scores
+
+    def bm25_scores(self, query_text: str, mask: np.ndarray) -> np.ndarray:
+        """BM25 relevance for listings in `mask` (-inf elsewhere)."""
+        scores = np.zeros(len(self.jobs), dtype=np.float32)
+        count = len(self.jobs)
+        for term in set(_tokenize(query_text)):
+            if term not in self._postings:
+                continue
+            doc_ids, tfs = self._postings[term]
+            idf = math.log(1 + (count - len(doc_ids) + 0.5) / (len(doc_ids) + 0.5))
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * self._doc_lengths[doc_ids] / (self._avg_length or 1.0))
+            scores[doc_ids] += idf * tfs * (BM25_K1 + 1) / (tfs + norm)
+        scores[~mask] = -np.inf
+        return scores
+
+    def search(self, query_text: str, query_vector, preferences: Dict[str, Any], k: int = TOP_K) -> List[Dict[str, Any]]:
+        """Top-k listings by reciprocal-rank fusion of vector and keyword rankings."""
+        mask = self.filter_mask(preferences)
+        fused: Dict[int, float] = {}
+        for scores in (self.vector_scores(query_vector, mask), self.bm25_scores(query_text, mask)):
+            depth = min(k * 4, int(np.isfinite(scores).sum()))
+            if depth == 0:
+                continue
+            top = np.argpartition(-scores, depth - 1)[:depth]
+            for rank, doc_id in enumerate(top[np.argsort(-scores[top])]):
+                if scores[doc_id] > 0:
+                    fused[int(doc_id)] = fused.get(int(doc_id), 0.0) + 1.0 / (RRF_K + rank + 1)
+        ranked = sorted(fused, key=fused.get, reverse=True)[:k]
+        return [{**self.jobs[doc_id], 'retrieval_score': round(fused[doc_id], 5)} for doc_id in ranked]
+
+    def save(self, directory: Path) -> None:
+        # Each file is replaced whole, vectors last: workers reload when the
+        # vectors file changes, so they never see a half-written index
+        directory.mkdir(parents=True, exist_ok=True)
+        jobs_tmp = directory / (JOBS_FILE + '.tmp')
+        with open(jobs_tmp, 'w') as f:
+            for job in self.jobs:
+                f.write(json.dumps(job) + "\n")
+        os.replace(jobs_tmp, directory / JOBS_FILE)
+        vectors_tmp = directory / (VECTORS_FILE + '.tmp')
+        with open(vectors_tmp, 'wb') as f:
+            np.save(f, self.vectors)
+        os.replace(vectors_tmp, directory / VECTORS_FILE)
+
+    @classmethod
+    def load(cls, directory: Path) -> "JobIndex":
+        with open(directory / JOBS_FILE) as f:
+            jobs = [json.loads(line) for line in f if line.strip()]
+        vectors = np.load(directory / VECTORS_FILE)
+        if len(vectors) != len(jobs):
+            raise ValueError(f"Job index has {len(jobs)} listings but {len(vectors)} vectors")
+        return cls(jobs, vectors)
+
+def read_listings(path: Path) -> Iterator[Dict[str, Any]]:
+    """Read job listings from a JSONL or Parquet file, keeping the known fields."""
+    if path.suffix == '.parquet':
+        if pq is None:
+            raise Exception("Error reading job listings: Parquet import requires pyarrow")
+        rows = pq.read_table(path).to_pylist()
+    else:
+        with open(path) as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+    for position, row in enumerate(rows):
+        job = {field: row.get(field) for field in JOB_FIELDS if row.get(field) is not None}
+        if job.get('title'):
+            job['id'] = str(row.get('id', position))
+            yield job
+
+async def embed_texts(texts: List[str], priority: str = 'interactive') -> List[List[float]]:
+    """Embed texts in one request, waiting on the shared rate budget."""
+    await acquire(EMBEDDING_MODEL, sum(count_tokens(text) for text in texts), priority)
+    response = await get_async_client().embeddings.create(model=EMBEDDING_MODEL, input=texts)
+    return [item.embedding for item in response.data]
+
+async def build_index(source: Path, directory: Path = INDEX_DIR) -> JobIndex:
+    """Embed a listings file and write the index that workers load."""
+    jobs = list(read_listings(source))
+    vectors = []
+    for start in range(0, len(jobs), EMBEDDING_BATCH_SIZE):
+        batch = jobs[start:start + EMBEDDING_BATCH_SIZE]
+        texts = [truncate_to_tokens(_document_text(job), 2000) for job in batch]
+        vectors.extend(await embed_texts(texts, 'bulk'))
+        logger.info("Embedded %d/%d listings", min(start + EMBEDDING_BATCH_SIZE, len(jobs)), len(jobs))
+    index = JobIndex(jobs, np.array(vectors, dtype=np.float32))
+    index.save(directory)
+    return index
+
+_index: Optional[JobIndex] = None
+_index_mtime: Optional[float] = None
+_index_lock = threading.Lock()
+
+def get_index() -> Optional[JobIndex]:
+    """The worker's loaded index, reloaded when a new one is written; None if absent."""
+    global _index, _index_mtime
+    try:
+        mtime = (INDEX_DIR / VECTORS_FILE).stat().st_mtime
+    except OSError:
+        return None
+    with _index_lock:
+        if _index is None or mtime != _index_mtime:
+            try:
+                loaded = JobIndex.load(INDEX_DIR)
+            except (OSError, ValueError) as e:
+                # Caught mid-rewrite; keep the current index and retry on the next search
+                logger.warning("Failed to load job index: %s", e)
+                return _index
+            _index, _index_mtime = loaded, mtime
+            logger.info("Loaded job index with %d listings", len(_index))
+        return _index
+
+def _query_text(resume_summary: Dict[str, Any], preferences: Dict[str, Any]) -> str:
+    resume = compact_json(fit_resume_summary(resume_summary, 300))
+    return f"{preferences.get('role_type') or ''} {preferences.get('additional_info') or ''} {resume}"
+
+def _rerank_prompt(resume_summary: Dict[str, Any], preferences: Dict[str, Any], candidates: List[Dict[str, Any]]) -> str:
+    listings = [
+        {
+            "id": job['id'],
+            "title": job.get('title'),
+            "company": job.get('company'),
+            "location": job.get('location'),
+            "description": truncate_to_tokens(job.get('description') or '', DESCRIPTION_TOKENS)
+        }
+        for job in candidates
+    ]
+    return (
+        f"Resume Summary:\n{compact_json(fit_resume_summary(resume_summary, 1000))}\n"
+        f"Job Preferences:\n{compact_json(preferences)}\n"
+        f"Listings:\n{compact_json(listings)}"
+    )
+
+async def grounded_search(
+    resume_summary: Dict[str, Any],
+    preferences: Dict[str, Any],
+    on_job: Optional[Callable[[Dict], None]] = None,
+    priority: str = 'interactive'
+) -> Optional[Dict]:
+    """
+    Retrieve candidate listings from the local index and have the LLM re-rank
+    them. Returns None when there is no index, the query can't be embedded
+    or there are too few candidates, so the caller can fall back to
+    open-ended generation.
+    """
+    index = await asyncio.to_thread(get_index)
+    if index is None:
+        return None
+
+    query_text = _query_text(resume_summary, preferences)
+    try:
+        query_vector = (await embed_texts([query_text], priority))[0]
+    except RateLimitExceeded:
+        raise
+    except Exception as e:
+        logger.warning("Job index query embedding failed, falling back to generation: %s", e)
+        return None
+    candidates = index.search(query_text, query_vector, preferences)
+    if len(candidates) < MIN_CANDIDATES:
+        return None
+
+    by_id = {job['id']: job for job in candidates}
+    def listing_for(ranked: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        job = by_id.get(str(ranked.get('id')))
+        if job is None:
+            return None
+        return {**job, 'match_score': ranked.get('match_score'), 'match_reason': ranked.get('reason')}
+
+    def publish(ranked: Dict[str, Any]) -> None:
+        job = listing_for(ranked)
+        if job is not None:
+            on_job(job)
+
+    def check(result: Dict[str, Any]) -> Optional[str]:
+        # Ids that aren't among the candidates mean the model made listings up
+        listings = [listing_for(ranked) for ranked in result.get('jobs', [])]
+        if any(listing is None for listing in listings):
+            return 'unknown_listing'
+        return model_router.check_jobs({**result, 'jobs': listings})
+
+    result = await call_openai_for_jobs(
+        _rerank_prompt(resume_summary, preferences, candidates),
+        on_job=publish if on_job is not None else None,
+        priority=priority,
+        system_prompt=RERANK_SYSTEM_PROMPT,
+        call_type='rerank',
+        schema=RankedListing,
+        check=check
+    )
+    if result.get('error'):
+        # Retrieval order is still a usable ranking
+        logger.warning("Job index re-rank failed, using retrieval order: %s", result['error'])
+        return {'jobs': candidates, 'followup_questions': result.get('followup_questions', [])}
+
+    jobs = [job for job in map(listing_for, result.get('jobs', [])) if job is not None]
+    return {'jobs': jobs, 'followup_questions': result.get('followup_questions', [])}
+
+if __name__ == '__main__':
+    # python -m utils.job_index listings.jsonl [index_dir]
+    if len(sys.argv) < 2:
+        print("Usage: python -m utils.job_index <listings.jsonl|listings.parquet> [index_dir]")
+        sys.exit(1)
+    target = Path(sys.argv[2]) if len(sys.argv) > 2 else INDEX_DIR
+    built = asyncio.run(build_index(Path(sys.argv[1]), target))
+    print(f"Wrote job index with {len(built)} listings to {target}")
@@ -0,0 +1,157 @@
+import re
+import json
+from typing import Any, Dict, List, Optional, Type, Union
+from pydantic import BaseModel, ConfigDict, Field, ValidationError
+
+_FENCE = re.compile(r'```[a-zA-Z]*\s*|```')
+
+class JobListing(BaseModel):
+    """Schema every job from the LLM must satisfy; unknown fields are kept."""
+    model_config = ConfigDict(extra='allow')
+
+    title: str = Field(min_length=1)
+    company: Optional[str] = None
+    location: Optional[str] = None
+    description: Optional[str] = None
+    apply_link: Optional[str] = None
+    match_score: Optional[Union[float, str]] = None
+
+class JobStreamParser:
+    """
+    Incrementally pulls complete objects out of the "jobs" array of a JSON
+    document that arrives in chunks, so each job can be used as soon as its
+    closing brace has streamed in.
+    """
+
+    def __init__(self, array_key: str = 'jobs'):
+        self._array_start = re.compile(r'"%s"\s*:\s*\[' % re.escape(array_key))
+        self._chunks: List[str] = []
+        self._text = ""
+        self._pos = 0
+        self._in_array = False
+        self._done = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._obj_start = 0
+
+    @property
+    def text(self) -> str:
+        """Everything fed so far."""
+        if self._chunks:
+            self._text += "".join(self._chunks)
+            self._chunks = []
+        return self._text
+
+    def feed(self, chunk: str) -> List[Dict]:
+        """Add a chunk of the completion and return any jobs it completed."""
+        self._chunks.append(chunk)
+        if self._done:
+            return []
+
+        text = self.text
+        if not self._in_array:
+            match = self._array_start.search(text, max(self._pos - 32, 0))
+            if not match:
+                self._pos = len(text)
+                return []
+            self._in_array = True
+            self._pos = match.end()
+
+        jobs = []
+        i = self._pos
+        while i < len(text):
+            c = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == '\\':
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+            elif c == '"':
+                self._in_string = True
+            elif c in '{[':
+                if self._depth == 0 and c == '{':
+                    self._obj_start = i
+                self._depth += 1
+            elif c in '}]':
+                if self._depth == 0:
+                    # End of the jobs array
+                    self._done = True
+                    i += 1
+                    break
+                self._depth -= 1
+                if self._depth == 0 and c == '}':
+                    try:
+                        jobs.append(json.loads(text[self._obj_start:i + 1]))
+                    except json.JSONDecodeError:
+                        pass
+            i += 1
+
+        self._pos = i
+        return jobs
+
+def validate_job(job: Any, schema: Type[BaseModel] = JobListing) -> Optional[Dict]:
+    """Return the job checked against `schema`, or None if it doesn't fit."""
+    try:
+        return schema.model_validate(job).model_dump(exclude_none=True)
+    except ValidationError:
+        return None
+
+def strip_code_fences(text: str) -> str:
+    """Remove markdown code fences around (or inside) a completion."""
+    return _FENCE.sub('', text)
+
+def _salvage_strings(text: str, key: str) -> List[str]:
+    # Complete string elements of `"key": [...]`, even if the array is cut off
+    match = re.search(r'"%s"\s*:\s*\[' % re.escape(key), text)
+    if not match:
+        return []
+    decoder = json.JSONDecoder()
+    items = []
+    pos = match.end()
+    while True:
+        while pos < len(text) and text[pos] in ' \t\r\n,':
+            pos += 1
+        if pos >= len(text) or text[pos] == ']':
+            return items
+        try:
+            item, pos = decoder.raw_decode(text, pos)
+        except json.JSONDecodeError:
+            return items
+        if isinstance(item, str):
+            items.append(item)
+
+def parse_job_response(text: str, schema: Type[BaseModel] = JobListing, array_key: str = 'jobs') -> Dict:
+    """
+    Parse a job search completion without giving up on imperfect output:
+    code fences and trailing prose are ignored, and a truncated document
+    still yields every complete job (marked with "partial": True). Jobs
+    that don't match `schema` are dropped.
+    """
+    cleaned = strip_code_fences(text)
+    data = None
+    start = cleaned.find('{')
+    if start >= 0:
+        try:
+            data, _ = json.JSONDecoder().raw_decode(cleaned, start)
+        except json.JSONDecodeError:
+            data = None
+
+    if isinstance(data, dict):
+        jobs = data.get(array_key) or []
+        questions = data.get('followup_questions') or []
+        partial = False
+    else:
+        jobs = JobStreamParser(array_key).feed(cleaned)
+        questions = _salvage_strings(cleaned, 'followup_questions')
+        partial = True
+
+    result = {
+        'jobs': [job for job in (validate_job(j, schema) for j in jobs) if job is not None],
+        'followup_questions': [q for q in questions if isinstance(q, str)]
+    }
+    if partial:
+        result['partial'] = True
+    return result
@@ -0,0 +1,219 @@
+import os
+import asyncio
+import logging
+import re
+import json
+import time
+import hashlib
+from collections import OrderedDict
+from threading import Lock
+from typing import Callable, Dict, Optional, Tuple
+import numpy as np
+from celery_app import celery_app
+from utils.openai_clients import get_async_client
+from utils.rate_limiter import acquire
+from utils import model_router, telemetry
+from utils.prompt_generator import call_openai_for_jobs
+from utils.prompt_budget import count_tokens, fit_resume_summary
+
+logger = logging.getLogger(__name__)
+
+# Exact tier (Redis, shared by all workers)
+ENABLED = os.getenv('LLM_CACHE_ENABLED', 'true').lower() == 'true'
+TTL = int(os.getenv('LLM_CACHE_TTL', str(24 * 3600)))
+MAX_ENTRIES = int(os.getenv('LLM_CACHE_MAX_ENTRIES', '10000'))
+
+# Optional similarity tier (in-process vector index per worker)
+SIMILARITY_ENABLED = os.getenv('LLM_CACHE_SIMILARITY', 'false').lower() == 'true'
+SIMILARITY_THRESHOLD = float(os.getenv('LLM_CACHE_SIMILARITY_THRESHOLD', '0.97'))
+SIMILARITY_MAX_ENTRIES = int(os.getenv('LLM_CACHE_SIMILARITY_MAX_ENTRIES', '2000'))
+EMBEDDING_MODEL = os.getenv('LLM_CACHE_EMBEDDING_MODEL', 'text-embedding-ada-002')
+# The resume part of the embedded text is trimmed to this many tokens
+SIMILARITY_TEXT_TOKENS = int(os.getenv('LLM_CACHE_SIMILARITY_TEXT_TOKENS', '500'))
+
+KEY_PREFIX = 'llm_cache:exact:'
+INDEX_KEY = 'llm_cache:index'
+STATS_KEY = 'llm_cache:stats'
+
+def cache_key(prompt: str, params: Dict) -> str:
+    """
+    Hash the prompt and model parameters into a cache key. Whitespace is
+    collapsed so formatting-only differences map to the same entry.
+    """
+    canonical = json.dumps(
+        {"prompt": re.sub(r'\s+', ' ', prompt).strip(), "params": params},
+        sort_keys=True,
+        separators=(',', ':')
+    )
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+def similarity_text(resume_summary: Optional[Dict], preferences: Dict) -> Optional[str]:
+    """
+    Text embedded for the similarity tier: a bounded resume summary plus the
+    preferences. None when the similarity tier is off.
+    """
+    if not SIMILARITY_ENABLED:
+        return None
+    return json.dumps(
+        {
+            'resume_summary': fit_resume_summary(resume_summary, SIMILARITY_TEXT_TOKENS),
+            'preferences': preferences
+        },
+        sort_keys=True
+    )
+
+# Stats counters that are lookups, by their label in the cache lookup metric
+_LOOKUP_RESULTS = {'exact_hits': 'exact_hit', 'similar_hits': 'similar_hit', 'misses': 'miss'}
+
+def _record(stat: str) -> None:
+    if stat in _LOOKUP_RESULTS:
+        telemetry.CACHE_LOOKUPS.labels('llm_response', _LOOKUP_RESULTS[stat]).inc()
+    try:
+        with celery_app.pool.acquire(block=True) as conn:
+            conn.default_channel.client.hincrby(STATS_KEY, stat, 1)
+    except Exception as e:
+        logger.warning("LLM cache stats update failed: %s", e)
+
+def get_stats() -> Dict[str, int]:
+    """Return hit/miss counters aggregated across all workers."""
+    with celery_app.pool.acquire(block=True) as conn:
+        raw = conn.default_channel.client.hgetall(STATS_KEY)
+    stats = {'exact_hits': 0, 'similar_hits': 0, 'misses': 0, 'stores': 0}
+    for name, value in raw.items():
+        name = name.decode('utf-8') if isinstance(name, bytes) else name
+        stats[name] = int(value)
+    return stats
+
+def _get_exact(key: str) -> Optional[Dict]:
+    try:
+        with celery_app.pool.acquire(block=True) as conn:
+            value = conn.default_channel.client.get(KEY_PREFIX + key)
+        return json.loads(value) if value is not None else None
+    except Exception as e:
+        logger.warning("LLM cache lookup failed: %s", e)
+        return None
+
+def _set_exact(key: str, result: Dict) -> None:
+    try:
+        with celery_app.pool.acquire(block=True) as conn:
+            client = conn.default_channel.client
+            pipe = client.pipeline()
+            pipe.set(KEY_PREFIX + key, json.dumps(result), ex=TTL)
+            pipe.zadd(INDEX_KEY, {key: time.time()})
+            pipe.zcard(INDEX_KEY)
+            size = pipe.execute()[-1]
+
+            # Size-based eviction: drop the oldest entries beyond MAX_ENTRIES
+            if size > MAX_ENTRIES:
+                evicted = client.zpopmin(INDEX_KEY, size - MAX_ENTRIES)
+                if evicted:
+                    client.delete(*[KEY_PREFIX + (k.decode('utf-8') if isinstance(k, bytes) else k)
+                                    for k, _ in evicted])
+    except Exception as e:
+        logger.warning("LLM cache store failed: %s", e)
+
+class VectorIndex:
+    """
+    Small in-process cosine-similarity index mapping embeddings to exact-tier
+    cache keys, with TTL and oldest-first eviction.
+    """
+
+    def __init__(self, max_entries: int, ttl: int):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[np.ndarray, float]]" = OrderedDict()
+        self._matrix: Optional[np.ndarray] = None
+        self._keys = []
+        self._lock = Lock()
+
+    def add(self, key: str, vector) -> None:
+        vector = np.asarray(vector, dtype=np.float32)
+        vector = vector / (np.linalg.norm(vector) or 1.0)
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (vector, time.time() + self.ttl)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._matrix = None
+
+    def nearest(self, vector) -> Optional[Tuple[str, float]]:
+        """Return the most similar live key and its cosine similarity."""
+        vector = np.asarray(vector, dtype=np.float32)
+        vector = vector / (np.linalg.norm(vector) or 1.0)
+        with self._lock:
+            now = time.time()
+            expired = [k for k, (_, expires) in self._entries.items() if expires <= now]
+            for k in expired:
+                del self._entries[k]
+            if expired:
+                self._matrix = None
+            if not self._entries:
+                return None
+            if self._matrix is None:
+                self._keys = list(self._entries)
+                self._matrix = np.stack([v for v, _ in self._entries.values()])
+            scores = self._matrix @ vector
+            best = int(np.argmax(scores))
+            return self._keys[best], float(scores[best])
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+_vector_index = VectorIndex(SIMILARITY_MAX_ENTRIES, TTL)
+
+async def _embed(text: str, priority: str):
+    """Embed the similarity text, waiting on the shared rate budget."""
+    await acquire(EMBEDDING_MODEL, count_tokens(text), priority)
+    response = await get_async_client().embeddings.create(model=EMBEDDING_MODEL, input=text)
+    return response.data[0].embedding
+
+async def cached_call_openai_for_jobs(
+    prompt: str,
+    similarity_text: Optional[str] = None,
+    on_job: Optional[Callable[[Dict], None]] = None,
+    priority: str = 'interactive',
+    check: Optional[Callable[[Dict], Optional[str]]] = None
+) -> Dict:
+    """
+    Wrap call_openai_for_jobs with the response cache. `similarity_text`
+    (resume summary plus preferences) feeds the optional similarity tier.
+    Cached jobs are replayed through `on_job` so callers see the same stream.
+    `check` validates results of a cascaded search route (see model_router).
+    Redis round trips run in threads so they don't stall the worker loop.
+    """
+    if not ENABLED:
+        return await call_openai_for_jobs(prompt, on_job=on_job, priority=priority, check=check)
+
+    key = cache_key(prompt, model_router.route_params('search'))
+    result = await asyncio.to_thread(_get_exact, key)
+    if result is not None:
+        await asyncio.to_thread(_record, 'exact_hits')
+
+    embedding = None
+    if result is None and SIMILARITY_ENABLED and similarity_text:
+        try:
+            embedding = await _embed(similarity_text, priority)
+            match = _vector_index.nearest(embedding)
+            if match and match[1] >= SIMILARITY_THRESHOLD:
+                result = await asyncio.to_thread(_get_exact, match[0])
+                if result is not None:
+                    await asyncio.to_thread(_record, 'similar_hits')
+        except Exception as e:
+            logger.warning("LLM cache similarity lookup failed: %s", e)
+
+    if result is not None:
+        if on_job is not None:
+            for job in result.get('jobs', []):
+                on_job(job)
+        return result
+
+    await asyncio.to_thread(_record, 'misses')
+    result = await call_openai_for_jobs(prompt, on_job=on_job, priority=priority, check=check)
+
+    # Only cache usable responses; salvaged partial answers would stick for the whole TTL
+    if result.get('jobs') and not result.get('error') and not result.get('partial'):
+        await asyncio.to_thread(_set_exact, key, result)
+        await asyncio.to_thread(_record, 'stores')
+        if embedding is not None:
+            _vector_index.add(key, embedding)
+    return result
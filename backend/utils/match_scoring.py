@@ -0,0 +1,191 @@
+import os
+import logging
+import re
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from utils.job_index import embed_texts
+from utils import model_router
+
+logger = logging.getLogger(__name__)
+
+# Deterministic resume-to-job scoring; replaces the LLM's match_score for ranking
+ENABLED = os.getenv('MATCH_SCORING_ENABLED', 'true').lower() == 'true'
+USE_EMBEDDINGS = os.getenv('MATCH_SCORING_USE_EMBEDDINGS', 'false').lower() == 'true'
+MAX_RESULTS = int(os.getenv('MATCH_SCORING_MAX_RESULTS', '20'))
+
+# Component weights; components that can't be computed are left out and the
+# rest re-normalized
+WEIGHT_SKILLS = float(os.getenv('MATCH_WEIGHT_SKILLS', '0.5'))
+WEIGHT_EMBEDDING = float(os.getenv('MATCH_WEIGHT_EMBEDDING', '0.3'))
+WEIGHT_PREFERENCES = float(os.getenv('MATCH_WEIGHT_PREFERENCES', '0.2'))
+
+# Bigram ids live above every unigram id
+BIGRAM_BASE = 1 << 24
+
+_STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'in', 'is', 'of',
+    'on', 'or', 'our', 'the', 'to', 'we', 'with', 'you', 'your', 'will', 'this', 'that'
+}
+
+def _terms(text: str) -> List[str]:
+    return [t for t in re.findall(r'[a-z0-9+#]+(?:\.[a-z0-9+#]+)*', text.lower()) if t not in _STOPWORDS]
+
+def _feature_ids(terms: List[str], vocabulary: Dict[str, int]) -> np.ndarray:
+    # Unigram ids plus pair ids for bigrams, so multi-word skills ("machine
+    # learning") match as a unit
+    ids = np.fromiter((vocabulary.setdefault(t, len(vocabulary)) for t in terms), dtype=np.int64, count=len(terms))
+    return np.concatenate([ids, (ids[:-1] + 1) * BIGRAM_BASE + ids[1:]])
+
+def job_text(job: Dict[str, Any]) -> str:
+    """Text a job is scored on."""
+    return " ".join(str(job.get(field) or '') for field in ('title', 'role_type', 'location', 'description'))
+
+def resume_text(resume_summary: Dict[str, Any]) -> str:
+    """Text a resume is scored on: structured sections, or the raw text."""
+    parts = [" ".join(map(str, resume_summary.get('skills') or []))]
+    for role in resume_summary.get('experience') or []:
+        if isinstance(role, dict):
+            parts.append(str(role.get('title') or ''))
+    parts.append(str(resume_summary.get('summary') or resume_summary.get('text') or ''))
+    return " ".join(parts)
+
+def _job_features(jobs: Sequence[Dict[str, Any]], vocabulary: Dict[str, int]):
+    # Sparse binary bag of terms: parallel (row, feature id) arrays
+    features = [np.unique(_feature_ids(_terms(job_text(job)), vocabulary)) for job in jobs]
+    rows = np.repeat(np.arange(len(jobs)), [len(f) for f in features])
+    return rows, np.concatenate(features) if features else np.zeros(0, dtype=np.int64)
+
+def skill_scores(jobs: Sequence[Dict[str, Any]], resume_summary: Dict[str, Any]) -> np.ndarray:
+    """
+    Fraction of the resume's skills each job mentions. Without a skills list
+    (raw-text resumes) this is the cosine of the term sets instead.
+    """
+    vocabulary: Dict[str, int] = {}
+    rows, columns = _job_features(jobs, vocabulary)
+    skills = {" ".join(_terms(s)) for s in (resume_summary.get('skills') or []) if isinstance(s, str)}
+    skills.discard("")
+    if skills:
+        # A skill's last feature is its full phrase (the bigram for two words)
+        wanted = np.unique([_feature_ids(skill.split(), vocabulary)[-1] for skill in skills])
+        size = len(skills)
+    else:
+        wanted = np.unique(_feature_ids(_terms(resume_text(resume_summary)), vocabulary))
+        size = len(wanted)
+    if size == 0:
+        return np.zeros(len(jobs), dtype=np.float32)
+
+    matched = np.bincount(rows[np.isin(columns, wanted)], minlength=len(jobs)).astype(np.float32)
+    if skills:
+        return matched / size
+    sizes = np.bincount(rows, minlength=len(jobs)).astype(np.float32)
+    return matched / np.sqrt(np.maximum(sizes, 1.0) * size)
+
+def _preference_match(value: Optional[str], wanted: Optional[str]) -> float:
+    if not wanted or wanted.strip().lower() in ('any', 'none', ''):
+        return 1.0
+    if not value:
+        return 0.5  # unknown, neither match nor mismatch
+    value, wanted = value.lower(), wanted.strip().lower()
+    if wanted in value or value in wanted:
+        return 1.0
+    return 1.0 if set(_terms(wanted)) & set(_terms(value)) else 0.0
+
+def preference_scores(jobs: Sequence[Dict[str, Any]], preferences: Dict[str, Any]) -> np.ndarray:
+    """Average of location, role type and company size agreement per job (0-1)."""
+    return np.array([
+        (
+            _preference_match(job.get('location'), preferences.get('location'))
+            + _preference_match(job.get('role_type') or job.get('title'), preferences.get('role_type'))
+            + _preference_match(job.get('company_size'), preferences.get('company_size'))
+        ) / 3
+        for job in jobs
+    ], dtype=np.float32)
+
+def embedding_scores(resume_vector: Sequence[float], job_vectors: Sequence[Sequence[float]]) -> np.ndarray:
+    """Cosine similarity between the resume and each job embedding, scaled to 0-1."""
+    resume = np.asarray(resume_vector, dtype=np.float32)
+    matrix = np.asarray(job_vectors, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1) * (np.linalg.norm(resume) or 1.0)
+    cosine = (matrix @ resume) / np.where(norms == 0, 1.0, norms)
+    return np.clip(cosine, 0.0, 1.0)
+
+def score_jobs(
+    jobs: Sequence[Dict[str, Any]],
+    resume_summary: Dict[str, Any],
+    preferences: Dict[str, Any],
+    resume_vector: Optional[Sequence[float]] = None,
+    job_vectors: Optional[Sequence[Sequence[float]]] = None
+) -> np.ndarray:
+    """Weighted match score (0-100) for every job, computed in one batch."""
+    if not jobs:
+        return np.zeros(0, dtype=np.float32)
+    components = [
+        (WEIGHT_SKILLS, skill_scores(jobs, resume_summary)),
+        (WEIGHT_PREFERENCES, preference_scores(jobs, preferences)),
+    ]
+    if resume_vector is not None and job_vectors is not None:
+        components.append((WEIGHT_EMBEDDING, embedding_scores(resume_vector, job_vectors)))
+    total_weight = sum(weight for weight, _ in components) or 1.0
+    combined = sum(weight * scores for weight, scores in components) / total_weight
+    return np.round(combined * 100, 1)
+
+def rank_jobs(
+    jobs: List[Dict[str, Any]],
+    resume_summary: Dict[str, Any],
+    preferences: Dict[str, Any],
+    resume_vector: Optional[Sequence[float]] = None,
+    job_vectors: Optional[Sequence[Sequence[float]]] = None,
+    limit: int = None
+) -> List[Dict[str, Any]]:
+    """
+    Score jobs, sort them best first and keep the top `limit`. The computed
+    score replaces match_score; the LLM's own guess stays as llm_match_score.
+    """
+    limit = MAX_RESULTS if limit is None else limit
+    scores = score_jobs(jobs, resume_summary, preferences, resume_vector, job_vectors)
+    # Stable sort keeps the LLM's order among equal scores
+    order = np.argsort(-scores, kind='stable')[:limit]
+    ranked = []
+    for index in order:
+        job = dict(jobs[index])
+        if 'match_score' in job:
+            job['llm_match_score'] = job['match_score']
+        job['match_score'] = float(scores[index])
+        ranked.append(job)
+    return ranked
+
+def relevance_check(
+    resume_summary: Optional[Dict[str, Any]],
+    preferences: Dict[str, Any]
+) -> Callable[[Dict[str, Any]], Optional[str]]:
+    """
+    Cascade check for a job search: model_router.check_jobs, plus escalation
+    when even the best job's computed score (skills and preferences, not the
+    LLM's match_score) is below model_router.CASCADE_MIN_SCORE.
+    """
+    def check(result: Dict[str, Any]) -> Optional[str]:
+        reason = model_router.check_jobs(result)
+        if reason is None and model_router.CASCADE_MIN_SCORE:
+            scores = score_jobs(result['jobs'], resume_summary or {}, preferences)
+            if float(scores.max()) < model_router.CASCADE_MIN_SCORE:
+                return 'low_relevance'
+        return reason
+    return check
+
+async def embed_for_scoring(
+    jobs: List[Dict[str, Any]],
+    resume_summary: Dict[str, Any],
+    priority: str = 'interactive'
+) -> Tuple[Optional[List[float]], Optional[List[List[float]]]]:
+    """
+    Resume and job embeddings for the embedding component, in one batched
+    call. (None, None) when embeddings are disabled or unavailable.
+    """
+    if not USE_EMBEDDINGS or not jobs:
+        return None, None
+    try:
+        vectors = await embed_texts([resume_text(resume_summary)] + [job_text(job) for job in jobs], priority)
+    except Exception as e:
+        logger.warning("Match scoring embeddings failed, scoring without them: %s", e)
+        return None, None
+    return vectors[0], vectors[1:]
@@ -0,0 +1,159 @@
+import os
+import json
+import time
+import logging
+import contextvars
+from typing import Any, Awaitable, Callable, Dict, List, Optional, TypeVar
+from utils.rate_limiter import RateLimitExceeded
+from utils import telemetry
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+# Model tiers by name; routes refer to tiers, so swapping a model is one setting
+TIERS = {
+    'fast': os.getenv('MODEL_TIER_FAST', 'gpt-3.5-turbo'),
+    'strong': os.getenv('MODEL_TIER_STRONG', 'gpt-4'),
+}
+
+def _route(call_type: str, default: str) -> List[str]:
+    tiers = [tier.strip() for tier in (os.getenv(f'MODEL_ROUTE_{call_type.upper()}') or default).split(',')]
+    return [tier for tier in tiers if tier]
+
+# Tiers each call type tries in order. A later tier only runs when the result
+# of the one before fails validation (a cascade); one tier means no cascade.
+# Unknown tier names are used as model names. Search is a single tier by
+# default: a cascade holds streamed jobs back until the fast tier is accepted.
+ROUTES = {
+    'summarize': _route('summarize', 'fast,strong'),
+    'search': _route('search', 'strong'),
+    'rerank': _route('rerank', 'fast,strong'),
+    'followup': _route('followup', 'fast'),
+}
+
+# Sampling parameters per call type (part of the response cache key)
+CALL_PARAMS = {
+    'summarize': {"temperature": 0.2},
+    'search': {"temperature": 0.7, "max_tokens": 2000},
+    'rerank': {"temperature": 0.2, "max_tokens": 1200},
+    'followup': {"temperature": 0.7, "max_tokens": 200},
+}
+
+# Below these, a job list from an earlier tier escalates to the next one: the
+# number of distinct, complete jobs, and the best computed match score (0-100,
+# see match_scoring.relevance_check; the LLM's own match_score isn't trusted)
+CASCADE_MIN_JOBS = int(os.getenv('MODEL_CASCADE_MIN_JOBS', '3'))
+CASCADE_MIN_SCORE = float(os.getenv('MODEL_CASCADE_MIN_SCORE', '30'))
+
+# USD per 1K prompt and completion tokens, for cost accounting;
+# MODEL_PRICES='{"model": [prompt, completion]}' adds or overrides models
+MODEL_PRICES = {
+    'gpt-3.5-turbo': (0.0005, 0.0015),
+    'gpt-4': (0.03, 0.06),
+    'gpt-4-turbo': (0.01, 0.03),
+    'gpt-4o': (0.005, 0.015),
+    'gpt-4o-mini': (0.00015, 0.0006),
+}
+MODEL_PRICES.update({
+    model: tuple(prices) for model, prices in json.loads(os.getenv('MODEL_PRICES') or '{}').items()
+})
+
+# The routed attempt in progress, so usage is charged to its call type and tier
+_attempt: contextvars.ContextVar = contextvars.ContextVar('model_attempt', default=None)
+
+def model_for(tier: str) -> str:
+    return TIERS.get(tier, tier)
+
+def params(call_type: str, tier: str) -> Dict[str, Any]:
+    """Completion parameters for one tier of a call type."""
+    return {"model": model_for(tier), **CALL_PARAMS[call_type]}
+
+def route_params(call_type: str) -> Dict[str, Any]:
+    """Parameters of every tier in a call type's route, e.g. for cache keys."""
+    return {"route": [params(call_type, tier) for tier in ROUTES[call_type]]}
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    """Estimated USD cost of one completion (0 for models without a price)."""
+    prompt_price, completion_price = MODEL_PRICES.get(model, (0.0, 0.0))
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1000
+
+def record_usage(model: str, prompt_tokens: int, completion_tokens: int) -> None:
+    """Charge a finished completion to the current routed attempt."""
+    attempt = _attempt.get()
+    call_type, tier = (attempt['call_type'], attempt['tier']) if attempt else ('unrouted', model)
+    cost = estimate_cost(model, prompt_tokens, completion_tokens)
+    telemetry.MODEL_COST_USD.labels(call_type, tier, model).inc(cost)
+    if attempt is not None:
+        attempt['cost_usd'] += cost
+
+def check_jobs(result: Dict[str, Any]) -> Optional[str]:
+    """
+    Why a job list isn't good enough to keep (None when it is): an error, a
+    truncated response, or fewer than CASCADE_MIN_JOBS distinct jobs with a
+    title, company and description.
+    """
+    if result.get('error'):
+        return 'error'
+    if result.get('partial'):
+        return 'truncated'
+    complete = {
+        (str(job['title']).strip().lower(), str(job['company']).strip().lower())
+        for job in result.get('jobs') or []
+        if job.get('title') and job.get('company') and job.get('description')
+    }
+    if len(complete) < CASCADE_MIN_JOBS:
+        return 'too_few_jobs'
+    return None
+
+def check_summary(summary: Any) -> Optional[str]:
+    """Why a resume summary isn't good enough to keep (None when it is)."""
+    if not isinstance(summary, dict):
+        return 'invalid'
+    if not summary.get('skills') and not summary.get('experience'):
+        return 'incomplete'
+    return None
+
+async def cascade(
+    call_type: str,
+    attempt: Callable[[Dict[str, Any], bool], Awaitable[T]],
+    check: Callable[[T], Optional[str]]
+) -> T:
+    """
+    Run `attempt(params, final)` on each tier of the call type's route, cheapest
+    first, and return the first result `check` accepts (it returns a reason to
+    escalate, or None). Failures of earlier tiers escalate too; the last tier's
+    result is returned as is. Each attempt's latency and cost are recorded.
+    """
+    tiers = ROUTES[call_type]
+    for position, tier in enumerate(tiers):
+        final = position == len(tiers) - 1
+        tier_params = params(call_type, tier)
+        state = {'call_type': call_type, 'tier': tier, 'cost_usd': 0.0}
+        token = _attempt.set(state)
+        started = time.monotonic()
+        outcome = 'error'
+        reason = None
+        try:
+            with telemetry.span("model.tier", call_type=call_type, tier=tier, model=tier_params['model']) as current:
+                try:
+                    result = await attempt(tier_params, final)
+                    reason = None if final else check(result)
+                except RateLimitExceeded:
+                    raise
+                except Exception as e:
+                    if final:
+                        raise
+                    logger.warning("%s on the %s tier failed: %s", call_type, tier, e)
+                    reason = 'error'
+                outcome = 'escalated' if reason else 'ok'
+                current.set_attribute('outcome', outcome)
+                current.set_attribute('cost_usd', round(state['cost_usd'], 6))
+        finally:
+            telemetry.MODEL_TIER_SECONDS.labels(call_type, tier, outcome).observe(time.monotonic() - started)
+            _attempt.reset(token)
+
+        if reason is None:
+            return result
+        telemetry.MODEL_ESCALATIONS.labels(call_type, tier, reason).inc()
+        logger.info("Escalating %s past the %s tier: %s", call_type, tier, reason)
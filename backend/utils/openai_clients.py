@@ -0,0 +1,126 @@
+import os
+import logging
+import asyncio
+import threading
+from typing import Any, Coroutine, Dict, Optional
+import httpx
+from openai import AsyncOpenAI
+from utils.rate_limiter import observe_httpx_response
+from utils import telemetry
+
+logger = logging.getLogger(__name__)
+
+# HTTP connection pool shared by every OpenAI call in this process
+MAX_CONNECTIONS = int(os.getenv('OPENAI_MAX_CONNECTIONS', '20'))
+MAX_KEEPALIVE_CONNECTIONS = int(os.getenv('OPENAI_MAX_KEEPALIVE_CONNECTIONS', '10'))
+KEEPALIVE_EXPIRY = float(os.getenv('OPENAI_KEEPALIVE_EXPIRY', '60'))
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_thread: Optional[threading.Thread] = None
+_loop_lock = threading.Lock()
+_async_client: Optional[AsyncOpenAI] = None
+_stats = {'requests': 0, 'connections_opened': 0}
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=MAX_CONNECTIONS,
+        max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=KEEPALIVE_EXPIRY
+    )
+
+# httpcore reports every new TCP connection through the "trace" extension,
+# so requests minus connections opened is the number of reused connections
+async def _trace_async(event: str, info: Dict[str, Any]) -> None:
+    if event == 'connection.connect_tcp.complete':
+        _stats['connections_opened'] += 1
+
+async def _on_async_request(request: httpx.Request) -> None:
+    _stats['requests'] += 1
+    request.extensions['trace'] = _trace_async
+
+# Rate-limit headers on every response feed the shared limiter's backoff
+async def _on_async_response(response: httpx.Response) -> None:
+    # The Redis updates block, so they run off the shared worker loop
+    await asyncio.to_thread(observe_httpx_response, response)
+
+def _api_key() -> str:
+    api_key = os.getenv('OPENAI_API_KEY')
+    if not api_key:
+        raise ValueError("OPENAI_API_KEY environment variable is not set")
+    return api_key
+
+def get_worker_loop() -> asyncio.AbstractEventLoop:
+    """
+    Return the event loop that lives for the whole worker process. It runs in
+    a background thread so every pool thread (prefork or threads) can submit
+    coroutines to it and share one set of pooled connections.
+    """
+    global _loop, _loop_thread
+    with _loop_lock:
+        if _loop is None or _loop.is_closed():
+            _loop = asyncio.new_event_loop()
+            _loop_thread = threading.Thread(target=_loop.run_forever, name='worker-loop', daemon=True)
+            _loop_thread.start()
+    return _loop
+
+async def _in_span(coro: Coroutine, span) -> Any:
+    # Tasks on the worker loop don't inherit the caller's context; carry the span over
+    telemetry.activate(span)
+    return await coro
+
+def run_in_worker_loop(coro: Coroutine, timeout: Optional[float] = None) -> Any:
+    """
+    Run a coroutine on the worker's persistent event loop and wait for it.
+    `timeout` enforces time limits on thread-pool workers, where Celery's
+    signal-based soft_time_limit doesn't apply.
+    """
+    future = asyncio.run_coroutine_threadsafe(_in_span(coro, telemetry.current_span()), get_worker_loop())
+    try:
+        return future.result(timeout)
+    except BaseException:
+        # Timed out, or SoftTimeLimitExceeded raised in the waiting thread
+        future.cancel()
+        raise
+
+def get_async_client() -> AsyncOpenAI:
+    """
+    Shared AsyncOpenAI client. Its connections belong to the worker loop,
+    so only await it from coroutines run via run_in_worker_loop.
+    """
+    global _async_client
+    if _async_client is None:
+        _async_client = AsyncOpenAI(
+            api_key=_api_key(),
+            http_client=httpx.AsyncClient(
+                limits=_limits(),
+                event_hooks={'request': [_on_async_request], 'response': [_on_async_response]}
+            )
+        )
+    return _async_client
+
+def get_connection_stats() -> Dict[str, int]:
+    """Requests sent, connections opened and connections reused so far."""
+    return {
+        **_stats,
+        'connections_reused': max(_stats['requests'] - _stats['connections_opened'], 0)
+    }
+
+def init_worker_resources() -> None:
+    """Create the loop and client up front; wired to worker_process_init."""
+    get_worker_loop()
+    if os.getenv('OPENAI_API_KEY'):
+        get_async_client()
+
+def shutdown_worker_resources() -> None:
+    """Close pooled connections and the loop; wired to worker_process_shutdown."""
+    global _loop, _loop_thread, _async_client
+    logger.info("OpenAI connection stats", extra={"connection_stats": get_connection_stats()})
+    if _loop is not None and not _loop.is_closed():
+        if _async_client is not None:
+            asyncio.run_coroutine_threadsafe(_async_client.close(), _loop).result()
+        _loop.call_soon_threadsafe(_loop.stop)
+        _loop_thread.join()
+        _loop.close()
+    _loop = None
+    _loop_thread = None
+    _async_client = None
@@ -1,27 +1,79 @@
+import os
 import pytesseract
 from PIL import Image
-import io
+from contextlib import ExitStack
+from typing import Iterator
 from fastapi import UploadFile
 import PyPDF2
+import pdfplumber
+from utils.extraction_service import run_extraction
+from utils.upload_buffer import UploadSource, open_source, read_upload
 
-async def parse_resume(file: UploadFile) -> str:
+# The LLM prompt only uses a bounded amount of resume text, so stop reading early
+PDF_MAX_PAGES = int(os.getenv('PDF_MAX_PAGES', '10'))
+PDF_MAX_CHARS = int(os.getenv('PDF_MAX_CHARS', '20000'))
+# Pages where PyPDF2 finds less text than this get pdfplumber's layout analysis
+PDF_MIN_PAGE_CHARS = int(os.getenv('PDF_MIN_PAGE_CHARS', '20'))
+PDF_OCR_ENABLED = os.getenv('PDF_OCR_ENABLED', 'true').lower() == 'true'
+PDF_OCR_RESOLUTION = int(os.getenv('PDF_OCR_RESOLUTION', '200'))
+
+def iter_pdf_pages(content: UploadSource, max_pages: int = None) -> Iterator[str]:
     """
-    Parse text from a resume file (PDF or image)
+    Yield the text of each PDF page, cheapest method first: PyPDF2's text
+    layer, then pdfplumber's layout analysis, then OCR for image-only pages.
+    `content` is the PDF bytes or the path of a spilled upload.
+    """
+    max_pages = PDF_MAX_PAGES if max_pages is None else max_pages
+    with open_source(content) as stream, ExitStack() as plumber_stack:
+        reader = PyPDF2.PdfReader(stream)
+        plumber = None
+        for index, page in enumerate(reader.pages[:max_pages]):
+            text = page.extract_text() or ""
+            if len(text.strip()) < PDF_MIN_PAGE_CHARS:
+                if plumber is None:
+                    # Its own stream over the same data, so the two readers never share a position
+                    plumber = plumber_stack.enter_context(
+                        pdfplumber.open(plumber_stack.enter_context(open_source(content)))
+                    )
+                plumber_page = plumber.pages[index]
+                if plumber_page.chars:
+                    text = plumber_page.extract_text() or text
+                elif plumber_page.images and PDF_OCR_ENABLED:
+                    image = plumber_page.to_image(resolution=PDF_OCR_RESOLUTION).original
+                    text = pytesseract.image_to_string(image)
+            yield text
+
+def extract_pdf_text(content: UploadSource, max_pages: int = None, max_chars: int = None) -> str:
+    """
+    Extract text from PDF bytes page by page, stopping at the page or
+    character budget
+    """
+    max_chars = PDF_MAX_CHARS if max_chars is None else max_chars
+    parts = []
+    length = 0
+    for text in iter_pdf_pages(content, max_pages):
+        # Pages after the first are preceded by a "\n" separator
+        separator = 1 if parts else 0
+        parts.append(text[:max(max_chars - length - separator, 0)])
+        length += separator + len(parts[-1])
+        if length >= max_chars:
+            break
+    return "\n".join(parts)
+
+def parse_resume_bytes(content: UploadSource, filename: str) -> str:
+    """
+    Parse text from resume bytes (PDF or image). Synchronous and CPU-bound,
+    so callers on the event loop should go through the extraction service.
     """
-    content = await file.read()
-    text = ""
-    
     try:
-        if file.filename.lower().endswith('.pdf'):
+        if filename.lower().endswith('.pdf'):
             # Parse PDF
-            pdf_reader = PyPDF2.PdfReader(io.BytesIO(content))
-            for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
+            text = extract_pdf_text(content)
         
-        elif file.filename.lower().endswith(('.png', '.jpg', '.jpeg')):
+        elif filename.lower().endswith(('.png', '.jpg', '.jpeg')):
             # Parse image using OCR
-            image = Image.open(io.BytesIO(content))
-            text = pytesseract.image_to_string(image)
+            with open_source(content) as stream:
+                text = pytesseract.image_to_string(Image.open(stream))
         
         else:
             raise ValueError("Unsupported file format")
@@ -30,5 +82,19 @@ async def parse_resume(file: UploadFile) -> str:
     
     except Exception as e:
         raise Exception(f"Error parsing resume: {str(e)}")
-    finally:
-        await file.seek(0)  # Reset file pointer for subsequent reads
+
+def extract_resume_text(content: UploadSource, filename: str) -> str:
+    """
+    Extract resume text the way the upload endpoint does: the page-streaming
+    extractor for PDFs, OCR for images
+    """
+    if filename.lower().endswith('.pdf'):
+        return extract_pdf_text(content)
+    return parse_resume_bytes(content, filename)
+
+async def parse_resume(file: UploadFile) -> str:
+    """
+    Parse text from a resume file (PDF or image) in the extraction pool
+    """
+    with await read_upload(file) as upload:
+        return await run_extraction(parse_resume_bytes, upload.source(), file.filename)
@@ -0,0 +1,118 @@
+import os
+import logging
+import re
+import json
+from typing import Any, Dict, List
+from utils.rate_limiter import estimate_tokens
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+# Tokenizer encoding used for counting; cl100k_base is what GPT-4 uses
+TOKENIZER_ENCODING = os.getenv('PROMPT_TOKENIZER_ENCODING', 'cl100k_base')
+
+# Resume sections in the order they earn a place in the prompt; anything
+# else follows, and the raw upload text comes last
+SECTION_PRIORITY = ['skills', 'experience', 'summary', 'education']
+RAW_TEXT_KEY = 'text'
+# Upload bookkeeping that travels with a summary but says nothing about the candidate
+METADATA_KEYS = {'file_name', 'content_type', 's3_key', 'profile_id'}
+
+_encoding = None
+_encoding_loaded = False
+
+def _get_encoding():
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        _encoding_loaded = True
+        if tiktoken is not None:
+            try:
+                _encoding = tiktoken.get_encoding(TOKENIZER_ENCODING)
+            except Exception as e:
+                # The encoding file is fetched on first use; estimate when offline
+                logger.warning("Tokenizer unavailable, estimating token counts: %s", e)
+    return _encoding
+
+def count_tokens(text: str) -> int:
+    """Count tokens with the local tokenizer, or estimate them when it is unavailable."""
+    encoding = _get_encoding()
+    if encoding is None:
+        return estimate_tokens(text)
+    return len(encoding.encode(text))
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut text down to at most max_tokens tokens."""
+    if max_tokens <= 0:
+        return ""
+    encoding = _get_encoding()
+    if encoding is None:
+        return text[:max(max_tokens - 1, 0) * 4]
+    tokens = encoding.encode(text)
+    return text if len(tokens) <= max_tokens else encoding.decode(tokens[:max_tokens])
+
+def compact_json(value: Any) -> str:
+    """JSON without indentation or padding whitespace."""
+    return json.dumps(value, separators=(',', ':'), ensure_ascii=False)
+
+def _compact_value(value: Any) -> Any:
+    # Collapse whitespace runs and drop empty values
+    if isinstance(value, str):
+        return re.sub(r'\s+', ' ', value).strip()
+    if isinstance(value, list):
+        items = [_compact_value(item) for item in value]
+        return [item for item in items if item not in ('', [], {}, None)]
+    if isinstance(value, dict):
+        items = {key: _compact_value(item) for key, item in value.items()}
+        return {key: item for key, item in items.items() if item not in ('', [], {}, None)}
+    return value
+
+def _section_order(keys: List[str]) -> List[str]:
+    def rank(key: str):
+        if key in SECTION_PRIORITY:
+            return SECTION_PRIORITY.index(key)
+        return len(SECTION_PRIORITY) + (1 if key == RAW_TEXT_KEY else 0)
+    return sorted(keys, key=rank)
+
+def fit_resume_summary(resume_summary: Dict[str, Any], max_tokens: int) -> Dict[str, Any]:
+    """
+    Trim a resume summary to fit max_tokens of compact JSON. Upload metadata
+    (file name, content type, S3 key) is dropped first. Sections are
+    added by priority until one doesn't fit; that one is trimmed (lists keep
+    their leading, most recent items; text is truncated) and the rest dropped.
+    """
+    summary = _compact_value({
+        key: value for key, value in (resume_summary or {}).items() if key not in METADATA_KEYS
+    })
+    fitted: Dict[str, Any] = {}
+    remaining = max_tokens - 2  # the enclosing braces
+    for key in _section_order(list(summary)):
+        value = summary[key]
+        cost = count_tokens(compact_json({key: value}))
+        if cost <= remaining:
+            fitted[key] = value
+            remaining -= cost
+            continue
+
+        key_cost = count_tokens(compact_json({key: []}))
+        if isinstance(value, list):
+            items = []
+            budget = remaining - key_cost
+            for item in value:
+                item_cost = count_tokens(compact_json(item)) + 1
+                if item_cost > budget:
+                    break
+                items.append(item)
+                budget -= item_cost
+            if items:
+                fitted[key] = items
+        elif isinstance(value, str):
+            truncated = truncate_to_tokens(value, remaining - key_cost)
+            if truncated:
+                fitted[key] = truncated
+        # Lower-priority sections only get in when everything above fits whole
+        break
+    return fitted
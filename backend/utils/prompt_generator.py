@@ -1,87 +1,219 @@
 import os
-import json
-from typing import Dict, List, Optional
-from openai import AsyncOpenAI
+import logging
+import asyncio
+from functools import lru_cache
+from typing import Awaitable, Callable, Dict, List, Optional, Type
+from pydantic import BaseModel
 from dotenv import load_dotenv
+from utils.job_stream_parser import JobListing, JobStreamParser, parse_job_response, validate_job
+from openai import APIConnectionError, InternalServerError, RateLimitError
+from utils.openai_clients import get_async_client
+from utils.rate_limiter import RateLimitExceeded, acquire
+from utils.prompt_budget import compact_json, count_tokens, fit_resume_summary
+from utils import model_router, telemetry
+
+logger = logging.getLogger(__name__)
 
 load_dotenv()
 
+# Stream completions and hand out jobs as they are parsed (when a callback is given)
+STREAM_JOBS = os.getenv('OPENAI_STREAM_JOBS', 'true').lower() == 'true'
+
+# Retries after a 429 once the shared limiter has backed off
+RATE_LIMIT_RETRIES = int(os.getenv('OPENAI_RATE_LIMIT_RETRIES', '3'))
+
+# Failures a later attempt of the task may not hit (APITimeoutError is an APIConnectionError)
+TRANSIENT_ERRORS = (APIConnectionError, InternalServerError, RateLimitError, asyncio.TimeoutError)
+
+# Static instructions go first and never change, so every call shares the
+# same prompt prefix; only the user message varies
+DEEP_SEARCH_SYSTEM_PROMPT = """You are a job search assistant helping find relevant job opportunities.
+Based on the user's resume summary and job preferences, find relevant job opportunities.
+Respond with JSON in exactly this format:
+{"jobs":[{"title":"Job Title","company":"Company Name","location":"Job Location","description":"Brief job description","apply_link":"URL to apply","match_score":"Score between 0-100 indicating match with resume"}],"followup_questions":["Question 1 to refine search?","Question 2 to refine search?"]}"""
+
+FOLLOWUP_SYSTEM_PROMPT = """You are a job search assistant. Given a candidate's resume summary, their job preferences and the jobs found for them, suggest up to three short questions whose answers would refine the search.
+Respond with JSON in exactly this format:
+{"followup_questions":["Question 1 to refine search?","Question 2 to refine search?"]}"""
+
+# Input token budget for the whole request (system prompt included)
+PROMPT_INPUT_TOKEN_BUDGET = int(os.getenv('PROMPT_INPUT_TOKEN_BUDGET', '3000'))
+
+@lru_cache(maxsize=8)
+def system_prompt_tokens(system_prompt: str = DEEP_SEARCH_SYSTEM_PROMPT) -> int:
+    """Token count of a static system prompt, computed once."""
+    return count_tokens(system_prompt)
+
 def create_deep_search_prompt(resume_summary: Dict, preferences: Dict) -> str:
-    """Create a prompt for the deep job search based on resume and preferences."""
-    prompt = f"""
-    Based on the following resume summary and job preferences, find relevant job opportunities:
-
-    Resume Summary:
-    {json.dumps(resume_summary, indent=2)}
-
-    Job Preferences:
-    - Location: {preferences.get('location', 'Any')}
-    - Company Size: {preferences.get('company_size', 'Any')}
-    - Role Type: {preferences.get('role_type', 'Any')}
-    - Additional Info: {preferences.get('additional_info', 'None')}
-
-    Please provide a list of job opportunities in the following JSON format:
-    {{
-        "jobs": [
-            {{
-                "title": "Job Title",
-                "company": "Company Name",
-                "location": "Job Location",
-                "description": "Brief job description",
-                "apply_link": "URL to apply",
-                "match_score": "Score between 0-100 indicating match with resume"
-            }}
-        ],
-        "followup_questions": [
-            "Question 1 to refine search?",
-            "Question 2 to refine search?"
-        ]
-    }}
     """
-    return prompt
+    Create the user prompt for the deep job search. The resume summary is
+    trimmed by section priority so the request fits PROMPT_INPUT_TOKEN_BUDGET.
+    """
+    preferences_block = compact_json({
+        "location": preferences.get('location') or 'Any',
+        "company_size": preferences.get('company_size') or 'Any',
+        "role_type": preferences.get('role_type') or 'Any',
+        "additional_info": preferences.get('additional_info') or 'None'
+    })
+    fixed_tokens = count_tokens("Resume Summary:\n\nJob Preferences:\n" + preferences_block)
+    budget = PROMPT_INPUT_TOKEN_BUDGET - system_prompt_tokens() - fixed_tokens
+    summary = fit_resume_summary(resume_summary, max(budget, 0))
+    return f"Resume Summary:\n{compact_json(summary)}\nJob Preferences:\n{preferences_block}"
+
+async def call_openai_for_jobs(
+    prompt: str,
+    on_job: Optional[Callable[[Dict], None]] = None,
+    priority: str = 'interactive',
+    system_prompt: str = DEEP_SEARCH_SYSTEM_PROMPT,
+    call_type: str = 'search',
+    schema: Type[BaseModel] = JobListing,
+    check: Optional[Callable[[Dict], Optional[str]]] = None
+) -> Dict:
+    """
+    Call OpenAI API to get job recommendations. When `on_job` is given and
+    streaming is enabled, it is called with each job as soon as it is parsed.
+    Calls wait on the shared rate budget; `priority` decides who waits longest.
+    `system_prompt`, `call_type` and the job `schema` let other job prompts
+    (e.g. re-ranking) reuse the call. The call type's route picks the model:
+    a cascade escalates to the next tier when `check` (default
+    model_router.check_jobs) rejects a result.
+    """
+    held_back: List[Dict] = []
+
+    def attempt(params: Dict, final: bool) -> Awaitable[Dict]:
+        # The last tier streams straight through; jobs from earlier tiers are
+        # held back until their result is accepted
+        held_back.clear()
+        if on_job is None or final:
+            return _complete_jobs(prompt, on_job, priority, system_prompt, params, schema)
+        return _complete_jobs(prompt, held_back.append, priority, system_prompt, params, schema)
 
-async def call_openai_for_jobs(prompt: str) -> Dict:
-    """Call OpenAI API to get job recommendations."""
+    result = await model_router.cascade(call_type, attempt, check or model_router.check_jobs)
+    for job in held_back:
+        on_job(job)
+    return result
+
+async def _complete_jobs(
+    prompt: str,
+    on_job: Optional[Callable[[Dict], None]],
+    priority: str,
+    system_prompt: str,
+    params: Dict,
+    schema: Type[BaseModel]
+) -> Dict:
+    # One completion with one model; truncated or fenced output is salvaged
     try:
         # Initialize OpenAI client
         api_key = os.getenv('OPENAI_API_KEY')
         if not api_key:
-            print("Error: OPENAI_API_KEY environment variable is not set")
             raise ValueError("OPENAI_API_KEY environment variable is not set")
         
-        print(f"Using API key: {api_key[:6]}...")
-        client = AsyncOpenAI(api_key=api_key)
+        client = get_async_client()
+        streaming = on_job is not None and STREAM_JOBS
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": prompt}
+        ]
+        prompt_tokens = system_prompt_tokens(system_prompt) + count_tokens(prompt)
+        token_cost = prompt_tokens + params["max_tokens"]
+        
+        with telemetry.llm_call(params["model"], prompt_tokens, stream=streaming):
+            for attempt in range(RATE_LIMIT_RETRIES + 1):
+                await acquire(params["model"], token_cost, priority)
+                try:
+                    logger.debug("Making OpenAI API call (model=%s, stream=%s)", params["model"], streaming)
+                    response = await client.chat.completions.create(
+                        messages=messages,
+                        stream=streaming,
+                        **params
+                    )
+                    break
+                except RateLimitError:
+                    # The 429 has already paused the shared limiter; wait our turn again
+                    if attempt == RATE_LIMIT_RETRIES:
+                        raise
+                    logger.warning("OpenAI rate limited, retrying (%d/%d)", attempt + 1, RATE_LIMIT_RETRIES)
+                    await asyncio.sleep(2 ** attempt)
         
-        async with client:
-            print("Making OpenAI API call...")
-            response = await client.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": "You are a job search assistant helping find relevant job opportunities."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7,
-                max_tokens=2000
-            )
-            print("OpenAI API call successful")
+            if streaming:
+                parser = JobStreamParser()
+                async for chunk in response:
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if not delta:
+                        continue
+                    for job in parser.feed(delta):
+                        job = validate_job(job, schema)
+                        if job is not None:
+                            on_job(job)
+                content = parser.text
+            else:
+                content = response.choices[0].message.content
+            completion_tokens = count_tokens(content)
+            telemetry.llm_output(params["model"], completion_tokens)
+            model_router.record_usage(params["model"], prompt_tokens, completion_tokens)
+        logger.info("OpenAI API call successful")
         
         # Parse the response
-        content = response.choices[0].message.content
-        print(f"OpenAI response: {content[:200]}...")
-        try:
-            return json.loads(content)
-        except json.JSONDecodeError as e:
-            print(f"Failed to parse OpenAI response: {str(e)}")
-            return {
-                "jobs": [],
-                "followup_questions": ["Could you provide more specific job requirements?"],
-                "error": "Failed to parse OpenAI response"
-            }
+        logger.debug("OpenAI response: %s...", content[:200])
+        result = parse_job_response(content, schema)
+        # A salvaged result keeps "partial" so it isn't cached as a full answer
+        if result.get('partial'):
+            logger.warning("OpenAI response was incomplete, salvaged %d jobs", len(result['jobs']))
+            if not result['jobs']:
+                return {
+                    "jobs": [],
+                    "followup_questions": ["Could you provide more specific job requirements?"],
+                    "error": "Failed to parse OpenAI response"
+                }
+            if not result['followup_questions']:
+                result['followup_questions'] = ["Could you provide more specific job requirements?"]
+        return result
             
+    except RateLimitExceeded:
+        # Shed by the limiter: let the task fail (and retry) rather than report zero jobs
+        raise
     except Exception as e:
-        print(f"OpenAI API error: {str(e)}")
+        logger.error("OpenAI API error: %s", e)
         return {
             "jobs": [],
             "followup_questions": ["Could you provide more specific job requirements?"],
-            "error": f"OpenAI API error: {str(e)}"
+            "error": f"OpenAI API error: {str(e)}",
+            # Timeouts, dropped connections, 5xx and exhausted 429 retries may succeed later
+            "retryable": isinstance(e, TRANSIENT_ERRORS)
         }
+
+def _check_followups(result: Dict) -> Optional[str]:
+    if result.get('error'):
+        return 'error'
+    return None if result.get('followup_questions') else 'no_questions'
+
+async def generate_followup_questions(
+    resume_summary: Dict,
+    preferences: Dict,
+    jobs: List[Dict],
+    priority: str = 'interactive'
+) -> List[str]:
+    """
+    Ask the follow-up route's model (the fast tier by default) for questions
+    that refine a search whose response came without any. Returns [] on failure.
+    """
+    found = [{"title": job.get('title'), "company": job.get('company')} for job in jobs[:10]]
+    prompt = (
+        f"Resume Summary:\n{compact_json(fit_resume_summary(resume_summary, 500))}\n"
+        f"Job Preferences:\n{compact_json(preferences)}\n"
+        f"Jobs Found:\n{compact_json(found)}"
+    )
+    try:
+        result = await call_openai_for_jobs(
+            prompt,
+            priority=priority,
+            system_prompt=FOLLOWUP_SYSTEM_PROMPT,
+            call_type='followup',
+            check=_check_followups
+        )
+    except RateLimitExceeded as e:
+        logger.warning("Skipping follow-up questions: %s", e)
+        return []
+    return [] if result.get('error') else result.get('followup_questions', [])
@@ -0,0 +1,190 @@
+import os
+import logging
+import re
+import json
+import time
+import asyncio
+from typing import Dict, Optional
+import redis
+
+logger = logging.getLogger(__name__)
+
+# Account limits per model (requests and tokens per minute)
+DEFAULT_RPM = int(os.getenv('OPENAI_RPM_LIMIT', '500'))
+DEFAULT_TPM = int(os.getenv('OPENAI_TPM_LIMIT', '40000'))
+
+# Lower priorities must leave this fraction of each bucket for interactive work,
+# and give up (shed) sooner when the budget is exhausted
+PRIORITY_RESERVE = {
+    'interactive': 0.0,
+    'bulk': float(os.getenv('OPENAI_BULK_RESERVE', '0.2')),
+}
+PRIORITY_MAX_WAIT = {
+    'interactive': float(os.getenv('OPENAI_MAX_WAIT_INTERACTIVE', '120')),
+    'bulk': float(os.getenv('OPENAI_MAX_WAIT_BULK', '60')),
+}
+
+# Back off when the API reports fewer than this many requests/tokens left
+LOW_WATERMARK_REQUESTS = int(os.getenv('OPENAI_LOW_WATERMARK_REQUESTS', '2'))
+LOW_WATERMARK_TOKENS = int(os.getenv('OPENAI_LOW_WATERMARK_TOKENS', '2000'))
+
+KEY_PREFIX = 'openai_rl:'
+
+class RateLimitExceeded(Exception):
+    """Raised when a call would have to wait longer than its priority allows."""
+
+# Refill both buckets from Redis' clock, then take one request and `cost`
+# tokens if enough is left above the priority's reserve. Returns "0" on
+# success, otherwise the number of seconds to wait before trying again.
+_ACQUIRE_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local pause = tonumber(redis.call('GET', KEYS[3]) or '0')
+if pause > now then
+    return tostring(pause - now)
+end
+
+local rpm = tonumber(ARGV[1])
+local tpm = tonumber(ARGV[2])
+local cost = math.min(tonumber(ARGV[3]), tpm)
+local reserve = tonumber(ARGV[4])
+
+local function refill(key, capacity)
+    local state = redis.call('HMGET', key, 'level', 'ts')
+    local level = tonumber(state[1]) or capacity
+    local ts = tonumber(state[2]) or now
+    return math.min(capacity, level + (now - ts) * capacity / 60)
+end
+
+local requests = refill(KEYS[1], rpm)
+local tokens = refill(KEYS[2], tpm)
+local need_requests = 1 + reserve * rpm
+local need_tokens = math.min(cost + reserve * tpm, tpm)
+
+if requests >= need_requests and tokens >= need_tokens then
+    redis.call('HSET', KEYS[1], 'level', requests - 1, 'ts', now)
+    redis.call('HSET', KEYS[2], 'level', tokens - cost, 'ts', now)
+    redis.call('EXPIRE', KEYS[1], 120)
+    redis.call('EXPIRE', KEYS[2], 120)
+    return '0'
+end
+
+local wait = math.max((need_requests - requests) * 60 / rpm, (need_tokens - tokens) * 60 / tpm)
+return tostring(wait)
+"""
+
+# Lower a bucket to what the API says is actually left
+_SYNC_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local remaining = tonumber(ARGV[1])
+local level = tonumber(redis.call('HGET', KEYS[1], 'level'))
+if level == nil or remaining < level then
+    redis.call('HSET', KEYS[1], 'level', remaining, 'ts', now)
+    redis.call('EXPIRE', KEYS[1], 120)
+end
+return 1
+"""
+
+_client: Optional[redis.Redis] = None
+_scripts: Dict[str, object] = {}
+
+def _redis() -> redis.Redis:
+    global _client
+    if _client is None:
+        _client = redis.Redis.from_url(os.getenv('CELERY_BROKER_URL', 'redis://redis:6379/0'))
+        _scripts['acquire'] = _client.register_script(_ACQUIRE_SCRIPT)
+        _scripts['sync'] = _client.register_script(_SYNC_SCRIPT)
+    return _client
+
+def _keys(model: str):
+    return (
+        f"{KEY_PREFIX}{model}:requests",
+        f"{KEY_PREFIX}{model}:tokens",
+        f"{KEY_PREFIX}{model}:pause_until",
+    )
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for budgeting (~4 characters per token)."""
+    return len(text) // 4 + 1
+
+def _try_acquire(model: str, tokens: int, priority: str) -> float:
+    try:
+        _redis()
+        wait = _scripts['acquire'](
+            keys=_keys(model),
+            args=[DEFAULT_RPM, DEFAULT_TPM, tokens, PRIORITY_RESERVE.get(priority, 0.0)]
+        )
+        return float(wait)
+    except redis.RedisError as e:
+        # Fail open: without Redis every worker falls back to OpenAI's own limits
+        logger.warning("Rate limiter unavailable: %s", e)
+        return 0.0
+
+async def acquire(model: str, tokens: int, priority: str = 'interactive') -> None:
+    """
+    Wait until the shared budget has room for one request of `tokens` tokens.
+    Raises RateLimitExceeded (shedding the call) once the wait would exceed
+    the priority's maximum.
+    """
+    deadline = time.monotonic() + PRIORITY_MAX_WAIT.get(priority, PRIORITY_MAX_WAIT['interactive'])
+    while True:
+        # redis-py blocks; the worker loop is shared by every in-flight LLM call
+        wait = await asyncio.to_thread(_try_acquire, model, tokens, priority)
+        if wait <= 0:
+            return
+        if time.monotonic() + wait > deadline:
+            raise RateLimitExceeded(f"OpenAI {model} budget exhausted for {priority} work")
+        await asyncio.sleep(wait)
+
+def parse_duration(value: Optional[str]) -> float:
+    """Parse OpenAI reset/retry durations such as "1s", "6m0s", "20ms" or "2"."""
+    if not value:
+        return 0.0
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    units = {'h': 3600, 'm': 60, 's': 1, 'ms': 0.001}
+    return sum(float(amount) * units[unit] for amount, unit in re.findall(r'(\d+(?:\.\d+)?)(ms|h|m|s)', value))
+
+def observe_response(model: str, status_code: int, headers) -> None:
+    """
+    Adapt the shared budget to OpenAI's rate-limit headers: sync bucket
+    levels down to the reported remaining values, and pause every worker
+    on a 429 or when the remaining budget is nearly gone.
+    """
+    requests_key, tokens_key, pause_key = _keys(model)
+    client = _redis()
+
+    pause = 0.0
+    if status_code == 429:
+        pause = parse_duration(headers.get('retry-after')) or \
+            parse_duration(headers.get('x-ratelimit-reset-requests')) or 1.0
+
+    remaining_requests = headers.get('x-ratelimit-remaining-requests')
+    if remaining_requests is not None:
+        _scripts['sync'](keys=[requests_key], args=[int(remaining_requests)])
+        if int(remaining_requests) < LOW_WATERMARK_REQUESTS:
+            pause = max(pause, parse_duration(headers.get('x-ratelimit-reset-requests')))
+
+    remaining_tokens = headers.get('x-ratelimit-remaining-tokens')
+    if remaining_tokens is not None:
+        _scripts['sync'](keys=[tokens_key], args=[int(remaining_tokens)])
+        if int(remaining_tokens) < LOW_WATERMARK_TOKENS:
+            pause = max(pause, parse_duration(headers.get('x-ratelimit-reset-tokens')))
+
+    if pause > 0:
+        seconds, micros = client.time()
+        until = seconds + micros / 1000000 + pause
+        client.set(pause_key, until, ex=max(int(pause) + 1, 1))
+        logger.info("OpenAI rate limit backoff for %s: pausing %.2fs", model, pause)
+
+def observe_httpx_response(response) -> None:
+    """httpx response hook: feed every OpenAI response into observe_response."""
+    try:
+        model = json.loads(response.request.content or b'{}').get('model')
+        if model:
+            observe_response(model, response.status_code, response.headers)
+    except Exception as e:
+        logger.warning("Rate limiter header update failed: %s", e)
@@ -0,0 +1,106 @@
+import os
+import json
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+import msgpack
+import zstandard
+from kombu.serialization import register
+from config.aws_config import s3_client, BUCKET_NAME
+
+# Celery's Redis backend ignores result_compression, so compression is built
+# into the result serializer itself
+SERIALIZER_NAME = 'msgpack-zstd'
+SERIALIZER_CONTENT_TYPE = 'application/x-msgpack-zstd'
+
+# Results larger than this move to the side store; the backend keeps a reference.
+# The API reads what workers write, so "disk" needs STORE_DIR on a volume both mount
+STORE_BACKEND = os.getenv('RESULT_STORE_BACKEND', 'none')  # disk, s3 or none
+INLINE_MAX_BYTES = int(os.getenv('RESULT_INLINE_MAX_BYTES', '16384'))
+STORE_DIR = Path(os.getenv('RESULT_STORE_DIR', '/tmp/deep_job_search_results'))
+S3_PREFIX = os.getenv('RESULT_STORE_S3_PREFIX', 'results/')
+RESULT_TTL = int(os.getenv('RESULT_EXPIRES', str(24 * 3600)))
+
+# Progress meta caps: only a preview of the jobs found so far goes into Redis
+PROGRESS_MAX_JOBS = int(os.getenv('PROGRESS_MAX_JOBS', '20'))
+PROGRESS_MAX_DESCRIPTION_CHARS = int(os.getenv('PROGRESS_MAX_DESCRIPTION_CHARS', '300'))
+
+PURGE_INTERVAL = 3600
+_last_purge = 0.0
+
+def _dumps(value: Any) -> bytes:
+    return zstandard.ZstdCompressor().compress(msgpack.packb(value, use_bin_type=True))
+
+def _loads(payload: bytes) -> Any:
+    return msgpack.unpackb(zstandard.ZstdDecompressor().decompress(payload), raw=False)
+
+register(SERIALIZER_NAME, _dumps, _loads, content_type=SERIALIZER_CONTENT_TYPE, content_encoding='binary')
+
+def compact_progress_meta(meta: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Cap the number of jobs and the description length in PROGRESS meta."""
+    if not meta or not meta.get('current_jobs'):
+        return meta
+    jobs = meta['current_jobs']
+    preview = []
+    for job in jobs[:PROGRESS_MAX_JOBS]:
+        description = job.get('description')
+        if isinstance(description, str) and len(description) > PROGRESS_MAX_DESCRIPTION_CHARS:
+            job = {**job, 'description': description[:PROGRESS_MAX_DESCRIPTION_CHARS].rstrip() + '...'}
+        preview.append(job)
+    return {**meta, 'current_jobs': preview, 'total_jobs': len(jobs)}
+
+def _disk_path(task_id: str) -> Path:
+    return STORE_DIR / f"{task_id}.json.zst"
+
+def _purge_expired_files() -> None:
+    global _last_purge
+    now = time.time()
+    if now - _last_purge < PURGE_INTERVAL or not STORE_DIR.exists():
+        return
+    _last_purge = now
+    for path in STORE_DIR.glob('*.json.zst'):
+        try:
+            if now - path.stat().st_mtime > RESULT_TTL:
+                path.unlink()
+        except OSError:
+            pass
+
+def store_result(task_id: str, result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Return what the result backend should hold for a task result: the result
+    itself when small, otherwise a reference to a compressed copy in the side
+    store plus the small fields clients need straight away.
+    """
+    payload = json.dumps(result, separators=(',', ':')).encode('utf-8')
+    if STORE_BACKEND == 'none' or len(payload) <= INLINE_MAX_BYTES:
+        return result
+
+    compressed = zstandard.ZstdCompressor().compress(payload)
+    if STORE_BACKEND == 's3':
+        key = f"{S3_PREFIX}{task_id}.json.zst"
+        s3_client.put_object(Bucket=BUCKET_NAME, Key=key, Body=compressed, ContentEncoding='zstd')
+    else:
+        STORE_DIR.mkdir(parents=True, exist_ok=True)
+        path = _disk_path(task_id)
+        tmp_path = path.with_suffix('.tmp')
+        tmp_path.write_bytes(compressed)
+        tmp_path.replace(path)
+        key = str(path)
+        _purge_expired_files()
+
+    return {
+        'result_ref': {'backend': STORE_BACKEND, 'key': key},
+        'job_count': len(result.get('jobs', [])),
+        'followup_questions': result.get('followup_questions', [])
+    }
+
+def load_result(value: Any) -> Any:
+    """Resolve a stored result reference back into the full result."""
+    if not isinstance(value, dict) or 'result_ref' not in value:
+        return value
+    ref = value['result_ref']
+    if ref['backend'] == 's3':
+        compressed = s3_client.get_object(Bucket=BUCKET_NAME, Key=ref['key'])['Body'].read()
+    else:
+        compressed = Path(ref['key']).read_bytes()
+    return json.loads(zstandard.ZstdDecompressor().decompress(compressed))
@@ -0,0 +1,79 @@
+import os
+import logging
+from collections import OrderedDict
+from threading import Lock
+from typing import Optional
+from celery_app import celery_app
+from utils import telemetry
+
+logger = logging.getLogger(__name__)
+
+# In-process LRU tier
+MAX_ENTRIES = int(os.getenv('RESUME_CACHE_MAX_ENTRIES', '256'))
+
+# Optional Redis tier (shares the Celery broker connection pool)
+USE_REDIS = os.getenv('RESUME_CACHE_USE_REDIS', 'false').lower() == 'true'
+REDIS_TTL = int(os.getenv('RESUME_CACHE_TTL', str(7 * 24 * 3600)))
+KEY_PREFIX = 'resume_text:'
+
+_lru: "OrderedDict[str, str]" = OrderedDict()
+_lock = Lock()
+
+def _lru_get(key: str) -> Optional[str]:
+    with _lock:
+        text = _lru.get(key)
+        if text is not None:
+            _lru.move_to_end(key)
+        return text
+
+def _lru_set(key: str, text: str) -> None:
+    with _lock:
+        _lru[key] = text
+        _lru.move_to_end(key)
+        while len(_lru) > MAX_ENTRIES:
+            _lru.popitem(last=False)
+
+def _redis_get(key: str) -> Optional[str]:
+    try:
+        with celery_app.pool.acquire(block=True) as conn:
+            value = conn.default_channel.client.get(KEY_PREFIX + key)
+        if value is None:
+            return None
+        return value.decode('utf-8') if isinstance(value, bytes) else value
+    except Exception as e:
+        logger.warning("Resume cache Redis lookup failed: %s", e)
+        return None
+
+def _redis_set(key: str, text: str) -> None:
+    try:
+        with celery_app.pool.acquire(block=True) as conn:
+            conn.default_channel.client.set(KEY_PREFIX + key, text, ex=REDIS_TTL)
+    except Exception as e:
+        logger.warning("Resume cache Redis store failed: %s", e)
+
+def get_cached_text(key: str) -> Optional[str]:
+    """
+    Look up extracted resume text by content hash, checking the in-process
+    LRU first and then Redis (if enabled). Redis hits are promoted to the LRU.
+    """
+    text = _lru_get(key)
+    if text is not None or not USE_REDIS:
+        telemetry.CACHE_LOOKUPS.labels('resume_text', 'miss' if text is None else 'lru_hit').inc()
+        return text
+
+    text = _redis_get(key)
+    if text is not None:
+        _lru_set(key, text)
+    telemetry.CACHE_LOOKUPS.labels('resume_text', 'miss' if text is None else 'redis_hit').inc()
+    return text
+
+def set_cached_text(key: str, text: str) -> None:
+    """Store extracted resume text in every enabled cache tier."""
+    _lru_set(key, text)
+    if USE_REDIS:
+        _redis_set(key, text)
+
+def clear_cache() -> None:
+    """Drop all entries from the in-process tier."""
+    with _lock:
+        _lru.clear()
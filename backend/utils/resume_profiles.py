@@ -0,0 +1,62 @@
+import os
+import json
+from typing import Any, Dict, Optional
+from celery_app import celery_app
+
+# Structured resume profiles, keyed by the upload's content hash, so a resume
+# is summarized once and every later search refers to it by id
+PROFILE_TTL = int(os.getenv('RESUME_PROFILE_TTL', str(30 * 24 * 3600)))
+# A pending profile whose task was lost expires so the next upload retries it
+PENDING_TTL = int(os.getenv('RESUME_PROFILE_PENDING_TTL', '3600'))
+KEY_PREFIX = 'resume_profile:'
+
+PENDING = 'pending'
+READY = 'ready'
+FAILED = 'failed'
+
+def _key(profile_id: str) -> str:
+    return KEY_PREFIX + profile_id
+
+def get_profile(profile_id: str) -> Optional[Dict[str, Any]]:
+    """Return the stored profile record, or None if there is none."""
+    with celery_app.pool.acquire(block=True) as conn:
+        value = conn.default_channel.client.get(_key(profile_id))
+    return json.loads(value) if value is not None else None
+
+def save_profile(profile_id: str, record: Dict[str, Any]) -> None:
+    """Store a profile record; pending records get the short TTL."""
+    ttl = PENDING_TTL if record['status'] == PENDING else PROFILE_TTL
+    with celery_app.pool.acquire(block=True) as conn:
+        conn.default_channel.client.set(_key(profile_id), json.dumps(record), ex=ttl)
+
+def create_profile(profile_id: str, text: str, file_name: str) -> bool:
+    """
+    Store a pending profile for freshly extracted resume text. Returns True
+    when the caller should start summarization, False when a profile is
+    already ready or being built.
+    """
+    record = {'status': PENDING, 'text': text, 'file_name': file_name, 'summary': None}
+    with celery_app.pool.acquire(block=True) as conn:
+        created = conn.default_channel.client.set(
+            _key(profile_id), json.dumps(record), ex=PENDING_TTL, nx=True
+        )
+    if created:
+        return True
+
+    existing = get_profile(profile_id)
+    if existing is None or existing['status'] == FAILED:
+        save_profile(profile_id, record)
+        return True
+    return False
+
+def resolve_resume_summary(profile_id: str) -> Dict[str, Any]:
+    """
+    The resume summary a search should use: the structured profile once it
+    is ready, the raw extracted text until then.
+    """
+    record = get_profile(profile_id)
+    if record is None:
+        raise Exception(f"Error loading resume profile: {profile_id} not found")
+    if record['status'] == READY:
+        return record['summary']
+    return {'text': record['text']}
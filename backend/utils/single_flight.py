@@ -0,0 +1,62 @@
+import os
+import logging
+import json
+import hashlib
+from typing import Any, Dict, Optional
+from celery_app import celery_app, SOFT_TIME_LIMITS, TIME_LIMIT_GRACE, RESEARCH_QUEUE
+
+logger = logging.getLogger(__name__)
+
+# Identical deep searches submitted while one is in flight share its task
+ENABLED = os.getenv('DEEP_SEARCH_DEDUPE_ENABLED', 'true').lower() == 'true'
+# The lease outlives the longest possible run, so a crashed worker can't pin a key forever
+LEASE_SECONDS = int(os.getenv(
+    'DEEP_SEARCH_DEDUPE_LEASE',
+    str(SOFT_TIME_LIMITS[RESEARCH_QUEUE] + TIME_LIMIT_GRACE)
+))
+KEY_PREFIX = 'single_flight:deep_search:'
+
+# Delete the lease only if it still belongs to this task
+_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+def request_key(resume_summary: Optional[Dict[str, Any]], profile_id: Optional[str], preferences: Dict[str, Any]) -> str:
+    """Canonical hash of what a deep search depends on."""
+    canonical = json.dumps(
+        {'resume_summary': resume_summary, 'profile_id': profile_id, 'preferences': preferences},
+        sort_keys=True,
+        separators=(',', ':')
+    )
+    return KEY_PREFIX + hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+def claim(key: str, task_id: str) -> Optional[str]:
+    """
+    Try to become the in-flight task for `key`. Returns None when this task
+    holds the lease (enqueue it), otherwise the task id already holding it.
+    """
+    with celery_app.pool.acquire(block=True) as conn:
+        client = conn.default_channel.client
+        if client.set(key, task_id, nx=True, ex=LEASE_SECONDS):
+            return None
+        existing = client.get(key)
+    if existing is None:
+        # Released between SET and GET; try once more
+        return claim(key, task_id)
+    return existing.decode('utf-8') if isinstance(existing, bytes) else existing
+
+def replace(key: str, task_id: str) -> None:
+    """Take over the lease from a task that has already failed."""
+    with celery_app.pool.acquire(block=True) as conn:
+        conn.default_channel.client.set(key, task_id, ex=LEASE_SECONDS)
+
+def release(key: str, task_id: str) -> None:
+    """Drop the lease when the task finishes, unless another task holds it by now."""
+    try:
+        with celery_app.pool.acquire(block=True) as conn:
+            conn.default_channel.client.eval(_RELEASE_SCRIPT, 1, key, task_id)
+    except Exception as e:
+        logger.warning("Single-flight release failed: %s", e)
@@ -1,12 +1,13 @@
-import os
-from openai import OpenAI
 import json
-
-client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+from utils.openai_clients import get_async_client
+from utils.rate_limiter import RateLimitExceeded, acquire
+from utils.prompt_budget import count_tokens
+from utils import model_router, telemetry
 
 async def summarize_resume(text: str) -> dict:
     """
-    Use OpenAI to summarize resume text into structured data
+    Use OpenAI to summarize resume text into structured data. Await it from
+    the worker loop (run_in_worker_loop), where the async client lives.
     """
     try:
         prompt = f"""
@@ -36,18 +37,34 @@ async def summarize_resume(text: str) -> dict:
         }}
         """
         
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": "You are a professional resume analyzer."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.7
-        )
+        # Completion length is unbounded here, so budget roughly the prompt size again
+        prompt_tokens = count_tokens(prompt)
+
+        async def attempt(params: dict, final: bool) -> dict:
+            model = params["model"]
+            with telemetry.llm_call(model, prompt_tokens, call_type='summarize'):
+                await acquire(model, 2 * prompt_tokens, 'bulk')
+                response = await get_async_client().chat.completions.create(
+                    messages=[
+                        {"role": "system", "content": "You are a professional resume analyzer."},
+                        {"role": "user", "content": prompt}
+                    ],
+                    **params
+                )
+                content = response.choices[0].message.content
+                completion_tokens = count_tokens(content)
+                telemetry.llm_output(model, completion_tokens)
+                model_router.record_usage(model, prompt_tokens, completion_tokens)
+            
+            # Parse the response into JSON
+            return json.loads(content)
         
-        # Parse the response into JSON
-        summary = json.loads(response.choices[0].message.content)
+        # The fast tier extracts most resumes; unparseable or empty summaries escalate
+        summary = await model_router.cascade('summarize', attempt, model_router.check_summary)
         return summary
     
+    except RateLimitExceeded:
+        # Callers back off and retry shed work rather than failing it
+        raise
     except Exception as e:
         raise Exception(f"Error summarizing resume: {str(e)}")
@@ -0,0 +1,108 @@
+import os
+import json
+import asyncio
+import random
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from celery_app import celery_app
+
+# Per-task checkpoints, so a retried or redelivered task resumes where the
+# last attempt stopped instead of paying for its LLM calls again
+ENABLED = os.getenv('TASK_CHECKPOINTS_ENABLED', 'true').lower() == 'true'
+TTL = int(os.getenv('TASK_CHECKPOINT_TTL', str(6 * 3600)))
+KEY_PREFIX = 'checkpoint:'
+
+# Retry policy for transient failures: exponential backoff with jitter
+MAX_RETRIES = int(os.getenv('RESEARCH_MAX_RETRIES', '4'))
+RETRY_BACKOFF = float(os.getenv('RESEARCH_RETRY_BACKOFF', '5'))
+RETRY_BACKOFF_MAX = float(os.getenv('RESEARCH_RETRY_BACKOFF_MAX', '300'))
+# Redeliveries after worker loss don't count as retries; past this many
+# starts the task is treated as a poison message and fails for good
+MAX_DELIVERIES = int(os.getenv('RESEARCH_MAX_DELIVERIES', str(MAX_RETRIES + 3)))
+
+ATTEMPTS = 'attempts'
+
+class TransientSearchError(Exception):
+    """A search step failed in a way that is worth retrying (timeouts, 5xx, 429s)."""
+
+def _key(task_id: str) -> str:
+    return KEY_PREFIX + task_id
+
+def retry_countdown(retries: int) -> float:
+    """Seconds to wait before retry number `retries` + 1: full-jitter exponential backoff."""
+    return random.uniform(0, min(RETRY_BACKOFF * 2 ** retries, RETRY_BACKOFF_MAX))
+
+def load(task_id: str) -> Dict[str, Any]:
+    """Everything checkpointed for a task so far (empty for a fresh task)."""
+    if not ENABLED:
+        return {}
+    with celery_app.pool.acquire(block=True) as conn:
+        fields = conn.default_channel.client.hgetall(_key(task_id))
+    return {
+        (name.decode('utf-8') if isinstance(name, bytes) else name): json.loads(value)
+        for name, value in fields.items()
+    }
+
+def save(task_id: str, values: Dict[str, Any]) -> None:
+    """Checkpoint named values for a task in one round trip."""
+    if not ENABLED or not values:
+        return
+    with celery_app.pool.acquire(block=True) as conn:
+        pipe = conn.default_channel.client.pipeline()
+        pipe.hset(_key(task_id), mapping={name: json.dumps(value) for name, value in values.items()})
+        pipe.expire(_key(task_id), TTL)
+        pipe.execute()
+
+def load_step(task_id: str, name: str) -> Optional[Dict[str, Any]]:
+    """The checkpointed result of a completed step, or None."""
+    if not ENABLED:
+        return None
+    with celery_app.pool.acquire(block=True) as conn:
+        value = conn.default_channel.client.hget(_key(task_id), f"step:{name}")
+    return json.loads(value) if value is not None else None
+
+def start_attempt(task_id: str) -> int:
+    """Count one more start of this task (retries and redeliveries alike)."""
+    if not ENABLED:
+        return 1
+    with celery_app.pool.acquire(block=True) as conn:
+        pipe = conn.default_channel.client.pipeline()
+        pipe.hincrby(_key(task_id), ATTEMPTS, 1)
+        pipe.expire(_key(task_id), TTL)
+        attempts, _ = pipe.execute()
+    return attempts
+
+def clear(task_id: str) -> None:
+    """Drop a task's checkpoints once it has finished for good."""
+    if not ENABLED:
+        return
+    with celery_app.pool.acquire(block=True) as conn:
+        conn.default_channel.client.delete(_key(task_id))
+
+async def step(
+    task_id: str,
+    name: str,
+    call: Callable[[], Awaitable[Optional[Dict[str, Any]]]],
+    on_job: Optional[Callable[[Dict], None]] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Run an LLM step at most once per task. The step's name is its
+    idempotency key: if an earlier attempt completed it, its checkpointed
+    result is returned (and its jobs replayed through `on_job`) without
+    calling OpenAI. Only usable results (no error) are checkpointed. The
+    Redis round trips run in threads so they don't stall the worker loop.
+    """
+    saved = await asyncio.to_thread(load_step, task_id, name)
+    if saved is not None:
+        if on_job is not None:
+            for job in saved.get('jobs', []):
+                on_job(job)
+        return saved
+
+    result = await call()
+    if result is not None and not result.get('error'):
+        await asyncio.to_thread(save, task_id, {f"step:{name}": result})
+    return result
+
+def completed_steps(checkpoint: Dict[str, Any]) -> List[str]:
+    """Names of the steps a loaded checkpoint already holds results for."""
+    return [name[len('step:'):] for name in checkpoint if name.startswith('step:')]
@@ -0,0 +1,113 @@
+import os
+import logging
+import json
+import asyncio
+from typing import Any, Dict, Optional, Set
+import redis.asyncio as aioredis
+from celery_app import celery_app
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = 'task_events:'
+TERMINAL_STATES = ('SUCCESS', 'FAILURE', 'REVOKED')
+
+def publish_task_event(task_id: str, state: str, meta: Optional[Dict[str, Any]]) -> None:
+    """
+    Publish a task state change on the task's Redis pub/sub channel.
+    Called from workers alongside update_state; failures never break the task.
+    """
+    try:
+        message = json.dumps({'state': state, 'meta': meta}, default=str)
+        with celery_app.pool.acquire(block=True) as conn:
+            conn.default_channel.client.publish(CHANNEL_PREFIX + task_id, message)
+    except Exception as e:
+        logger.warning("Failed to publish task event for %s: %s", task_id, e)
+
+class TaskEventHub:
+    """
+    Fans task events out to local subscribers over a single pub/sub
+    connection per API process. Channels are subscribed while at least one
+    local listener is waiting on them.
+    """
+
+    def __init__(self, url: str):
+        self._url = url
+        self._redis = None
+        self._pubsub = None
+        self._reader: Optional[asyncio.Task] = None
+        self._listeners: Dict[str, Set[asyncio.Queue]] = {}
+        self._lock: Optional[asyncio.Lock] = None
+
+    def _get_lock(self) -> asyncio.Lock:
+        # Created lazily so it binds to the server's running loop
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    async def subscribe(self, task_id: str, queue: Optional[asyncio.Queue] = None) -> asyncio.Queue:
+        """
+        Register a listener for a task and return the queue its events arrive
+        on. Passing the same queue for several tasks merges their events;
+        each event carries its task_id.
+        """
+        queue = queue if queue is not None else asyncio.Queue()
+        async with self._get_lock():
+            if self._pubsub is None:
+                self._redis = aioredis.from_url(self._url)
+                self._pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+            listeners = self._listeners.setdefault(task_id, set())
+            if not listeners:
+                await self._pubsub.subscribe(CHANNEL_PREFIX + task_id)
+            listeners.add(queue)
+            if self._reader is None or self._reader.done():
+                self._reader = asyncio.create_task(self._read_loop())
+        return queue
+
+    async def unsubscribe(self, task_id: str, queue: asyncio.Queue) -> None:
+        """Remove a listener, dropping the channel when it was the last one."""
+        async with self._get_lock():
+            listeners = self._listeners.get(task_id)
+            if not listeners:
+                return
+            listeners.discard(queue)
+            if not listeners:
+                del self._listeners[task_id]
+                await self._pubsub.unsubscribe(CHANNEL_PREFIX + task_id)
+
+    async def _read_loop(self) -> None:
+        while self._listeners:
+            try:
+                message = await self._pubsub.get_message(timeout=1.0)
+            except Exception as e:
+                logger.warning("Task event subscription error: %s", e)
+                await asyncio.sleep(1)
+                continue
+            if not message or message.get('type') != 'message':
+                continue
+
+            channel = message['channel']
+            if isinstance(channel, bytes):
+                channel = channel.decode('utf-8')
+            task_id = channel[len(CHANNEL_PREFIX):]
+            try:
+                event = {**json.loads(message['data']), 'task_id': task_id}
+            except (TypeError, ValueError) as e:
+                # One bad message mustn't stop the reader every stream shares
+                logger.warning("Skipping malformed task event for %s: %s", task_id, e)
+                continue
+            for queue in list(self._listeners.get(task_id, ())):
+                queue.put_nowait(event)
+
+    async def close(self) -> None:
+        """Stop the reader and release the pub/sub connection."""
+        if self._reader is not None:
+            self._reader.cancel()
+            self._reader = None
+        if self._pubsub is not None:
+            await self._pubsub.close()
+            await self._redis.close()
+            self._pubsub = None
+            self._redis = None
+        self._listeners.clear()
+
+task_event_hub = TaskEventHub(os.getenv('CELERY_BROKER_URL', 'redis://redis:6379/0'))
@@ -0,0 +1,268 @@
+import os
+import re
+import json
+import time
+import random
+import secrets
+import logging
+import contextvars
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Tuple
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram,
+    generate_latest, multiprocess, start_http_server
+)
+
+# Structured logging: JSON lines carrying the current trace and span ids
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'json')
+# Fraction of traces whose INFO/DEBUG logs and spans are kept; warnings always are
+LOG_SAMPLE_RATE = float(os.getenv('LOG_SAMPLE_RATE', '1.0'))
+# Port for the worker's own /metrics server (0 disables it)
+WORKER_METRICS_PORT = int(os.getenv('WORKER_METRICS_PORT', '0'))
+# prometheus_client's multi-process mode (prefork children, several uvicorn workers)
+MULTIPROC_DIR = os.getenv('PROMETHEUS_MULTIPROC_DIR')
+
+METRICS_CONTENT_TYPE = CONTENT_TYPE_LATEST
+TRACEPARENT_HEADER = 'traceparent'
+ENQUEUED_AT_HEADER = 'enqueued_at'
+
+logger = logging.getLogger(__name__)
+
+# Metrics
+SPAN_SECONDS = Histogram(
+    'deep_job_search_span_seconds', 'Duration of traced operations', ['span']
+)
+PARSE_SECONDS = Histogram(
+    'deep_job_search_resume_parse_seconds', 'Resume text extraction time, including pool wait', ['mode']
+)
+QUEUE_WAIT_SECONDS = Histogram(
+    'deep_job_search_task_queue_wait_seconds', 'Time tasks spend in the broker before a worker starts them',
+    ['queue'], buckets=(0.01, 0.05, 0.1, 0.5, 1, 2, 5, 10, 30, 60, 120, 300, 600)
+)
+TASK_SECONDS = Histogram(
+    'deep_job_search_task_seconds', 'Celery task run time', ['task', 'state'],
+    buckets=(0.1, 0.5, 1, 2, 5, 10, 20, 30, 60, 120, 300, 600, 900)
+)
+LLM_SECONDS = Histogram(
+    'deep_job_search_llm_request_seconds', 'OpenAI call latency, including rate-limit waits and retries',
+    ['model', 'outcome'],
+    buckets=(0.25, 0.5, 1, 2, 5, 10, 20, 30, 45, 60, 90, 120)
+)
+LLM_TOKENS = Histogram(
+    'deep_job_search_llm_tokens', 'Tokens per OpenAI request', ['model', 'direction'],
+    buckets=(50, 100, 250, 500, 1000, 2000, 4000, 8000, 16000)
+)
+MODEL_TIER_SECONDS = Histogram(
+    'deep_job_search_model_tier_seconds', 'Latency of each routed model tier attempt',
+    ['call_type', 'tier', 'outcome'],
+    buckets=(0.25, 0.5, 1, 2, 5, 10, 20, 30, 45, 60, 90, 120)
+)
+MODEL_COST_USD = Counter(
+    'deep_job_search_model_cost_usd_total', 'Estimated OpenAI spend by call type and tier',
+    ['call_type', 'tier', 'model']
+)
+MODEL_ESCALATIONS = Counter(
+    'deep_job_search_model_escalations_total', 'Cascade escalations past a model tier',
+    ['call_type', 'tier', 'reason']
+)
+CACHE_LOOKUPS = Counter(
+    'deep_job_search_cache_lookups_total', 'Cache lookups by cache and result', ['cache', 'result']
+)
+
+# Tracing: W3C traceparent-compatible spans, propagated in Celery headers
+_TRACEPARENT = re.compile(r'^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$')
+_current_span: contextvars.ContextVar = contextvars.ContextVar('current_span', default=None)
+
+class Span:
+    """One timed operation within a trace."""
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], sampled: bool, attributes: Dict[str, Any]):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.sampled = sampled
+        self.attributes = attributes
+        self.error: Optional[str] = None
+        self.start_time = time.time()
+        self._start = time.monotonic()
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    def elapsed(self) -> float:
+        """Seconds since the span started."""
+        return time.monotonic() - self._start
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+def parse_traceparent(value: Optional[str]) -> Optional[Tuple[str, str, bool]]:
+    """(trace_id, parent span id, sampled) from a traceparent header, if valid."""
+    match = _TRACEPARENT.match((value or '').strip().lower())
+    if not match:
+        return None
+    return match.group(1), match.group(2), match.group(3) == '01'
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+def start_span(name: str, traceparent: Optional[str] = None, **attributes) -> Span:
+    """Start a span under `traceparent` if given, else under the current span, else a new trace."""
+    remote = parse_traceparent(traceparent)
+    parent = current_span()
+    if remote:
+        trace_id, parent_id, sampled = remote
+    elif parent is not None:
+        trace_id, parent_id, sampled = parent.trace_id, parent.span_id, parent.sampled
+    else:
+        trace_id, parent_id, sampled = secrets.token_hex(16), None, random.random() < LOG_SAMPLE_RATE
+    return Span(name, trace_id, parent_id, sampled, attributes)
+
+def end_span(span: Span) -> None:
+    """Record a finished span's duration and log it if its trace is sampled."""
+    duration = span.elapsed()
+    SPAN_SECONDS.labels(span.name).observe(duration)
+    logger.info(
+        "span %s finished in %.1f ms", span.name, duration * 1000,
+        extra={
+            'span': {
+                'name': span.name,
+                'trace_id': span.trace_id,
+                'span_id': span.span_id,
+                'parent_id': span.parent_id,
+                'start_time': span.start_time,
+                'duration_ms': round(duration * 1000, 2),
+                'error': span.error,
+                'attributes': span.attributes,
+            },
+            'sampled_span': span,
+        }
+    )
+
+def activate(span: Optional[Span]) -> contextvars.Token:
+    """Make `span` current; reset with deactivate(token)."""
+    return _current_span.set(span)
+
+def deactivate(token: contextvars.Token) -> None:
+    _current_span.reset(token)
+
+@contextmanager
+def span(name: str, traceparent: Optional[str] = None, **attributes) -> Iterator[Span]:
+    """Trace the enclosed block as a child of the current span."""
+    current = start_span(name, traceparent, **attributes)
+    token = activate(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        deactivate(token)
+        end_span(current)
+
+@contextmanager
+def llm_call(model: str, prompt_tokens: int, **attributes) -> Iterator[Span]:
+    """
+    Trace one OpenAI call: an "openai.chat" span, its latency by outcome and
+    its prompt size. Callers record the completion size with llm_output().
+    """
+    started = time.monotonic()
+    outcome = 'error'
+    LLM_TOKENS.labels(model, 'in').observe(prompt_tokens)
+    try:
+        with span("openai.chat", model=model, prompt_tokens=prompt_tokens, **attributes) as current:
+            yield current
+        outcome = 'ok'
+    finally:
+        LLM_SECONDS.labels(model, outcome).observe(time.monotonic() - started)
+
+def llm_output(model: str, completion_tokens: int) -> None:
+    LLM_TOKENS.labels(model, 'out').observe(completion_tokens)
+    current = current_span()
+    if current is not None:
+        current.set_attribute('completion_tokens', completion_tokens)
+
+def inject_headers(headers: Dict[str, Any]) -> None:
+    """Add the current trace context and enqueue time to outgoing task headers."""
+    current = current_span()
+    if current is not None:
+        headers[TRACEPARENT_HEADER] = current.traceparent
+    headers[ENQUEUED_AT_HEADER] = time.time()
+
+# Structured, sampled logging
+_STANDARD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line with trace context and any `extra` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            'ts': round(record.created, 3),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        current = current_span()
+        if current is not None:
+            payload['trace_id'] = current.trace_id
+            payload['span_id'] = current.span_id
+        for key, value in vars(record).items():
+            if key not in _STANDARD_ATTRS and key != 'sampled_span':
+                payload[key] = value
+        if record.exc_info:
+            payload['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep warnings and errors, and INFO/DEBUG records only for sampled traces
+    (or a LOG_SAMPLE_RATE share of records outside any trace).
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        current = getattr(record, 'sampled_span', None) or current_span()
+        if current is not None:
+            return current.sampled
+        return LOG_SAMPLE_RATE >= 1.0 or random.random() < LOG_SAMPLE_RATE
+
+_logging_configured = False
+
+def configure_logging() -> None:
+    """Route all logging through one structured, sampled stderr handler."""
+    global _logging_configured
+    if _logging_configured:
+        return
+    _logging_configured = True
+    handler = logging.StreamHandler()
+    if LOG_FORMAT == 'json':
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+    handler.addFilter(SamplingFilter())
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(LOG_LEVEL)
+
+# Metrics exposition
+def _registry() -> CollectorRegistry:
+    if not MULTIPROC_DIR:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+def metrics_payload() -> bytes:
+    """Current metrics in the Prometheus text format."""
+    return generate_latest(_registry())
+
+def start_metrics_server(port: int = None) -> None:
+    """Serve /metrics from a worker; no-op unless WORKER_METRICS_PORT is set."""
+    port = WORKER_METRICS_PORT if port is None else port
+    if port:
+        start_http_server(port, registry=_registry())
+        logger.info("Worker metrics listening on port %d", port)
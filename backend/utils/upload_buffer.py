@@ -0,0 +1,139 @@
+import os
+import io
+import mmap
+import asyncio
+import hashlib
+import tempfile
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator, List, Optional, Union
+from fastapi import UploadFile
+
+# Uploads are read in chunks, hashed and size-checked as they arrive
+UPLOAD_MAX_BYTES = int(os.getenv('UPLOAD_MAX_BYTES', str(10 * 1024 * 1024)))
+# Room for the multipart framing (boundaries, part headers) around the file
+# when the API rejects oversized requests by Content-Length
+UPLOAD_FORM_OVERHEAD = int(os.getenv('UPLOAD_FORM_OVERHEAD', str(64 * 1024)))
+UPLOAD_CHUNK_SIZE = int(os.getenv('UPLOAD_CHUNK_SIZE', str(256 * 1024)))
+# Larger uploads spill to a temp file that readers map instead of copying
+UPLOAD_SPILL_THRESHOLD = int(os.getenv('UPLOAD_SPILL_THRESHOLD', str(1024 * 1024)))
+UPLOAD_SPILL_DIR = os.getenv('UPLOAD_SPILL_DIR') or None
+
+# What extraction functions receive: the bytes of a small upload, or the
+# path of a spilled one (cheap to pass to pool processes)
+UploadSource = Union[bytes, str]
+
+class UploadTooLarge(Exception):
+    """Raised when an upload exceeds UPLOAD_MAX_BYTES."""
+
+@contextmanager
+def open_source(source: UploadSource) -> Iterator[BinaryIO]:
+    """
+    Open an upload source as a seekable binary stream without copying it:
+    a BytesIO sharing the bytes, or a read-only memory map of the file.
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        yield io.BytesIO(source)
+        return
+    with open(source, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        yield mapped
+
+class UploadBuffer:
+    """
+    One upload, read once. Small uploads stay in memory; larger ones live in
+    a temp file. Every consumer (hashing, parsing, S3) shares the same data.
+    """
+
+    def __init__(self, content: Optional[bytes], path: Optional[str], size: int, sha256: str):
+        self._content = content
+        self.path = path
+        self.size = size
+        self.sha256 = sha256
+        self._maps: List[mmap.mmap] = []
+
+    @property
+    def spilled(self) -> bool:
+        return self.path is not None
+
+    def source(self) -> UploadSource:
+        """The bytes, or the temp file path for spilled uploads."""
+        return self.path if self.spilled else self._content
+
+    def open(self) -> BinaryIO:
+        """A new stream positioned at the start; closed with the buffer."""
+        if not self.spilled:
+            return io.BytesIO(self._content)
+        with open(self.path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._maps.append(mapped)
+        return mapped
+
+    def close(self) -> None:
+        """Release maps and delete the temp file once every reader is done."""
+        for mapped in self._maps:
+            try:
+                mapped.close()
+            except BufferError:
+                # A reader still holds a view of it; the map goes with the view
+                pass
+        self._maps = []
+        if self.path is not None:
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+            self.path = None
+        self._content = b''
+
+    def __enter__(self) -> 'UploadBuffer':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+async def read_upload(file: UploadFile, max_bytes: int = None, spill_threshold: int = None) -> UploadBuffer:
+    """
+    Read an upload in UPLOAD_CHUNK_SIZE chunks, hashing as it goes. Raises
+    UploadTooLarge as soon as it passes `max_bytes` (default UPLOAD_MAX_BYTES);
+    past `spill_threshold` (default UPLOAD_SPILL_THRESHOLD) the data goes to a
+    temp file, not memory. This only caps the copy: by now Starlette has
+    received the whole body, so the API limits that by Content-Length.
+    """
+    max_bytes = UPLOAD_MAX_BYTES if max_bytes is None else max_bytes
+    spill_threshold = UPLOAD_SPILL_THRESHOLD if spill_threshold is None else spill_threshold
+    if file.size is not None and file.size > max_bytes:
+        raise UploadTooLarge(f"Upload exceeds the {max_bytes} byte limit")
+
+    digest = hashlib.sha256()
+    chunks: List[bytes] = []
+    size = 0
+    spill = None
+    try:
+        while True:
+            chunk = await file.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > max_bytes:
+                raise UploadTooLarge(f"Upload exceeds the {max_bytes} byte limit")
+            digest.update(chunk)
+            if spill is None and size > spill_threshold:
+                spill = tempfile.NamedTemporaryFile(prefix='upload-', dir=UPLOAD_SPILL_DIR, delete=False)
+                chunks.append(chunk)
+                await asyncio.to_thread(spill.writelines, chunks)
+                chunks = []
+            elif spill is not None:
+                await asyncio.to_thread(spill.write, chunk)
+            else:
+                chunks.append(chunk)
+    except BaseException:
+        if spill is not None:
+            spill.close()
+            os.unlink(spill.name)
+        raise
+    finally:
+        await file.seek(0)  # Reset file pointer for subsequent reads
+
+    if spill is None:
+        return UploadBuffer(b''.join(chunks), None, size, digest.hexdigest())
+    spill.close()
+    return UploadBuffer(None, spill.name, size, digest.hexdigest())
@@ -52,6 +52,12 @@ export default function Preferences() {
     setIsLoading(true);
     setError(null);
 
+    // Searches reference the stored resume profile instead of resending the text
+    const profileId = sessionStorage.getItem('profileId');
+    const resume = profileId
+      ? { profile_id: profileId }
+      : { resume_summary: JSON.parse(sessionStorage.getItem('resumeSummary')) };
+
     try {
       const response = await fetch(
         `${process.env.NEXT_PUBLIC_API_URL}/api/deep_search`,
@@ -61,7 +67,7 @@ export default function Preferences() {
             'Content-Type': 'application/json',
           },
           body: JSON.stringify({
-            resume_summary: JSON.parse(sessionStorage.getItem('resumeSummary')),
+            ...resume,
             preferences: preferences,
           }),
         }
@@ -23,6 +23,30 @@ export default function Results() {
 
   useEffect(() => {
     let pollInterval
+    let eventSource
+
+    const applyStatus = (data) => {
+      setTaskStatus(data.status)
+      setProgress(data.progress || 0)
+
+      if (data.result) {
+        if (data.result.current_jobs) {
+          setJobListings(data.result.current_jobs)
+        }
+        if (data.result.jobs) {
+          setJobListings(data.result.jobs)
+        }
+        if (data.result.followup_questions) {
+          setFollowUpQuestions(data.result.followup_questions)
+        }
+      }
+
+      if (data.error) {
+        setError(data.error)
+      }
+
+      return ['SUCCESS', 'FAILURE', 'REVOKED'].includes(data.status) || Boolean(data.error)
+    }
 
     const pollTaskStatus = async () => {
       if (!taskId) return
@@ -32,25 +56,9 @@ export default function Results() {
         if (!response.ok) throw new Error('Failed to fetch task status')
 
         const data = await response.json()
-        setTaskStatus(data.status)
-        setProgress(data.progress || 0)
-
-        if (data.result) {
-          if (data.result.current_jobs) {
-            setJobListings(data.result.current_jobs)
-          }
-          if (data.result.followup_questions) {
-            setFollowUpQuestions(data.result.followup_questions)
-          }
-        }
-
-        if (data.error) {
-          setError(data.error)
-          clearInterval(pollInterval)
-        }
 
         // Stop polling if task is complete
-        if (['SUCCESS', 'FAILURE'].includes(data.status)) {
+        if (applyStatus(data)) {
           clearInterval(pollInterval)
         }
       } catch (err) {
@@ -59,12 +67,35 @@ export default function Results() {
       }
     }
 
-    if (taskId) {
+    const startPolling = () => {
       pollTaskStatus() // Initial poll
       pollInterval = setInterval(pollTaskStatus, 5000) // Poll every 5 seconds
     }
 
+    const handleEvent = (event) => {
+      if (applyStatus(JSON.parse(event.data))) {
+        eventSource.close()
+      }
+    }
+
+    if (taskId) {
+      if (typeof EventSource === 'undefined') {
+        startPolling()
+      } else {
+        // Progress is pushed over SSE; fall back to polling if the stream drops
+        eventSource = new EventSource(`${process.env.NEXT_PUBLIC_API_URL}/api/task/${taskId}/stream`)
+        const eventNames = ['pending', 'started', 'progress', 'retry', 'success', 'failure', 'revoked']
+        eventNames.forEach((name) => eventSource.addEventListener(name, handleEvent))
+        eventSource.onerror = () => {
+          if (eventSource.readyState === EventSource.CLOSED) return
+          eventSource.close()
+          startPolling()
+        }
+      }
+    }
+
     return () => {
+      if (eventSource) eventSource.close()
       if (pollInterval) clearInterval(pollInterval)
     }
   }, [taskId])
@@ -94,6 +94,11 @@ export default function ResumeUpload() {
 
       const data = await response.json();
       sessionStorage.setItem('resumeSummary', JSON.stringify(data.summary));
+      if (data.profile_id) {
+        sessionStorage.setItem('profileId', data.profile_id);
+      } else {
+        sessionStorage.removeItem('profileId');
+      }
       router.push('/preferences');
     } catch (err) {
       setError(err.message);